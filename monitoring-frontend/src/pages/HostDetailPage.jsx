@@ -84,11 +84,11 @@ const HostDetailPage = observer(() => {
                 { key: "mikrotik.system.memory.total", name: "Загальна пам'ять (байт)", unit: "bytes" },
                 { key: "mikrotik.system.memory.used_percent", name: "Використано пам'яті (%)", unit: "%" }, // <--- Віртуальна метрика
                 { key: "mikrotik.system.cpu.load", name: "Завантаження CPU", unit: "%" },
-                { key: "mikrotik.interface.ether1.in.octets", name: "ether1 - Вхідні октети", unit: "bytes" },
-                { key: "mikrotik.interface.ether1.out.octets", name: "ether1 - Вихідні октети", unit: "bytes" },
+                { key: "mikrotik.interface.ether1.in.bps", name: "ether1 - Вхідний трафік", unit: "bit/s" },
+                { key: "mikrotik.interface.ether1.out.bps", name: "ether1 - Вихідний трафік", unit: "bit/s" },
                 { key: "mikrotik.interface.ether1.oper_status", name: "ether1 - Операційний статус", unit: "" }, // <--- Нова метрика
-                { key: "mikrotik.interface.ether2.in.octets", name: "ether2 - Вхідні октети", unit: "bytes" },
-                { key: "mikrotik.interface.ether2.out.octets", name: "ether2 - Вихідні октети", unit: "bytes" },
+                { key: "mikrotik.interface.ether2.in.bps", name: "ether2 - Вхідний трафік", unit: "bit/s" },
+                { key: "mikrotik.interface.ether2.out.bps", name: "ether2 - Вихідний трафік", unit: "bit/s" },
                 { key: "mikrotik.interface.ether2.oper_status", name: "ether2 - Операційний статус", unit: "" }, // <--- Нова метрика
             ];
         }
@@ -0,0 +1,45 @@
+"""add_metric_archive
+
+Revision ID: 08787e07df55
+Revises: 4a82d045176c
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '08787e07df55'
+down_revision: Union[str, None] = '4a82d045176c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('metric_archive_files',
+    sa.Column('host_type', sa.String(length=50), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('path', sa.String(length=1024), nullable=False),
+    sa.Column('row_count', sa.BigInteger(), nullable=False),
+    sa.Column('min_timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('max_timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('min_value', sa.Float(), nullable=True),
+    sa.Column('max_value', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('host_type', 'day')
+    )
+    op.create_table('metric_archive_watermarks',
+    sa.Column('host_type', sa.String(length=50), nullable=False),
+    sa.Column('archived_until', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('host_type')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('metric_archive_watermarks')
+    op.drop_table('metric_archive_files')
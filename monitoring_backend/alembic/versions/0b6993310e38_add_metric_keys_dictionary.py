@@ -0,0 +1,118 @@
+"""add_metric_keys_dictionary
+
+Revision ID: 0b6993310e38
+Revises: 171290bc9072
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.predefined_data import METRIC_DEFINITIONS_BY_HOST_TYPE
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6993310e38'
+down_revision: Union[str, None] = '171290bc9072'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OLD_INDEX_NAME = "ix_metric_data_host_key_ts"
+INDEX_NAME = "ix_metric_data_host_key_id_ts"
+INDEX_COLUMNS = "(host_id, metric_key_id, timestamp DESC) INCLUDE (value_numeric)"
+
+
+def _partitions(bind) -> list:
+    return bind.execute(sa.text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'metric_data'
+        ORDER BY c.relname
+    """)).scalars().all()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+
+    op.create_table('metric_keys',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('key')
+    )
+    # Відомі ключі з визначень метрик (шаблони на кшталт mikrotik.interface.* реєструються при прийомі)
+    known_keys = sorted({
+        definition["key"]
+        for definitions in METRIC_DEFINITIONS_BY_HOST_TYPE.values()
+        for definition in definitions
+        if "*" not in definition["key"]
+    })
+    if known_keys:
+        op.bulk_insert(sa.table('metric_keys', sa.column('key', sa.String)), [{"key": key} for key in known_keys])
+    op.execute("""
+        INSERT INTO metric_keys (key)
+        SELECT DISTINCT metric_key FROM metric_data
+        ON CONFLICT (key) DO NOTHING
+    """)
+
+    # Нова колонка на партиціонованій таблиці - лише зміна метаданих; заповнюється по партиціях,
+    # кожна партиція окремою транзакцією, щоб не тримати одну гігантську транзакцію на всю історію
+    op.add_column('metric_data', sa.Column('metric_key_id', sa.Integer(), nullable=True))
+    with op.get_context().autocommit_block():
+        for partition in _partitions(bind):
+            op.execute(f"""
+                UPDATE {partition} AS d SET metric_key_id = k.id
+                FROM metric_keys k
+                WHERE k.key = d.metric_key AND d.metric_key_id IS NULL
+            """)
+
+    # Рядки, записані старим кодом під час заповнення
+    op.execute("""
+        INSERT INTO metric_keys (key)
+        SELECT DISTINCT metric_key FROM metric_data WHERE metric_key_id IS NULL
+        ON CONFLICT (key) DO NOTHING
+    """)
+    op.execute("""
+        UPDATE metric_data AS d SET metric_key_id = k.id
+        FROM metric_keys k
+        WHERE k.key = d.metric_key AND d.metric_key_id IS NULL
+    """)
+    op.alter_column('metric_data', 'metric_key_id', nullable=False)
+    op.create_foreign_key('metric_data_metric_key_id_fkey', 'metric_data', 'metric_keys', ['metric_key_id'], ['id'])
+
+    # Той самий покриваючий індекс, що й у 171290bc9072, але за metric_key_id (ON ONLY + CONCURRENTLY по партиціях)
+    op.execute(f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON ONLY metric_data {INDEX_COLUMNS}")
+    with op.get_context().autocommit_block():
+        for partition in _partitions(bind):
+            partition_index = f"{partition}_host_key_id_ts_idx"
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {partition_index}")
+            op.execute(f"CREATE INDEX CONCURRENTLY {partition_index} ON {partition} {INDEX_COLUMNS}")
+            op.execute(f"ALTER INDEX {INDEX_NAME} ATTACH PARTITION {partition_index}")
+
+    # Разом з колонкою видаляється і ix_metric_data_host_key_ts
+    op.drop_column('metric_data', 'metric_key')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('metric_data', sa.Column('metric_key', sa.String(length=255), nullable=True))
+    op.execute("""
+        UPDATE metric_data AS d SET metric_key = k.key
+        FROM metric_keys k
+        WHERE k.id = d.metric_key_id
+    """)
+    op.alter_column('metric_data', 'metric_key', nullable=False)
+    op.execute(
+        f"CREATE INDEX {OLD_INDEX_NAME} ON metric_data "
+        f"(host_id, metric_key, timestamp DESC) INCLUDE (value_numeric)"
+    )
+    op.drop_index(INDEX_NAME, table_name='metric_data')
+    op.drop_constraint('metric_data_metric_key_id_fkey', 'metric_data', type_='foreignkey')
+    op.drop_column('metric_data', 'metric_key_id')
+    op.drop_table('metric_keys')
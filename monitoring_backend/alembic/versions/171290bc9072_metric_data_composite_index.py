@@ -0,0 +1,61 @@
+"""metric_data_composite_index
+
+Revision ID: 171290bc9072
+Revises: cefd86a361ac
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '171290bc9072'
+down_revision: Union[str, None] = 'cefd86a361ac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_metric_data_host_key_ts"
+INDEX_COLUMNS = "(host_id, metric_key, timestamp DESC) INCLUDE (value_numeric)"
+
+
+def _partitions(bind) -> list:
+    return bind.execute(sa.text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'metric_data'
+        ORDER BY c.relname
+    """)).scalars().all()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+
+    # CREATE INDEX CONCURRENTLY не працює на партиціонованій таблиці, тому індекс спершу створюється
+    # лише на батьківській (ON ONLY, він невалідний і нічого не будує), потім CONCURRENTLY на кожній партиції
+    # без блокування запису і приєднується до батьківського. Після приєднання всіх партицій індекс стає валідним.
+    op.execute(f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON ONLY metric_data {INDEX_COLUMNS}")
+    with op.get_context().autocommit_block():
+        for partition in _partitions(bind):
+            partition_index = f"{partition}_host_key_ts_idx"
+            # Залишок невдалого попереднього запуску (невалідний індекс) будуємо заново
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {partition_index}")
+            op.execute(f"CREATE INDEX CONCURRENTLY {partition_index} ON {partition} {INDEX_COLUMNS}")
+            op.execute(f"ALTER INDEX {INDEX_NAME} ATTACH PARTITION {partition_index}")
+
+    # host_id та metric_key покриває новий індекс (префікс), timestamp потрібен rollup/retention для сканів за часом.
+    # DROP INDEX CONCURRENTLY для партиціонованих індексів не підтримується - звичайний DROP короткий
+    op.drop_index('ix_metric_data_host_id', table_name='metric_data')
+    op.drop_index('ix_metric_data_metric_key', table_name='metric_data')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_metric_data_host_id'), 'metric_data', ['host_id'], unique=False)
+    op.create_index(op.f('ix_metric_data_metric_key'), 'metric_data', ['metric_key'], unique=False)
+    op.drop_index(INDEX_NAME, table_name='metric_data')
@@ -0,0 +1,40 @@
+"""add_metric_chunks
+
+Revision ID: 4a82d045176c
+Revises: 9952892433a7
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a82d045176c'
+down_revision: Union[str, None] = '9952892433a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('metric_chunks',
+    sa.Column('host_id', sa.UUID(), nullable=False),
+    sa.Column('metric_key_id', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('end_time', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('sample_count', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['host_id'], ['hosts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['metric_key_id'], ['metric_keys.id'], ),
+    sa.PrimaryKeyConstraint('host_id', 'metric_key_id', 'start_time')
+    )
+    # Чанки вже стиснені - TOAST не повинен намагатися стиснути їх вдруге
+    op.execute("ALTER TABLE metric_chunks ALTER COLUMN data SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('metric_chunks')
@@ -0,0 +1,47 @@
+"""add_metric_rollups
+
+Revision ID: 5c2c3aa7a035
+Revises: 914c73abf2a4
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2c3aa7a035'
+down_revision: Union[str, None] = '914c73abf2a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('metric_rollups',
+    sa.Column('host_id', sa.UUID(), nullable=False),
+    sa.Column('metric_key', sa.String(length=255), nullable=False),
+    sa.Column('resolution_seconds', sa.Integer(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('value_min', sa.Float(), nullable=False),
+    sa.Column('value_max', sa.Float(), nullable=False),
+    sa.Column('value_avg', sa.Float(), nullable=False),
+    sa.Column('sample_count', sa.Integer(), nullable=False),
+    sa.Column('value_last', sa.Float(), nullable=False),
+    sa.Column('last_timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['host_id'], ['hosts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('host_id', 'metric_key', 'resolution_seconds', 'bucket_start')
+    )
+    op.create_table('rollup_watermarks',
+    sa.Column('resolution_seconds', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('watermark', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('resolution_seconds')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rollup_watermarks')
+    op.drop_table('metric_rollups')
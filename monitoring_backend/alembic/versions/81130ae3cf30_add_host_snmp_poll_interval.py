@@ -0,0 +1,28 @@
+"""add_host_snmp_poll_interval
+
+Revision ID: 81130ae3cf30
+Revises: 5c2c3aa7a035
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '81130ae3cf30'
+down_revision: Union[str, None] = '5c2c3aa7a035'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('hosts', sa.Column('snmp_poll_interval_seconds', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('hosts', 'snmp_poll_interval_seconds')
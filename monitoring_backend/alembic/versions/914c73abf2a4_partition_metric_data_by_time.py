@@ -0,0 +1,111 @@
+"""partition_metric_data_by_time
+
+Revision ID: 914c73abf2a4
+Revises: cbc7d00c63de
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '914c73abf2a4'
+down_revision: Union[str, None] = 'cbc7d00c63de'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _partition_start(ts: datetime, span_days: int) -> datetime:
+    days = (ts - EPOCH).days
+    return EPOCH + timedelta(days=days - days % span_days)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    span_days = max(settings.METRIC_PARTITION_INTERVAL_DAYS, 1)
+    bind = op.get_bind()
+
+    # Стара непартиціонована таблиця - переносимо дані і видаляємо її в кінці
+    op.execute("ALTER TABLE metric_data RENAME TO metric_data_old")
+    op.execute("ALTER TABLE metric_data_old RENAME CONSTRAINT metric_data_pkey TO metric_data_old_pkey")
+    op.execute("ALTER TABLE metric_data_old RENAME CONSTRAINT metric_data_host_id_fkey TO metric_data_old_host_id_fkey")
+    op.execute("ALTER INDEX ix_metric_data_host_id RENAME TO ix_metric_data_old_host_id")
+    op.execute("ALTER INDEX ix_metric_data_metric_key RENAME TO ix_metric_data_old_metric_key")
+    op.execute("ALTER INDEX ix_metric_data_timestamp RENAME TO ix_metric_data_old_timestamp")
+
+    # Ключ партиціювання має входити в первинний ключ
+    op.execute("""
+        CREATE TABLE metric_data (
+            id UUID NOT NULL,
+            host_id UUID NOT NULL,
+            metric_key VARCHAR(255) NOT NULL,
+            value_numeric DOUBLE PRECISION,
+            value_text TEXT,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT metric_data_pkey PRIMARY KEY (id, timestamp),
+            CONSTRAINT metric_data_host_id_fkey FOREIGN KEY (host_id) REFERENCES hosts (id)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.create_index(op.f('ix_metric_data_host_id'), 'metric_data', ['host_id'], unique=False)
+    op.create_index(op.f('ix_metric_data_metric_key'), 'metric_data', ['metric_key'], unique=False)
+    op.create_index(op.f('ix_metric_data_timestamp'), 'metric_data', ['timestamp'], unique=False)
+
+    # Партиції від найстаріших даних до кількох інтервалів наперед
+    now = datetime.now(timezone.utc)
+    oldest = bind.execute(sa.text("SELECT min(timestamp) FROM metric_data_old")).scalar() or now
+    start = _partition_start(min(oldest, now), span_days)
+    last_start = _partition_start(now, span_days) + timedelta(days=span_days * settings.METRIC_PARTITION_PRECREATE)
+    while start <= last_start:
+        end = start + timedelta(days=span_days)
+        op.execute(
+            f"CREATE TABLE metric_data_p{start:%Y%m%d} PARTITION OF metric_data "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+    # Для рядків з часом поза створеними партиціями (наприклад, неправильний годинник агента)
+    op.execute("CREATE TABLE metric_data_default PARTITION OF metric_data DEFAULT")
+
+    op.execute("""
+        INSERT INTO metric_data (id, host_id, metric_key, value_numeric, value_text, timestamp)
+        SELECT id, host_id, metric_key, value_numeric, value_text, timestamp FROM metric_data_old
+    """)
+    op.drop_table('metric_data_old')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE metric_data RENAME TO metric_data_partitioned")
+    op.execute("ALTER TABLE metric_data_partitioned RENAME CONSTRAINT metric_data_pkey TO metric_data_partitioned_pkey")
+    op.execute("ALTER TABLE metric_data_partitioned RENAME CONSTRAINT metric_data_host_id_fkey TO metric_data_partitioned_host_id_fkey")
+    op.execute("ALTER INDEX ix_metric_data_host_id RENAME TO ix_metric_data_partitioned_host_id")
+    op.execute("ALTER INDEX ix_metric_data_metric_key RENAME TO ix_metric_data_partitioned_metric_key")
+    op.execute("ALTER INDEX ix_metric_data_timestamp RENAME TO ix_metric_data_partitioned_timestamp")
+
+    op.create_table('metric_data',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('host_id', sa.UUID(), nullable=False),
+    sa.Column('metric_key', sa.String(length=255), nullable=False),
+    sa.Column('value_numeric', sa.Float(), nullable=True),
+    sa.Column('value_text', sa.Text(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['host_id'], ['hosts.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_metric_data_host_id'), 'metric_data', ['host_id'], unique=False)
+    op.create_index(op.f('ix_metric_data_metric_key'), 'metric_data', ['metric_key'], unique=False)
+    op.create_index(op.f('ix_metric_data_timestamp'), 'metric_data', ['timestamp'], unique=False)
+
+    op.execute("""
+        INSERT INTO metric_data (id, host_id, metric_key, value_numeric, value_text, timestamp)
+        SELECT id, host_id, metric_key, value_numeric, value_text, timestamp FROM metric_data_partitioned
+    """)
+    # DROP батьківської таблиці видаляє і всі її партиції
+    op.drop_table('metric_data_partitioned')
@@ -0,0 +1,123 @@
+"""split_numeric_and_text_samples
+
+Revision ID: 9952892433a7
+Revises: 0b6993310e38
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9952892433a7'
+down_revision: Union[str, None] = '0b6993310e38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+KEY_INDEX_NAME = "ix_metric_data_host_key_id_ts"
+KEY_INDEX_COLUMNS = "(host_id, metric_key_id, timestamp DESC) INCLUDE (value_numeric)"
+
+
+def _partitions(bind) -> list:
+    return bind.execute(sa.text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'metric_data'
+        ORDER BY c.relname
+    """)).scalars().all()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Міграція переписує всю історію metric_data - виконувати при зупиненому прийомі метрик
+    bind = op.get_bind()
+
+    op.create_table('metric_text_values',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('value_hash', sa.String(length=32), nullable=False),
+    sa.Column('value', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('value_hash')
+    )
+    op.create_table('metric_text_samples',
+    sa.Column('host_id', sa.UUID(), nullable=False),
+    sa.Column('metric_key_id', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('text_value_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['host_id'], ['hosts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['metric_key_id'], ['metric_keys.id'], ),
+    sa.ForeignKeyConstraint(['text_value_id'], ['metric_text_values.id'], ),
+    sa.PrimaryKeyConstraint('host_id', 'metric_key_id', 'timestamp')
+    )
+    op.create_index(op.f('ix_metric_text_samples_timestamp'), 'metric_text_samples', ['timestamp'], unique=False)
+
+    # Перенесення текстових вимірів і видалення дублікатів (host_id, metric_key_id, timestamp),
+    # які не пройдуть новий первинний ключ; кожна партиція - окремими транзакціями
+    with op.get_context().autocommit_block():
+        for partition in _partitions(bind):
+            op.execute(f"""
+                INSERT INTO metric_text_values (value_hash, value)
+                SELECT DISTINCT md5(value_text), value_text FROM {partition}
+                WHERE value_numeric IS NULL AND value_text IS NOT NULL
+                ON CONFLICT (value_hash) DO NOTHING
+            """)
+            op.execute(f"""
+                INSERT INTO metric_text_samples (host_id, metric_key_id, timestamp, text_value_id)
+                SELECT d.host_id, d.metric_key_id, d.timestamp, v.id
+                FROM {partition} d
+                JOIN metric_text_values v ON v.value_hash = md5(d.value_text)
+                WHERE d.value_numeric IS NULL AND d.value_text IS NOT NULL
+                ON CONFLICT DO NOTHING
+            """)
+            op.execute(f"DELETE FROM {partition} WHERE value_numeric IS NULL")
+            op.execute(f"""
+                DELETE FROM {partition} a
+                USING {partition} b
+                WHERE a.host_id = b.host_id AND a.metric_key_id = b.metric_key_id
+                  AND a.timestamp = b.timestamp AND a.id < b.id
+            """)
+
+    # Первинний ключ (host_id, metric_key_id, timestamp) замінює і старий (id, timestamp), і окремий
+    # індекс ix_metric_data_host_key_id_ts - на кожен рядок залишається один індексний запис замість двох
+    op.execute("ALTER TABLE metric_data DROP CONSTRAINT metric_data_pkey")
+    op.drop_index(KEY_INDEX_NAME, table_name='metric_data')
+    op.drop_column('metric_data', 'id')
+    op.drop_column('metric_data', 'value_text')
+    op.alter_column('metric_data', 'value_numeric', nullable=False)
+
+    # DROP COLUMN лише ховає колонки - VACUUM FULL переписує кожну партицію без них
+    # (блокує одну партицію на час перезапису)
+    with op.get_context().autocommit_block():
+        for partition in _partitions(bind):
+            op.execute(f"VACUUM FULL {partition}")
+
+    op.execute(
+        "ALTER TABLE metric_data ADD CONSTRAINT metric_data_pkey "
+        "PRIMARY KEY (host_id, metric_key_id, timestamp) INCLUDE (value_numeric)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE metric_data DROP CONSTRAINT metric_data_pkey")
+    op.add_column('metric_data', sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False))
+    op.alter_column('metric_data', 'id', server_default=None)
+    op.add_column('metric_data', sa.Column('value_text', sa.Text(), nullable=True))
+    op.alter_column('metric_data', 'value_numeric', nullable=True)
+    op.execute("""
+        INSERT INTO metric_data (id, host_id, metric_key_id, value_text, timestamp)
+        SELECT gen_random_uuid(), s.host_id, s.metric_key_id, v.value, s.timestamp
+        FROM metric_text_samples s
+        JOIN metric_text_values v ON v.id = s.text_value_id
+    """)
+    op.execute("ALTER TABLE metric_data ADD CONSTRAINT metric_data_pkey PRIMARY KEY (id, timestamp)")
+    op.execute(f"CREATE INDEX {KEY_INDEX_NAME} ON metric_data {KEY_INDEX_COLUMNS}")
+
+    op.drop_index(op.f('ix_metric_text_samples_timestamp'), table_name='metric_text_samples')
+    op.drop_table('metric_text_samples')
+    op.drop_table('metric_text_values')
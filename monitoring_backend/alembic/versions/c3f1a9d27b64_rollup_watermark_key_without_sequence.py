@@ -0,0 +1,31 @@
+"""rollup_watermark_key_without_sequence
+
+Revision ID: c3f1a9d27b64
+Revises: 08787e07df55
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f1a9d27b64'
+down_revision: Union[str, None] = '08787e07df55'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # resolution_seconds - роздільність агрегатів, а не сурогатний ключ; бази, створені до виправлення
+    # 5c2c3aa7a035, отримали для неї SERIAL-послідовність
+    op.execute("ALTER TABLE rollup_watermarks ALTER COLUMN resolution_seconds DROP DEFAULT")
+    op.execute("DROP SEQUENCE IF EXISTS rollup_watermarks_resolution_seconds_seq")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    pass
@@ -0,0 +1,43 @@
+"""add_metric_latest_table
+
+Revision ID: cbc7d00c63de
+Revises: 25dc31ebe9fe
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cbc7d00c63de'
+down_revision: Union[str, None] = '25dc31ebe9fe'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('metric_latest',
+    sa.Column('host_id', sa.UUID(), nullable=False),
+    sa.Column('metric_key', sa.String(length=255), nullable=False),
+    sa.Column('value_numeric', sa.Float(), nullable=True),
+    sa.Column('value_text', sa.Text(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['host_id'], ['hosts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('host_id', 'metric_key')
+    )
+    # Заповнюємо поточними значеннями з уже накопиченої історії
+    op.execute("""
+        INSERT INTO metric_latest (host_id, metric_key, value_numeric, value_text, timestamp)
+        SELECT DISTINCT ON (host_id, metric_key) host_id, metric_key, value_numeric, value_text, timestamp
+        FROM metric_data
+        ORDER BY host_id, metric_key, timestamp DESC
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('metric_latest')
@@ -0,0 +1,31 @@
+"""add_host_agent_timeout
+
+Revision ID: cefd86a361ac
+Revises: 81130ae3cf30
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cefd86a361ac'
+down_revision: Union[str, None] = '81130ae3cf30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('hosts', sa.Column('agent_timeout_seconds', sa.Integer(), nullable=True))
+    # Перевірка доступності агентів шукає хости за типом і статусом
+    op.create_index('ix_hosts_type_status', 'hosts', ['host_type', 'availability_status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_hosts_type_status', table_name='hosts')
+    op.drop_column('hosts', 'agent_timeout_seconds')
@@ -0,0 +1,38 @@
+"""metric_data_host_fk_on_delete_cascade
+
+Revision ID: d7e2b5a90c41
+Revises: c3f1a9d27b64
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e2b5a90c41'
+down_revision: Union[str, None] = 'c3f1a9d27b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Виміри видаленого хоста видаляє сам Postgres (Host.metrics з passive_deletes), як і для
+    # metric_text_samples, metric_latest і metric_rollups - ORM не завантажує їх перед DELETE хоста
+    op.execute("ALTER TABLE metric_data DROP CONSTRAINT metric_data_host_id_fkey")
+    op.execute(
+        "ALTER TABLE metric_data ADD CONSTRAINT metric_data_host_id_fkey "
+        "FOREIGN KEY (host_id) REFERENCES hosts (id) ON DELETE CASCADE"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE metric_data DROP CONSTRAINT metric_data_host_id_fkey")
+    op.execute(
+        "ALTER TABLE metric_data ADD CONSTRAINT metric_data_host_id_fkey "
+        "FOREIGN KEY (host_id) REFERENCES hosts (id)"
+    )
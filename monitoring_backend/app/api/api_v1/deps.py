@@ -1,14 +1,15 @@
 # app/api/api_v1/deps.py
-from typing import Generator, Optional
+from typing import AsyncGenerator, Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import ValidationError  # Для обробки помилок валідації токена
 
-from app.db.database import SessionLocal
+from app.db.database import SessionLocal, AsyncSessionLocal
 from app.core.config import settings
-from app.db import crud  # Припускаємо, що crud_user імпортується через crud
+from app.db import crud_async
 from app.db.models.user import User as UserModel  # Даємо аліас моделі
 from app.schemas.user import TokenData  # Якщо використовуєш TokenData
 
@@ -28,8 +29,13 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 async def get_current_user(
-        db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+        db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
 ) -> Optional[UserModel]:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -50,7 +56,8 @@ async def get_current_user(
     except ValidationError:  # Якщо використовуєш Pydantic для payload
         raise credentials_exception
 
-    user = crud.crud_user.get_user_by_username(db, username=username)  # Використовуємо crud.crud_user
+    # async def залежність - тому читання користувача теж асинхронне, щоб не блокувати event loop
+    user = await crud_async.crud_user.get_user_by_username(db, username=username)
     if user is None:
         raise credentials_exception
     return user
@@ -1,32 +1,57 @@
 from typing import List, Any, Dict
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.api_v1 import deps
+from app.core.config import settings
 from app.db import crud
 from app.schemas import agent as agent_schema
 from app.schemas import host as host_schema
 from app.services import agent_service
+from app.services.ingest_queue import IngestQueueFullError
 from app.schemas import user as user_schema
 
 router = APIRouter()
 
 
 @router.post("/data/{unique_agent_id}", summary="Submit data from an agent")
-def submit_agent_data(
+async def submit_agent_data(
         unique_agent_id: str,
         payload: agent_schema.AgentDataPayload,
         request: Request,
-        db: Session = Depends(deps.get_db),
+        response: Response,
+        db: AsyncSession = Depends(deps.get_async_db),
 ) -> Dict[str, Any]:
     """
     Ендпоінт для агентів для надсилання даних метрик.
     Якщо агент новий, він буде зареєстрований зі статусом 'pending_approval'.
+    В режимі AGENT_INGEST_MODE="queued" метрики ставляться в чергу і повертається 202,
+    а при заповненій черзі - 429.
+    Працює на AsyncSession прямо на event loop-і, без thread pool-у.
     """
     # Тут можна додати перевірку API ключа агента в майбутньому
     client_ip = request.client.host if request.client else None
-    result = agent_service.process_agent_data(
+    if settings.AGENT_INGEST_MODE == "queued":
+        try:
+            result = await agent_service.enqueue_agent_data_async(
+                db=db,
+                unique_agent_id=unique_agent_id,
+                payload=payload,
+                client_ip=client_ip
+            )
+        except IngestQueueFullError as e:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=str(e),
+                headers={"Retry-After": "1"}
+            )
+        if result.get("status") == "metrics_queued":
+            response.status_code = status.HTTP_202_ACCEPTED
+        return result
+
+    result = await agent_service.process_agent_data_async(
         db=db,
         unique_agent_id=unique_agent_id,
         payload=payload,
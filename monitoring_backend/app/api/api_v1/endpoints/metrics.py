@@ -1,32 +1,61 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 
-from app.db import crud
+from app.db import crud_async
 from app.schemas import metric_data as metric_schema
 from app.api.api_v1 import deps
 from app.schemas import user as user_schema
+from app.services import rollup_service, archive_service
 
 router = APIRouter()
 
-@router.get("/hosts/{host_id}/metrics/", response_model=List[metric_schema.MetricDataRead])
-def read_metric_data_for_host(
+@router.get("/hosts/{host_id}/metrics/", response_model=List[metric_schema.MetricPointRead])
+async def read_metric_data_for_host(
     host_id: uuid.UUID,
     metric_key: Optional[str] = Query(None, description="Ключ метрики для фільтрації"),
     start_time: Optional[datetime] = Query(None, description="Початковий час для вибірки (ISO формат)"),
     end_time: Optional[datetime] = Query(None, description="Кінцевий час для вибірки (ISO формат)"),
     skip: int = Query(0, ge=0),
     limit: int = Query(1000, ge=1, le=5000),
-    db: Session = Depends(deps.get_db),
+    max_points: Optional[int] = Query(None, ge=1, le=5000, description="Бюджет точок на одну метрику; якщо сирих даних більше - повертаються агрегати 1m/5m/1h"),
+    db: AsyncSession = Depends(deps.get_async_db),
         current_user: user_schema.UserRead = Depends(deps.get_current_active_user)
 ):
-    db_host = crud.crud_host.get_host(db, host_id=host_id)
+    db_host = await crud_async.crud_host.get_host(db, host_id=host_id)
     if db_host is None:
         raise HTTPException(status_code=404, detail="Host not found")
 
-    metrics = crud.crud_metric_data.get_metric_data_for_host(
+    if max_points and start_time:
+        # Час без зони вважаємо UTC, щоб коректно порівнювати з watermark агрегатів
+        start_time = start_time if start_time.tzinfo else start_time.replace(tzinfo=timezone.utc)
+        if end_time and not end_time.tzinfo:
+            end_time = end_time.replace(tzinfo=timezone.utc)
+        resolution_seconds = rollup_service.choose_resolution(
+            start_time, end_time or datetime.now(timezone.utc), max_points
+        )
+        if resolution_seconds:
+            return await crud_async.crud_metric_rollup.get_rollup_points(
+                db,
+                host_id=host_id,
+                metric_key=metric_key,
+                resolution_seconds=resolution_seconds,
+                start_time=start_time,
+                end_time=end_time,
+                skip=skip,
+                limit=limit
+            )
+
+    # Початок раніше онлайн-вікна - старіша частина читається з Parquet-архіву
+    archived = await archive_service.get_metric_data_with_archive(
+        db, db_host, metric_key, start_time, end_time, skip, limit
+    )
+    if archived is not None:
+        return archived
+
+    metrics = await crud_async.crud_metric_data.get_metric_data_for_host(
         db,
         host_id=host_id,
         metric_key=metric_key,
@@ -35,4 +64,20 @@ def read_metric_data_for_host(
         skip=skip,
         limit=limit
     )
-    return metrics
\ No newline at end of file
+    return metrics
+
+
+@router.get("/hosts/{host_id}/metrics/latest/", response_model=List[metric_schema.MetricLatestRead])
+async def read_latest_metrics_for_host(
+    host_id: uuid.UUID,
+    db: AsyncSession = Depends(deps.get_async_db),
+        current_user: user_schema.UserRead = Depends(deps.get_current_active_user)
+):
+    """
+    Поточні (останні отримані) значення всіх метрик хоста.
+    """
+    db_host = await crud_async.crud_host.get_host(db, host_id=host_id)
+    if db_host is None:
+        raise HTTPException(status_code=404, detail="Host not found")
+
+    return await crud_async.crud_metric_data.get_latest_metrics_for_host(db, host_id=host_id)
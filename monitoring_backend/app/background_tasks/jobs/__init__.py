@@ -1,3 +1,8 @@
 from .snmp_poller_job import poll_all_snmp_hosts_job
 from .agent_status_job import check_all_agent_availability_job
-from .trigger_evaluator_job import evaluate_all_triggers_job
\ No newline at end of file
+from .trigger_evaluator_job import evaluate_all_triggers_job
+from .partition_maintenance_job import maintain_metric_partitions_job
+from .rollup_job import aggregate_metric_rollups_job
+from .retention_job import purge_expired_metrics_job
+from .compression_job import compress_cold_metrics_job
+from .archive_job import archive_metric_days_job
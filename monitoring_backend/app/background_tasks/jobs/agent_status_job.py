@@ -1,35 +1,26 @@
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta, timezone
+from app.core.config import settings
 from app.db import crud
-from app.db.models.enums import HostAvailabilityStatusEnum, HostTypeEnum
+from app.db.models.enums import HostAvailabilityStatusEnum
+from .heartbeat_flush_job import flush_agent_heartbeats_job
 
 
-AGENT_TIMEOUT_SECONDS = 180
-
 def check_all_agent_availability_job(db_session_factory):
-    db: Session = db_session_factory()
     print("Running Agent Status Check Job...")
+    # Спершу дописуємо свіжі удари з пам'яті, інакше агент, що щойно надіслав дані,
+    # міг би бути позначений як 'down' за ще не оновленим last_metric_at
+    flush_agent_heartbeats_job(db_session_factory)
+    db: Session = db_session_factory()
     try:
-        agent_host_types = [HostTypeEnum.windows_agent, HostTypeEnum.ubuntu_agent]
-
-        monitored_up_agents = []
-        all_monitored_agents = crud.crud_host.get_hosts(db, is_monitored=True)
-        for host in all_monitored_agents:
-            if host.host_type in agent_host_types and \
-               host.availability_status == HostAvailabilityStatusEnum.up:
-                monitored_up_agents.append(host)
-
-        for host in monitored_up_agents:
-            if host.last_metric_at:
-                if datetime.now(timezone.utc) - host.last_metric_at > timedelta(seconds=AGENT_TIMEOUT_SECONDS):
-                    print(f"Agent {host.name} timed out. Setting status to 'down'.")
-                    crud.crud_host.update_host_availability(db, host_id=host.id, status=HostAvailabilityStatusEnum.down)
+        # Уся перевірка - один UPDATE ... RETURNING на боці БД замість циклу по хостах
+        changed = crud.crud_host.mark_stale_agents(db, default_timeout_seconds=settings.AGENT_TIMEOUT_SECONDS)
+        for host_id, name, status in changed:
+            if status == HostAvailabilityStatusEnum.down:
+                print(f"Agent {name} timed out. Setting status to 'down'.")
             else:
-                print(f"Agent {host.name} has status 'up' but no last_metric_at. Setting to 'unknown'.")
-                crud.crud_host.update_host_availability(db, host_id=host.id, status=HostAvailabilityStatusEnum.unknown)
-
+                print(f"Agent {name} has status 'up' but no last_metric_at. Setting to 'unknown'.")
     except Exception as e:
         print(f"Error in Agent Status Check Job: {e}")
     finally:
         db.close()
-    print("Agent Status Check Job finished.")
\ No newline at end of file
+    print("Agent Status Check Job finished.")
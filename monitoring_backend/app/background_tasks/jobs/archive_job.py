@@ -0,0 +1,21 @@
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.services import archive_service
+
+
+def archive_metric_days_job(db_session_factory):
+    if not archive_service.is_archive_enabled():
+        print(f"Metric Archive Job: pyarrow is not installed (requirements-archive.txt), archive to {settings.METRIC_ARCHIVE_DIR} is disabled.")
+        return
+    db: Session = db_session_factory()
+    print("Running Metric Archive Job...")
+    try:
+        report = archive_service.archive_closed_days(db)
+        if report.files_written:
+            print(f"Metric Archive Job: {report.rows_archived} rows archived into {len(report.files_written)} files")
+            print(f"Archive files: {', '.join(report.files_written)}")
+    except Exception as e:
+        print(f"Error in Metric Archive Job: {e}")
+    finally:
+        db.close()
+    print("Metric Archive Job finished.")
@@ -0,0 +1,23 @@
+from sqlalchemy.orm import Session
+from app.services import compression_service
+
+
+def compress_cold_metrics_job(db_session_factory):
+    db: Session = db_session_factory()
+    print("Running Metric Compression Job...")
+    try:
+        report = compression_service.compress_cold_partitions(db)
+        if report.partitions_compressed:
+            ratio = report.raw_bytes / report.chunk_bytes if report.chunk_bytes else 0
+            print(
+                f"Metric Compression Job: {len(report.partitions_compressed)} partitions, "
+                f"{report.samples_packed} samples packed into {report.chunks_written} chunks, "
+                f"{report.raw_bytes / (1024 * 1024):.1f} MB -> {report.chunk_bytes / (1024 * 1024):.1f} MB "
+                f"(x{ratio:.1f})"
+            )
+            print(f"Compressed partitions: {', '.join(report.partitions_compressed)}")
+    except Exception as e:
+        print(f"Error in Metric Compression Job: {e}")
+    finally:
+        db.close()
+    print("Metric Compression Job finished.")
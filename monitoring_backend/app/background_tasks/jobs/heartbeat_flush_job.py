@@ -0,0 +1,18 @@
+from sqlalchemy.orm import Session
+from app.db import crud
+from app.cache.heartbeat_tracker import heartbeat_tracker
+
+
+def flush_agent_heartbeats_job(db_session_factory):
+    """Скидає накопичені в пам'яті удари агентів у hosts.last_metric_at одним пакетним UPDATE."""
+    heartbeats = heartbeat_tracker.take_pending()
+    if not heartbeats:
+        return
+    db: Session = db_session_factory()
+    try:
+        crud.crud_host.apply_host_heartbeats(db, heartbeats)
+    except Exception as e:
+        heartbeat_tracker.restore_pending(heartbeats)
+        print(f"Error in Agent Heartbeat Flush Job ({len(heartbeats)} hosts): {e}")
+    finally:
+        db.close()
@@ -0,0 +1,21 @@
+from sqlalchemy.orm import Session
+from app.services import partition_service
+
+
+def maintain_metric_partitions_job(db_session_factory):
+    db: Session = db_session_factory()
+    print("Running Metric Partition Maintenance Job...")
+    try:
+        if not partition_service.is_partitioning_supported(db):
+            print("Metric Partition Maintenance Job: database does not support partitioning, skipped.")
+            return
+
+        created = partition_service.ensure_future_partitions(db)
+        if created:
+            print(f"Created metric_data partitions: {', '.join(created)}")
+        # Застарілі партиції видаляє job очищення (retention_job) згідно з політиками зберігання
+    except Exception as e:
+        print(f"Error in Metric Partition Maintenance Job: {e}")
+    finally:
+        db.close()
+    print("Metric Partition Maintenance Job finished.")
@@ -0,0 +1,21 @@
+from sqlalchemy.orm import Session
+from app.services import retention_service
+
+
+def purge_expired_metrics_job(db_session_factory):
+    db: Session = db_session_factory()
+    print("Running Metric Retention Purge Job...")
+    try:
+        report = retention_service.purge_expired_metrics(db)
+        print(
+            f"Metric Retention Purge Job: {report.rows_deleted} rows deleted, "
+            f"{len(report.partitions_dropped)} partitions dropped, "
+            f"{report.bytes_reclaimed / (1024 * 1024):.1f} MB reclaimed"
+        )
+        if report.partitions_dropped:
+            print(f"Dropped partitions: {', '.join(report.partitions_dropped)}")
+    except Exception as e:
+        print(f"Error in Metric Retention Purge Job: {e}")
+    finally:
+        db.close()
+    print("Metric Retention Purge Job finished.")
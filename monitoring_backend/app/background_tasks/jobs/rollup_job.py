@@ -0,0 +1,16 @@
+from sqlalchemy.orm import Session
+from app.services import rollup_service
+
+
+def aggregate_metric_rollups_job(db_session_factory):
+    db: Session = db_session_factory()
+    print("Running Metric Rollup Job...")
+    try:
+        written = rollup_service.run_rollups(db)
+        for resolution_seconds, count in written.items():
+            print(f"Metric Rollup Job: {count} buckets written for {resolution_seconds}s resolution")
+    except Exception as e:
+        print(f"Error in Metric Rollup Job: {e}")
+    finally:
+        db.close()
+    print("Metric Rollup Job finished.")
@@ -1,76 +1,116 @@
 # app/background_tasks/jobs/snmp_poller_job.py
 import asyncio
-from sqlalchemy.orm import Session
-from app.db import crud
-from app.services import snmp_service  # snmp_service.poll_snmp_host є async
-from app.db.models.enums import HostTypeEnum, HostAvailabilityStatusEnum
-from app.db.models.host import Host
-
-
-# poll_single_host_async_modified вже є async def, це добре.
-# Прибираємо параметр snmp_engine_instance, якщо snmp_service.poll_snmp_host
-# сам керує своїм SnmpEngine (створює та закриває).
-async def poll_single_host_async_wrapper(db: Session, host: Host):
-    print(f"Polling SNMP host: {host.name} ({host.ip_address})")
-    try:
-        await snmp_service.poll_snmp_host(db, host=host)
-    except Exception as e:
-        print(f"Error polling SNMP host {host.name}: {e}")
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.cache.snmp_target_cache import snmp_target_cache
+from app.core.config import settings
+from app.db import crud_async
+from app.db.models.enums import HostAvailabilityStatusEnum
+from app.services import snmp_service, snmp_schedule
+from app.services.snmp_service import SnmpPollResult, SnmpTarget
+
+# Хости, опитування яких ще триває (з попереднього тіку)
+_in_flight: Set[uuid.UUID] = set()
+_poll_semaphore: Optional[asyncio.Semaphore] = None
+
+_schedule = snmp_schedule.PollSchedule()
+
+
+def _get_poll_semaphore() -> asyncio.Semaphore:
+    # Один семафор на всі запуски job-а, щоб ліміт діяв і при їх перекритті
+    global _poll_semaphore
+    if _poll_semaphore is None:
+        _poll_semaphore = asyncio.Semaphore(max(settings.SNMP_POLL_CONCURRENCY, 1))
+    return _poll_semaphore
+
+
+async def _load_targets(db_session_factory, shard: Optional[Tuple[int, int]] = None) -> List[SnmpTarget]:
+    async with db_session_factory() as db:
+        hosts = await crud_async.crud_host.get_pollable_snmp_hosts(db)
+    if shard:
+        # Шардування за host id між процесами-опитувачами (див. snmp_worker_pool)
+        shard_index, shard_count = shard
+        hosts = [host for host in hosts if host.id.int % shard_count == shard_index]
+    return [SnmpTarget.from_host(host) for host in hosts]
+
+
+async def _get_targets(db_session_factory, shard: Optional[Tuple[int, int]] = None) -> List[SnmpTarget]:
+    """Список хостів кешується в snmp_target_cache, щоб не читати БД на кожному тіку."""
+    targets = snmp_target_cache.get()
+    if targets is None:
+        targets = await _load_targets(db_session_factory, shard)
+        snmp_target_cache.set(targets)
+        host_ids = {t.host_id for t in targets}
+        _schedule.forget_missing(host_ids)
+        snmp_service.forget_missing_hosts(host_ids)
+    return targets
+
+
+async def _write_results(db_session_factory, results: List[SnmpPollResult]) -> int:
+    async with db_session_factory() as db:
+        return await snmp_service.write_snmp_poll_results_async(db, results)
+
+
+async def _poll_with_deadline(target: SnmpTarget, definitions: List[Dict[str, Any]]) -> SnmpPollResult:
+    async with _get_poll_semaphore():
         try:
-            db.rollback()
-            crud.crud_host.update_host_availability(db, host_id=host.id, status=HostAvailabilityStatusEnum.down)
-            db.commit()
-        except Exception as e_crud:
-            print(f"Error updating host availability for {host.name} after SNMP error: {e_crud}")
-            db.rollback()
+            return await asyncio.wait_for(
+                snmp_service.collect_snmp_metrics(target, definitions),
+                timeout=settings.SNMP_HOST_DEADLINE_SECONDS
+            )
+        except asyncio.TimeoutError:
+            print(f"SNMP host {target.name} exceeded the {settings.SNMP_HOST_DEADLINE_SECONDS}s poll deadline")
+            return SnmpPollResult(target.host_id, "deadline_exceeded",
+                                  availability=HostAvailabilityStatusEnum.down, message="Poll deadline exceeded")
+        except Exception as e:
+            print(f"Error polling SNMP host {target.name}: {e}")
+            return SnmpPollResult(target.host_id, "critical_general_error",
+                                  availability=HostAvailabilityStatusEnum.down, message=str(e))
+
 
+def _due_polls(targets: List[SnmpTarget], now_ts: float) -> List[Tuple[SnmpTarget, List[Dict[str, Any]]]]:
+    """Хости, у яких на цьому тіку настав слот хоча б однієї групи метрик, разом з OID-ами цих груп."""
+    due = []
+    for target in targets:
+        if target.host_id in _in_flight:
+            continue
+        definitions = []
+        for interval, group in snmp_schedule.metric_groups(target.host_type, target.poll_interval_seconds).items():
+            if _schedule.is_due(target.host_id, interval, now_ts):
+                definitions.extend(group)
+        if definitions:
+            due.append((target, definitions))
+    return due
 
-# Робимо головну функцію завдання асинхронною
-async def poll_all_snmp_hosts_job(db_session_factory):
-    db_for_host_list: Session = db_session_factory()
-    print("Running SNMP Polling Job (async)...")
 
-    active_snmp_hosts_to_poll = []
+async def poll_all_snmp_hosts_job(db_session_factory, shard: Optional[Tuple[int, int]] = None):
+    """
+    Тік планувальника SNMP (кожні SNMP_SCHEDULER_TICK_SECONDS). Кожен хост має власний інтервал
+    (Host.snmp_poll_interval_seconds, повільні OID-и - "poll_interval_seconds" у визначенні метрики)
+    і стабільний зсув у межах інтервалу, тож опитування рівномірно розподілені в часі.
+    Опитування йдуть з обмеженням паралельності і дедлайном на хост, результати тіку пишуться одним пакетом.
+    shard=(index, count) - опитувати лише свою частку хостів (режим окремих процесів).
+    db_session_factory - асинхронна фабрика (AsyncSessionLocal): читання хостів і запис ідуть на event loop-і.
+    """
     try:
-        snmp_hosts = crud.crud_host.get_hosts(
-            db_for_host_list,
-            host_type=HostTypeEnum.mikrotik_snmp,
-            is_monitored=True
-        )
-        # Зберігаємо тільки ID хостів, щоб уникнути проблем з об'єктами між сесіями
-        active_snmp_host_ids = [
-            host.id for host in snmp_hosts
-            if host.availability_status != HostAvailabilityStatusEnum.pending_approval
-        ]
+        targets = await _get_targets(db_session_factory, shard)
     except Exception as e:
-        print(f"Error fetching SNMP host IDs: {e}")
-        active_snmp_host_ids = []  # Порожній список, якщо не вдалося отримати
-    finally:
-        db_for_host_list.close()
+        print(f"Error fetching SNMP hosts: {e}")
+        return
 
-    if not active_snmp_host_ids:
-        print("SNMP Polling Job: No active SNMP hosts to poll.")
-        print("SNMP Polling Job finished.")
+    due = _due_polls(targets, time.time())
+    if not due:
         return
 
-    # Створюємо ОДНУ сесію для всіх асинхронних операцій в цьому запуску завдання
-    db_for_async_ops: Session = db_session_factory()
+    host_ids = {target.host_id for target, _ in due}
+    _in_flight.update(host_ids)
     try:
-        tasks = []
-        for host_id in active_snmp_host_ids:
-            host_obj = crud.crud_host.get_host(db_for_async_ops, host_id=host_id)  # Перезавантажуємо хост з новою сесією
-            if host_obj:
-                tasks.append(poll_single_host_async_wrapper(db_for_async_ops, host_obj))
-            else:
-                print(f"SNMP Polling Job: Host with ID {host_id} not found in current session.")
-
-        if tasks:
-            await asyncio.gather(*tasks)  # Виконуємо всі завдання паралельно
-
+        results = await asyncio.gather(*[_poll_with_deadline(t, defs) for t, defs in due])
+        written = await _write_results(db_session_factory, list(results))
+        print(f"SNMP Polling Job: {len(results)} hosts polled, {written} metrics written.")
     except Exception as e:
-        print(f"Error during main SNMP polling logic: {e}")
-        db_for_async_ops.rollback()
+        print(f"Error writing SNMP poll results: {e}")
     finally:
-        db_for_async_ops.close()
-
-    print("SNMP Polling Job finished.")
\ No newline at end of file
+        _in_flight.difference_update(host_ids)
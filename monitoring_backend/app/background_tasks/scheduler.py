@@ -1,11 +1,19 @@
 # app/background_tasks/scheduler.py
 from apscheduler.schedulers.asyncio import AsyncIOScheduler  # <--- ЗМІНА ТУТ
 from apscheduler.triggers.interval import IntervalTrigger
-from app.db.database import SessionLocal
+from datetime import datetime, timezone
+from app.core.config import settings
+from app.db.database import SessionLocal, AsyncSessionLocal
 # ... (інші імпорти залишаються)
 from .jobs.snmp_poller_job import poll_all_snmp_hosts_job  # Ця функція стане async
 from .jobs.trigger_evaluator_job import evaluate_all_triggers_job
 from .jobs.agent_status_job import check_all_agent_availability_job
+from .jobs.heartbeat_flush_job import flush_agent_heartbeats_job
+from .jobs.partition_maintenance_job import maintain_metric_partitions_job
+from .jobs.rollup_job import aggregate_metric_rollups_job
+from .jobs.retention_job import purge_expired_metrics_job
+from .jobs.compression_job import compress_cold_metrics_job
+from .jobs.archive_job import archive_metric_days_job
 
 scheduler = AsyncIOScheduler(timezone="UTC")  # <--- ЗМІНА ТУТ
 
@@ -15,21 +23,28 @@ def start_scheduler():
     Додає завдання до планувальника та запускає його.
     AsyncIOScheduler запускається в існуючому asyncio event loop.
     """
-    # Завдання для SNMP опитування - poll_all_snmp_hosts_job тепер буде async
-    scheduler.add_job(
-        poll_all_snmp_hosts_job,  # Ця функція тепер має бути async def
-        trigger=IntervalTrigger(seconds=5),
-        id="snmp_poll_job",
-        name="SNMP Polling Job",
-        replace_existing=True,
-        kwargs={"db_session_factory": SessionLocal}
-    )
+    # Тік SNMP-планувальника: кожен хост опитується за власним інтервалом і зсувом,
+    # тож за один тік опитується лише невелика частина хостів.
+    # В режимі "process" опитування веде snmp_worker_pool (запускається з lifespan)
+    if settings.SNMP_POLLER_MODE != "process":
+        scheduler.add_job(
+            poll_all_snmp_hosts_job,
+            trigger=IntervalTrigger(seconds=settings.SNMP_SCHEDULER_TICK_SECONDS),
+            id="snmp_poll_job",
+            name="SNMP Polling Job",
+            replace_existing=True,
+            # Повільний запуск не блокує наступний: хости, що ще опитуються, job пропускає сам
+            max_instances=3,
+            kwargs={"db_session_factory": AsyncSessionLocal}
+        )
 
     # Завдання для оцінки тригерів - може залишатися синхронним,
-    # AsyncIOScheduler запустить його в thread pool executor
+    # AsyncIOScheduler запустить його в thread pool executor.
+    # В подієвому режимі тригери оцінюються при записі метрик, тож тут лише страхувальний прохід
+    trigger_eval_interval = settings.TRIGGER_SWEEP_INTERVAL_SECONDS if settings.TRIGGER_EVALUATION_MODE == "event" else 5
     scheduler.add_job(
         evaluate_all_triggers_job,
-        trigger=IntervalTrigger(seconds=5),
+        trigger=IntervalTrigger(seconds=trigger_eval_interval),
         id="trigger_eval_job",
         name="Trigger Evaluation Job",
         replace_existing=True,
@@ -46,6 +61,70 @@ def start_scheduler():
         kwargs={"db_session_factory": SessionLocal}
     )
 
+    # Запис ударів агентів (last_metric_at / статус 'up') пакетом замість UPDATE hosts у кожному запиті
+    scheduler.add_job(
+        flush_agent_heartbeats_job,
+        trigger=IntervalTrigger(seconds=settings.AGENT_HEARTBEAT_FLUSH_SECONDS),
+        id="agent_heartbeat_flush_job",
+        name="Agent Heartbeat Flush Job",
+        replace_existing=True,
+        kwargs={"db_session_factory": SessionLocal}
+    )
+
+    # Обслуговування партицій metric_data: створення майбутніх (застарілі видаляє retention job).
+    # Перший запуск одразу при старті, щоб партиція на поточну добу існувала до першого запису
+    scheduler.add_job(
+        maintain_metric_partitions_job,
+        trigger=IntervalTrigger(minutes=settings.METRIC_PARTITION_MAINTENANCE_MINUTES),
+        id="metric_partition_job",
+        name="Metric Partition Maintenance Job",
+        replace_existing=True,
+        next_run_time=datetime.now(timezone.utc),
+        kwargs={"db_session_factory": SessionLocal}
+    )
+
+    # Інкрементальна агрегація сирих метрик у rollups 1m / 5m / 1h
+    scheduler.add_job(
+        aggregate_metric_rollups_job,
+        trigger=IntervalTrigger(seconds=settings.ROLLUP_JOB_INTERVAL_SECONDS),
+        id="metric_rollup_job",
+        name="Metric Rollup Job",
+        replace_existing=True,
+        kwargs={"db_session_factory": SessionLocal}
+    )
+
+    # Очищення застарілих сирих метрик згідно з політиками зберігання
+    scheduler.add_job(
+        purge_expired_metrics_job,
+        trigger=IntervalTrigger(minutes=settings.METRIC_PURGE_INTERVAL_MINUTES),
+        id="metric_retention_job",
+        name="Metric Retention Purge Job",
+        replace_existing=True,
+        kwargs={"db_session_factory": SessionLocal}
+    )
+
+    # Пакування старих партицій metric_data у стиснені чанки (холодне зберігання)
+    if settings.METRIC_COMPRESS_AFTER_DAYS > 0:
+        scheduler.add_job(
+            compress_cold_metrics_job,
+            trigger=IntervalTrigger(minutes=settings.METRIC_COMPRESS_INTERVAL_MINUTES),
+            id="metric_compression_job",
+            name="Metric Compression Job",
+            replace_existing=True,
+            kwargs={"db_session_factory": SessionLocal}
+        )
+
+    # Вивантаження закритих діб у Parquet-архів довгої історії
+    if settings.METRIC_ARCHIVE_DIR:
+        scheduler.add_job(
+            archive_metric_days_job,
+            trigger=IntervalTrigger(minutes=settings.METRIC_ARCHIVE_INTERVAL_MINUTES),
+            id="metric_archive_job",
+            name="Metric Archive Job",
+            replace_existing=True,
+            kwargs={"db_session_factory": SessionLocal}
+        )
+
     try:
         if not scheduler.running:  # Перевіряємо, чи планувальник ще не запущений
             scheduler.start()
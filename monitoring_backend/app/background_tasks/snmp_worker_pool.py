@@ -0,0 +1,109 @@
+# app/background_tasks/snmp_worker_pool.py
+import asyncio
+import multiprocessing
+import os
+import time
+from typing import List, Optional, Set
+
+from app.cache.snmp_session_cache import snmp_session_cache
+from app.cache.trigger_index import trigger_index
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal, init_async_engine, dispose_async_engine
+from .jobs.snmp_poller_job import poll_all_snmp_hosts_job
+
+# Скільки тіків одного процесу можуть виконуватись одночасно (як max_instances у scheduler)
+MAX_CONCURRENT_TICKS = 3
+SUPERVISE_INTERVAL_SECONDS = 5
+
+
+async def _worker_loop(shard_index: int, shard_count: int, stop_event) -> None:
+    print(f"SNMP poller worker {shard_index + 1}/{shard_count} started (pid {os.getpid()}).")
+    ticks: Set[asyncio.Task] = set()
+    index_reset_at = time.monotonic()
+    init_async_engine()  # власний пул asyncpg-підключень у кожному процесі
+    try:
+        while not stop_event.is_set():
+            started = time.monotonic()
+            # Зміни тригерів робляться в головному процесі, тому індекс тут просто періодично перебудовується
+            if started - index_reset_at >= settings.SNMP_HOST_REFRESH_SECONDS:
+                trigger_index.invalidate()
+                index_reset_at = started
+            if len(ticks) < MAX_CONCURRENT_TICKS:
+                tick = asyncio.create_task(poll_all_snmp_hosts_job(AsyncSessionLocal, shard=(shard_index, shard_count)))
+                ticks.add(tick)
+                tick.add_done_callback(ticks.discard)
+            await asyncio.sleep(max(settings.SNMP_SCHEDULER_TICK_SECONDS - (time.monotonic() - started), 0))
+        if ticks:
+            await asyncio.wait(ticks, timeout=settings.SNMP_HOST_DEADLINE_SECONDS + 5)
+    finally:
+        snmp_session_cache.close()
+        await dispose_async_engine()
+        print(f"SNMP poller worker {shard_index + 1}/{shard_count} stopped.")
+
+
+def _worker_main(shard_index: int, shard_count: int, stop_event) -> None:
+    try:
+        asyncio.run(_worker_loop(shard_index, shard_count, stop_event))
+    except KeyboardInterrupt:
+        pass
+
+
+class SnmpWorkerPool:
+    """
+    Пул процесів-опитувачів SNMP (SNMP_POLLER_MODE="process"). Кожен процес має власний event loop,
+    SnmpEngine і підключення до БД, опитує свою частку хостів (host_id % SNMP_POLLER_PROCESSES)
+    і сам пише результати пакетним writer-ом, тож кодування/декодування pysnmp не конкурує з API.
+    Процеси, що впали, перезапускаються.
+    """
+
+    def __init__(self, processes: int):
+        self.processes = max(processes, 1)
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = None
+        self._workers: List[Optional[multiprocessing.Process]] = []
+        self._supervisor: Optional[asyncio.Task] = None
+
+    def _spawn(self, shard_index: int) -> multiprocessing.Process:
+        process = self._context.Process(
+            target=_worker_main,
+            args=(shard_index, self.processes, self._stop_event),
+            name=f"snmp-poller-{shard_index}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    async def _supervise(self) -> None:
+        while not self._stop_event.is_set():
+            await asyncio.sleep(SUPERVISE_INTERVAL_SECONDS)
+            for shard_index, process in enumerate(self._workers):
+                if not self._stop_event.is_set() and (process is None or not process.is_alive()):
+                    print(f"SNMP poller worker {shard_index + 1} is not running, restarting.")
+                    self._workers[shard_index] = self._spawn(shard_index)
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        self._stop_event = self._context.Event()
+        self._workers = [self._spawn(shard_index) for shard_index in range(self.processes)]
+        self._supervisor = asyncio.get_running_loop().create_task(self._supervise())
+        print(f"SNMP poller worker pool started ({self.processes} processes).")
+
+    async def stop(self) -> None:
+        if not self._workers:
+            return
+        self._stop_event.set()
+        if self._supervisor:
+            self._supervisor.cancel()
+            self._supervisor = None
+        timeout = settings.SNMP_HOST_DEADLINE_SECONDS + 10
+        for process in self._workers:
+            await asyncio.to_thread(process.join, timeout)
+            if process.is_alive():
+                print(f"SNMP poller worker {process.name} did not stop in time, terminating.")
+                process.terminate()
+        self._workers = []
+        print("SNMP poller worker pool stopped.")
+
+
+snmp_worker_pool = SnmpWorkerPool(settings.SNMP_POLLER_PROCESSES)
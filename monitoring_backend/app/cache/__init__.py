@@ -0,0 +1,6 @@
+from .trigger_index import trigger_index, TriggerIndex
+from .snmp_session_cache import snmp_session_cache, SnmpSessionCache
+from .host_ip_cache import host_ip_cache, HostIpCache
+from .heartbeat_tracker import heartbeat_tracker, HeartbeatTracker
+from .agent_identity_cache import agent_identity_cache, AgentIdentityCache, AgentIdentity
+from .metric_key_cache import metric_key_cache, MetricKeyCache
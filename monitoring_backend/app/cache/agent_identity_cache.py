@@ -0,0 +1,61 @@
+# app/cache/agent_identity_cache.py
+import threading
+import time
+import uuid
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.db.models.enums import HostAvailabilityStatusEnum
+
+
+class AgentIdentity(NamedTuple):
+    host_id: uuid.UUID
+    availability_status: HostAvailabilityStatusEnum
+    is_monitored: bool
+
+
+class AgentIdentityCache:
+    """
+    Кеш unique_agent_id -> (host_id, статус, is_monitored) для прийому метрик від агентів,
+    щоб прийнята пачка не читала hosts. Запис живе ttl_seconds (межа розсинхрону між репліками),
+    у цьому процесі скидається з crud при зміні, схваленні та видаленні хоста.
+    Невідомі агенти не кешуються - вони реєструються першим же запитом.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[AgentIdentity, float]] = {}
+
+    def get(self, unique_agent_id: str, loader: Callable[[], Optional[AgentIdentity]]) -> Optional[AgentIdentity]:
+        identity = self.get_cached(unique_agent_id)
+        if identity is None:
+            identity = loader()
+            self.put(unique_agent_id, identity)
+        return identity
+
+    def get_cached(self, unique_agent_id: str) -> Optional[AgentIdentity]:
+        """Запис без звернення до БД (None - немає або застарів); для асинхронного шляху з власним читанням."""
+        with self._lock:
+            cached = self._entries.get(unique_agent_id)
+        if cached and time.monotonic() - cached[1] < self.ttl_seconds:
+            return cached[0]
+        return None
+
+    def put(self, unique_agent_id: str, identity: Optional[AgentIdentity]) -> None:
+        with self._lock:
+            if identity is None:
+                self._entries.pop(unique_agent_id, None)
+            else:
+                self._entries[unique_agent_id] = (identity, time.monotonic())
+
+    def invalidate(self, unique_agent_id: Optional[str] = None) -> None:
+        """Скидає запис агента, а без аргументу - увесь кеш."""
+        with self._lock:
+            if unique_agent_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(unique_agent_id, None)
+
+
+agent_identity_cache = AgentIdentityCache(ttl_seconds=settings.AGENT_IDENTITY_CACHE_TTL_SECONDS)
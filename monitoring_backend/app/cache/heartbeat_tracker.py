@@ -0,0 +1,45 @@
+# app/cache/heartbeat_tracker.py
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+
+class HeartbeatTracker:
+    """
+    Пам'ять про останній контакт агентів. Прийом метрик лише оновлює мапу host_id -> час (beat),
+    а в hosts.last_metric_at (і статус 'up') її скидає flush-job одним пакетним UPDATE раз на кілька секунд.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[uuid.UUID, datetime] = {}
+
+    def beat(self, host_ids: Iterable[uuid.UUID], seen_at: Optional[datetime] = None) -> None:
+        seen_at = seen_at or datetime.now(timezone.utc)
+        with self._lock:
+            for host_id in host_ids:
+                current = self._pending.get(host_id)
+                if current is None or seen_at > current:
+                    self._pending[host_id] = seen_at
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def take_pending(self) -> Dict[uuid.UUID, datetime]:
+        """Забирає накопичені удари для запису в БД."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def restore_pending(self, pending: Dict[uuid.UUID, datetime]) -> None:
+        """Повертає удари назад, якщо запис у БД не вдався (новіші удари не перетираються)."""
+        with self._lock:
+            for host_id, seen_at in pending.items():
+                current = self._pending.get(host_id)
+                if current is None or seen_at > current:
+                    self._pending[host_id] = seen_at
+
+
+heartbeat_tracker = HeartbeatTracker()
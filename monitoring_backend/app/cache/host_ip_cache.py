@@ -0,0 +1,36 @@
+# app/cache/host_ip_cache.py
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class HostIpCache:
+    """
+    Кеш IP -> хост для вхідних SNMP trap-ів. Мапа завантажується цілком через loader і живе ttl_seconds;
+    невідомий IP не викликає перезавантаження (інакше підроблені джерела змушували б читати БД на кожен trap).
+    Скидається з crud при створенні, зміні, схваленні та видаленні хостів.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._hosts: Optional[Dict[str, Any]] = None
+        self._loaded_at = 0.0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._hosts = None
+
+    def lookup(self, ip_address: str, loader: Callable[[], Dict[str, Any]]) -> Optional[Any]:
+        with self._lock:
+            hosts = self._hosts
+            fresh = hosts is not None and time.monotonic() - self._loaded_at < self.ttl_seconds
+        if not fresh:
+            hosts = loader()
+            with self._lock:
+                self._hosts = hosts
+                self._loaded_at = time.monotonic()
+        return hosts.get(ip_address)
+
+
+host_ip_cache = HostIpCache(ttl_seconds=60)
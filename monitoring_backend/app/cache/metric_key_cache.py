@@ -0,0 +1,41 @@
+# app/cache/metric_key_cache.py
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+
+class MetricKeyCache:
+    """
+    Кеш ключ метрики -> id у словнику metric_keys. id призначає БД і ключі ніколи не видаляються,
+    тож запис не застаріває і інвалідація не потрібна; прийом метрик ходить у metric_keys лише для нових ключів.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._ids)
+
+    def get_many(self, keys: Iterable[str]) -> Tuple[Dict[str, int], List[str]]:
+        """(знайдені key -> id, ключі, яких у кеші немає)."""
+        found: Dict[str, int] = {}
+        missing: List[str] = []
+        with self._lock:
+            for key in set(keys):
+                key_id = self._ids.get(key)
+                if key_id is None:
+                    missing.append(key)
+                else:
+                    found[key] = key_id
+        return found, missing
+
+    def update(self, ids: Dict[str, int]) -> None:
+        """Додає ключі (викликається лише після commit-у транзакції, в якій їх зареєстровано)."""
+        if not ids:
+            return
+        with self._lock:
+            self._ids.update(ids)
+
+
+metric_key_cache = MetricKeyCache()
@@ -0,0 +1,70 @@
+# app/cache/snmp_session_cache.py
+import threading
+import uuid
+from typing import Dict, Optional, Tuple
+
+from pysnmp.hlapi.v3arch.asyncio import SnmpEngine, UdpTransportTarget
+
+TransportKey = Tuple[str, int, float]
+
+
+class SnmpSessionCache:
+    """
+    Один SnmpEngine на весь час життя процесу та кеш UdpTransportTarget за ключем (ip, port, timeout).
+    Створення engine і транспорту (з резолвом адреси) на кожен хост щоциклу займало більшість CPU опитувача.
+    Записи хоста видаляються через evict_host() при зміні його SNMP-налаштувань або видаленні (з crud).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()  # evict_host() викликається з thread pool-у FastAPI
+        self._engine: Optional[SnmpEngine] = None
+        self._transports: Dict[TransportKey, UdpTransportTarget] = {}
+        self._host_keys: Dict[uuid.UUID, TransportKey] = {}
+
+    def get_engine(self) -> SnmpEngine:
+        if self._engine is None:
+            self._engine = SnmpEngine()
+        return self._engine
+
+    async def get_transport(
+        self, host_id: uuid.UUID, ip_address: str, port: int, timeout: float, retries: int
+    ) -> UdpTransportTarget:
+        key = (ip_address, port, timeout)
+        with self._lock:
+            transport_target = self._transports.get(key)
+        if transport_target is None:
+            transport_target = await UdpTransportTarget.create((ip_address, port), timeout=timeout, retries=retries)
+        with self._lock:
+            old_key = self._host_keys.get(host_id)
+            self._transports[key] = transport_target
+            self._host_keys[host_id] = key
+            if old_key and old_key != key:
+                self._drop_unused(old_key)
+        return transport_target
+
+    def _drop_unused(self, key: TransportKey) -> None:
+        # Кілька хостів можуть ділити одну адресу - транспорт видаляється, лише коли він нікому не потрібен
+        if key not in self._host_keys.values():
+            self._transports.pop(key, None)
+
+    def evict_host(self, host_id: uuid.UUID) -> None:
+        with self._lock:
+            key = self._host_keys.pop(host_id, None)
+            if key:
+                self._drop_unused(key)
+
+    def close(self) -> None:
+        """Закриває dispatcher спільного engine (при зупинці застосунку)."""
+        with self._lock:
+            engine = self._engine
+            self._engine = None
+            self._transports.clear()
+            self._host_keys.clear()
+        if engine is not None and getattr(engine, "transportDispatcher", None):
+            try:
+                engine.transportDispatcher.closeDispatcher()
+            except Exception as e:
+                print(f"Error closing shared SNMP transport dispatcher: {e}")
+
+
+snmp_session_cache = SnmpSessionCache()
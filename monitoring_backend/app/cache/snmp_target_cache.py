@@ -0,0 +1,40 @@
+# app/cache/snmp_target_cache.py
+import threading
+import time
+from typing import Any, List, Optional
+
+from app.core.config import settings
+
+
+class SnmpTargetCache:
+    """
+    Список хостів SNMP-опитувача (SnmpTarget), щоб не читати БД на кожному тіку планувальника.
+    Живе ttl_seconds і скидається з crud при створенні, зміні, схваленні та видаленні хостів -
+    в режимі inline опитувач одразу перестає писати метрики видаленого хоста. Процеси-воркери
+    (SNMP_POLLER_MODE=process) мають власну копію і оновлюють її лише за TTL.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._targets: Optional[List[Any]] = None
+        self._loaded_at = 0.0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._targets = None
+
+    def get(self) -> Optional[List[Any]]:
+        """Закешований список або None, якщо його треба перечитати."""
+        with self._lock:
+            if self._targets is None or time.monotonic() - self._loaded_at >= self.ttl_seconds:
+                return None
+            return self._targets
+
+    def set(self, targets: List[Any]) -> None:
+        with self._lock:
+            self._targets = targets
+            self._loaded_at = time.monotonic()
+
+
+snmp_target_cache = SnmpTargetCache(ttl_seconds=settings.SNMP_HOST_REFRESH_SECONDS)
@@ -0,0 +1,48 @@
+# app/cache/trigger_index.py
+import threading
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from app.predefined_data import TRIGGER_TEMPLATES_BY_KEY
+
+
+class TriggerIndex:
+    """
+    In-memory індекс (host_id, metric_key) -> id увімкнених тригерів, що перевіряють цю метрику.
+    Дозволяє при записі нових значень переоцінювати лише зачеплені тригери.
+    Індекс перебудовується ліниво після invalidate() (зміни тригерів або хостів у crud).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[Tuple[uuid.UUID, str], Set[uuid.UUID]]] = None
+
+    @property
+    def is_stale(self) -> bool:
+        return self._index is None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._index = None
+
+    def rebuild(self, trigger_rows: Iterable[Tuple[uuid.UUID, uuid.UUID, str]]) -> None:
+        """trigger_rows - пари (trigger_id, host_id, internal_trigger_key) увімкнених тригерів."""
+        index: Dict[Tuple[uuid.UUID, str], Set[uuid.UUID]] = defaultdict(set)
+        for trigger_id, host_id, internal_trigger_key in trigger_rows:
+            template = TRIGGER_TEMPLATES_BY_KEY.get(internal_trigger_key)
+            if template:
+                index[(host_id, template["metric_key_to_check"])].add(trigger_id)
+        with self._lock:
+            self._index = dict(index)
+
+    def lookup(self, keys: Iterable[Tuple[uuid.UUID, str]]) -> Set[uuid.UUID]:
+        with self._lock:
+            index = self._index or {}
+            trigger_ids: Set[uuid.UUID] = set()
+            for key in keys:
+                trigger_ids.update(index.get(key, ()))
+            return trigger_ids
+
+
+trigger_index = TriggerIndex()
@@ -2,5 +2,11 @@ from app.db.base_class import Base # Імпортуємо декларативн
 from app.db.models.enums import * # Імпортуємо всі enums (якщо вони в окремому файлі)
 from app.db.models.user import User
 from app.db.models.host import Host
+from app.db.models.metric_key import MetricKey
 from app.db.models.metric_data import MetricData
+from app.db.models.metric_text import MetricTextValue, MetricTextSample
+from app.db.models.metric_chunk import MetricChunk
+from app.db.models.metric_archive import MetricArchiveFile, MetricArchiveWatermark
+from app.db.models.metric_latest import MetricLatest
+from app.db.models.metric_rollup import MetricRollup, RollupWatermark
 from app.db.models.trigger_config import TriggerConfig
\ No newline at end of file
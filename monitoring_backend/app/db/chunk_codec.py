@@ -0,0 +1,189 @@
+# app/db/chunk_codec.py
+"""
+Кодек стиснених чанків числових вимірів однієї серії (host_id, metric_key) за схемою Gorilla
+(Pelkonen et al., "Gorilla: A Fast, Scalable, In-Memory Time Series Database", VLDB 2015):
+мітки часу - delta-of-delta зі змінною довжиною коду, значення - XOR з попереднім значенням.
+Мітки часу зберігаються в мікросекундах (точність timestamptz), тож декодування без втрат.
+
+Формат: заголовок (версія, кількість точок), перша мітка (64 біти), перше значення (64 біти),
+далі для кожної точки код delta-of-delta і код XOR значення.
+"""
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import List, Sequence, Tuple
+
+CHUNK_FORMAT_VERSION = 1
+_HEADER = struct.Struct(">BI")
+_DOUBLE = struct.Struct(">d")
+_UINT64 = struct.Struct(">Q")
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+# Коди delta-of-delta: (префікс, довжина префікса, ширина значення в бітах).
+# Ширини більші, ніж в оригіналі (7/9/12/32), бо мітки в мікросекундах: джитер агентів - тисячі мкс.
+# Нульова delta-of-delta (рівний крок) кодується одним бітом 0.
+_DOD_CODES = ((0b10, 2, 7), (0b110, 3, 14), (0b1110, 4, 20), (0b11110, 5, 32))
+_DOD_ESCAPE = (0b11111, 5, 64)
+
+
+class ChunkFormatError(ValueError):
+    pass
+
+
+def to_microseconds(ts: datetime) -> int:
+    return (ts - EPOCH) // MICROSECOND
+
+
+def from_microseconds(us: int) -> datetime:
+    return EPOCH + timedelta(microseconds=us)
+
+
+def _float_bits(value: float) -> int:
+    return _UINT64.unpack(_DOUBLE.pack(value))[0]
+
+
+def _bits_float(bits: int) -> float:
+    return _DOUBLE.unpack(_UINT64.pack(bits))[0]
+
+
+class _BitWriter:
+    def __init__(self):
+        self._buffer = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value: int, width: int) -> None:
+        self._acc = (self._acc << width) | (value & ((1 << width) - 1))
+        self._bits += width
+        while self._bits >= 8:
+            self._bits -= 8
+            self._buffer.append((self._acc >> self._bits) & 0xFF)
+        self._acc &= (1 << self._bits) - 1
+
+    def getvalue(self) -> bytes:
+        if self._bits:
+            return bytes(self._buffer) + bytes([(self._acc << (8 - self._bits)) & 0xFF])
+        return bytes(self._buffer)
+
+
+class _BitReader:
+    def __init__(self, data: bytes, offset: int):
+        self._data = data
+        self._pos = offset
+        self._acc = 0
+        self._bits = 0
+
+    def read(self, width: int) -> int:
+        while self._bits < width:
+            if self._pos >= len(self._data):
+                raise ChunkFormatError("Chunk is truncated")
+            self._acc = (self._acc << 8) | self._data[self._pos]
+            self._pos += 1
+            self._bits += 8
+        self._bits -= width
+        value = self._acc >> self._bits
+        self._acc &= (1 << self._bits) - 1
+        return value
+
+
+def _signed(value: int, width: int) -> int:
+    return value - (1 << width) if value >= 1 << (width - 1) else value
+
+
+def _write_dod(writer: _BitWriter, dod: int) -> None:
+    if dod == 0:
+        writer.write(0, 1)
+        return
+    for prefix, prefix_width, width in _DOD_CODES:
+        if -(1 << (width - 1)) <= dod < (1 << (width - 1)):
+            writer.write(prefix, prefix_width)
+            writer.write(dod, width)
+            return
+    prefix, prefix_width, width = _DOD_ESCAPE
+    writer.write(prefix, prefix_width)
+    writer.write(dod, width)
+
+
+def _read_dod(reader: _BitReader) -> int:
+    ones = 0
+    while ones < len(_DOD_CODES) + 1 and reader.read(1):
+        ones += 1
+    if ones == 0:
+        return 0
+    width = _DOD_CODES[ones - 1][2] if ones <= len(_DOD_CODES) else _DOD_ESCAPE[2]
+    return _signed(reader.read(width), width)
+
+
+def encode_chunk(timestamps_us: Sequence[int], values: Sequence[float]) -> bytes:
+    """Пакує серію (мітки в мікросекундах за зростанням, значення) у стиснений чанк."""
+    if len(timestamps_us) != len(values):
+        raise ValueError("timestamps and values must have the same length")
+    header = _HEADER.pack(CHUNK_FORMAT_VERSION, len(values))
+    if not values:
+        return header
+
+    writer = _BitWriter()
+    writer.write(timestamps_us[0], 64)
+    prev_bits = _float_bits(values[0])
+    writer.write(prev_bits, 64)
+
+    prev_ts, prev_delta = timestamps_us[0], 0
+    prev_leading, prev_trailing = -1, 0
+    for ts, value in zip(timestamps_us[1:], values[1:]):
+        delta = ts - prev_ts
+        _write_dod(writer, delta - prev_delta)
+        prev_ts, prev_delta = ts, delta
+
+        bits = _float_bits(value)
+        xor = bits ^ prev_bits
+        prev_bits = bits
+        if xor == 0:
+            writer.write(0, 1)
+            continue
+        leading = min(64 - xor.bit_length(), 31)
+        trailing = (xor & -xor).bit_length() - 1
+        if prev_leading >= 0 and leading >= prev_leading and trailing >= prev_trailing:
+            # Значущі біти вміщуються у вікно попереднього значення - вікно не передається
+            writer.write(0b10, 2)
+            writer.write(xor >> prev_trailing, 64 - prev_leading - prev_trailing)
+        else:
+            meaningful = 64 - leading - trailing
+            writer.write(0b11, 2)
+            writer.write(leading, 5)
+            writer.write(meaningful - 1, 6)
+            writer.write(xor >> trailing, meaningful)
+            prev_leading, prev_trailing = leading, trailing
+    return header + writer.getvalue()
+
+
+def decode_chunk(data: bytes) -> Tuple[List[int], List[float]]:
+    """(мітки часу в мікросекундах, значення) з чанка encode_chunk."""
+    if len(data) < _HEADER.size:
+        raise ChunkFormatError("Chunk header is truncated")
+    version, count = _HEADER.unpack_from(data)
+    if version != CHUNK_FORMAT_VERSION:
+        raise ChunkFormatError(f"Unsupported chunk format version {version}")
+    if count == 0:
+        return [], []
+
+    reader = _BitReader(data, _HEADER.size)
+    ts = _signed(reader.read(64), 64)
+    prev_bits = reader.read(64)
+    timestamps, values = [ts], [_bits_float(prev_bits)]
+
+    delta = 0
+    leading, trailing = 0, 0
+    for _ in range(count - 1):
+        delta += _read_dod(reader)
+        ts += delta
+        timestamps.append(ts)
+
+        if reader.read(1):
+            if reader.read(1):
+                leading = reader.read(5)
+                meaningful = reader.read(6) + 1
+                trailing = 64 - leading - meaningful
+            prev_bits ^= reader.read(64 - leading - trailing) << trailing
+        values.append(_bits_float(prev_bits))
+    return timestamps, values
@@ -1,27 +1,45 @@
 from .crud_user import get_user, get_user_by_username, get_users, create_user, update_user, delete_user
 from .crud_host import (
-    get_host, get_host_by_name, get_host_by_agent_id, get_hosts,
+    get_host, get_host_by_name, get_host_by_agent_id, get_hosts, get_pollable_snmp_hosts,
     create_host, update_host, delete_host,
     get_pending_approval_hosts, approve_host,
-    update_host_last_metric_at, update_host_availability
+    update_host_last_metric_at, update_hosts_last_metric_at, update_host_availability, set_hosts_availability,
+    apply_host_heartbeats, mark_stale_agents
 )
 from .crud_metric_data import (
-    get_metric_data_by_id, get_metric_data_for_host,
-    create_metric_data, create_multiple_metric_data, get_latest_metric
+    get_metric_data_for_host,
+    create_metric_data, create_multiple_metric_data, upsert_latest_metrics,
+    get_latest_metric, get_latest_metrics_for_host, get_latest_metrics_for_keys
 )
+from .crud_metric_key import get_or_create_metric_key_ids
+from .crud_metric_text import get_or_create_text_value_ids
+from .crud_metric_chunk import insert_metric_chunks
+from .crud_metric_archive import get_archive_watermarks, get_archive_watermark, set_archive_watermark, upsert_archive_file
+from .crud_metric_rollup import get_rollup_points
 from .crud_trigger_config import (
     get_trigger_config, get_trigger_configs_by_host, get_trigger_config_by_host_and_key,
     create_trigger_config, update_trigger_config, update_trigger_status,
-    delete_trigger_config, get_problem_trigger_configs
+    delete_trigger_config, get_problem_trigger_configs,
+    get_enabled_trigger_configs_for_active_hosts, get_enabled_trigger_keys, bulk_update_trigger_statuses
 )
 
 from . import crud_user
 from . import crud_host
 from . import crud_metric_data
+from . import crud_metric_key
+from . import crud_metric_text
+from . import crud_metric_chunk
+from . import crud_metric_archive
+from . import crud_metric_rollup
 from . import crud_trigger_config
 
 # (Опціонально) Створюємо зручні аліаси для коротшого доступу
 user = crud_user
 host = crud_host
 metric_data = crud_metric_data
+metric_key = crud_metric_key
+metric_text = crud_metric_text
+metric_chunk = crud_metric_chunk
+metric_archive = crud_metric_archive
+metric_rollup = crud_metric_rollup
 trigger_config = crud_trigger_config
@@ -1,11 +1,17 @@
+from sqlalchemy import update, select, case, cast, func, or_, literal_column, bindparam, Select, Update
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional, Iterable
 import uuid
 from datetime import datetime, timezone
 
 from app.db.models.host import Host
 from app.db.models.enums import HostAvailabilityStatusEnum, HostTypeEnum
 from app.schemas.host import HostCreate, HostUpdate
+from app.cache.agent_identity_cache import agent_identity_cache
+from app.cache.host_ip_cache import host_ip_cache
+from app.cache.snmp_session_cache import snmp_session_cache
+from app.cache.snmp_target_cache import snmp_target_cache
+from app.cache.trigger_index import trigger_index
 
 def get_host(db: Session, host_id: uuid.UUID) -> Optional[Host]:
     return db.query(Host).filter(Host.id == host_id).first()
@@ -33,6 +39,17 @@ def get_hosts(
         query = query.filter(Host.is_monitored == is_monitored)
     return query.order_by(Host.name).offset(skip).limit(limit).all()
 
+def pollable_snmp_hosts_stmt() -> Select:
+    return select(Host).where(
+        Host.host_type == HostTypeEnum.mikrotik_snmp,
+        Host.is_monitored == True,
+        Host.availability_status != HostAvailabilityStatusEnum.pending_approval
+    )
+
+def get_pollable_snmp_hosts(db: Session) -> List[Host]:
+    """Усі SNMP-хости, які треба опитувати (без ліміту get_hosts)."""
+    return db.scalars(pollable_snmp_hosts_stmt()).all()
+
 def get_pending_approval_hosts(db: Session, skip: int = 0, limit: int = 100) -> List[Host]:
     return get_hosts(db, skip=skip, limit=limit, availability_status=HostAvailabilityStatusEnum.pending_approval)
 
@@ -45,6 +62,8 @@ def create_host(db: Session, host_in: HostCreate) -> Host:
         snmp_community=host_in.snmp_community,
         snmp_port=host_in.snmp_port,
         snmp_version=host_in.snmp_version,
+        snmp_poll_interval_seconds=host_in.snmp_poll_interval_seconds,
+        agent_timeout_seconds=host_in.agent_timeout_seconds,
         is_monitored=host_in.is_monitored if host_in.is_monitored is not None else True,
         notes=host_in.notes,
     )
@@ -55,6 +74,8 @@ def create_host(db: Session, host_in: HostCreate) -> Host:
     db.add(db_host)
     db.commit()
     db.refresh(db_host)
+    host_ip_cache.invalidate()
+    snmp_target_cache.invalidate()
     return db_host
 
 def approve_host(db: Session, db_host: Host, name: Optional[str] = None, ip_address: Optional[str] = None) -> Host:
@@ -68,16 +89,28 @@ def approve_host(db: Session, db_host: Host, name: Optional[str] = None, ip_addr
         db.add(db_host)
         db.commit()
         db.refresh(db_host)
+        snmp_session_cache.evict_host(db_host.id)
+        host_ip_cache.invalidate()
+        snmp_target_cache.invalidate()
+        if db_host.unique_agent_id:
+            agent_identity_cache.invalidate(db_host.unique_agent_id)
     return db_host
 
 def update_host(db: Session, db_host: Host, host_in: HostUpdate) -> Host:
     update_data = host_in.model_dump(exclude_unset=True)
+    previous_agent_id = db_host.unique_agent_id
     for field, value in update_data.items():
         setattr(db_host, field, value)
 
     db.add(db_host)
     db.commit()
     db.refresh(db_host)
+    if update_data.keys() & {"ip_address", "snmp_port", "snmp_community", "snmp_version"}:
+        snmp_session_cache.evict_host(db_host.id)
+    host_ip_cache.invalidate()
+    snmp_target_cache.invalidate()
+    for agent_id in {previous_agent_id, db_host.unique_agent_id} - {None}:
+        agent_identity_cache.invalidate(agent_id)
     return db_host
 
 def delete_host(db: Session, host_id: uuid.UUID) -> Optional[Host]:
@@ -85,6 +118,12 @@ def delete_host(db: Session, host_id: uuid.UUID) -> Optional[Host]:
     if db_host:
         db.delete(db_host)
         db.commit()
+        trigger_index.invalidate()
+        snmp_session_cache.evict_host(host_id)
+        host_ip_cache.invalidate()
+        snmp_target_cache.invalidate()
+        if db_host.unique_agent_id:
+            agent_identity_cache.invalidate(db_host.unique_agent_id)
     return db_host
 
 def update_host_last_metric_at(db: Session, host_id: uuid.UUID) -> Optional[Host]:
@@ -98,6 +137,134 @@ def update_host_last_metric_at(db: Session, host_id: uuid.UUID) -> Optional[Host
         db.refresh(db_host)
     return db_host
 
+def update_hosts_last_metric_at(
+    db: Session,
+    host_ids: Iterable[uuid.UUID],
+    seen_at: Optional[datetime] = None,
+    commit: bool = True
+) -> None:
+    """
+    Оновлює last_metric_at (і статус 'up') одразу для кількох хостів одним UPDATE.
+    Хости, що очікують схвалення, залишаються в pending_approval.
+    """
+    host_ids = list(host_ids)
+    if not host_ids:
+        return
+    db.execute(hosts_seen_stmt(host_ids, seen_at or datetime.now(timezone.utc)))
+    if commit:
+        db.commit()
+
+def availability_literal(status: HostAvailabilityStatusEnum):
+    # Значення для гілок CASE: без явного CAST PostgreSQL виводить тип CASE як text
+    # і відхиляє присвоєння колонці типу host_availability_status_enum_type
+    return cast(status, Host.availability_status.type)
+
+def hosts_seen_stmt(host_ids: List[uuid.UUID], seen_at: datetime) -> Update:
+    return (
+        update(Host)
+        .where(Host.id.in_(host_ids))
+        .values(
+            last_metric_at=seen_at,
+            availability_status=case(
+                (Host.availability_status == HostAvailabilityStatusEnum.pending_approval,
+                 availability_literal(HostAvailabilityStatusEnum.pending_approval)),
+                else_=availability_literal(HostAvailabilityStatusEnum.up)
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def apply_host_heartbeats(db: Session, heartbeats: Dict[uuid.UUID, datetime]) -> None:
+    """
+    Записує накопичені удари агентів (host_id -> час останніх даних) одним executemany UPDATE:
+    last_metric_at лише посувається вперед, статус стає 'up' (крім pending_approval).
+    """
+    if not heartbeats:
+        return
+    try:
+        db.execute(host_heartbeats_stmt(), host_heartbeat_params(heartbeats))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+def host_heartbeats_stmt() -> Update:
+    table = Host.__table__
+    return (
+        update(table)
+        .where(
+            table.c.id == bindparam("b_id"),
+            or_(table.c.last_metric_at.is_(None), table.c.last_metric_at < bindparam("b_seen_at"))
+        )
+        .values(
+            last_metric_at=bindparam("b_seen_at"),
+            availability_status=case(
+                (table.c.availability_status == HostAvailabilityStatusEnum.pending_approval,
+                 availability_literal(HostAvailabilityStatusEnum.pending_approval)),
+                else_=availability_literal(HostAvailabilityStatusEnum.up)
+            )
+        )
+    )
+
+def host_heartbeat_params(heartbeats: Dict[uuid.UUID, datetime]) -> List[dict]:
+    return [{"b_id": host_id, "b_seen_at": seen_at} for host_id, seen_at in heartbeats.items()]
+
+def set_hosts_availability(
+    db: Session,
+    host_ids: Iterable[uuid.UUID],
+    status: HostAvailabilityStatusEnum,
+    commit: bool = True
+) -> None:
+    """Виставляє статус кільком хостам одним UPDATE (хости в pending_approval не чіпаються)."""
+    host_ids = list(host_ids)
+    if not host_ids:
+        return
+    db.execute(hosts_availability_stmt(host_ids, status))
+    if commit:
+        db.commit()
+
+def hosts_availability_stmt(host_ids: List[uuid.UUID], status: HostAvailabilityStatusEnum) -> Update:
+    return (
+        update(Host)
+        .where(
+            Host.id.in_(host_ids),
+            Host.availability_status != status,
+            Host.availability_status != HostAvailabilityStatusEnum.pending_approval
+        )
+        .values(availability_status=status)
+        .execution_options(synchronize_session=False)
+    )
+
+def mark_stale_agents(db: Session, default_timeout_seconds: int) -> List[tuple]:
+    """
+    Одним UPDATE ... RETURNING переводить агентів зі статусом 'up', що замовкли, у 'down'
+    (last_metric_at старше за agent_timeout_seconds хоста або default_timeout_seconds),
+    а агентів 'up' без жодної метрики - в 'unknown'. Повертає (id, name, новий статус) змінених хостів.
+    """
+    timeout = func.coalesce(Host.agent_timeout_seconds, default_timeout_seconds) * literal_column("interval '1 second'")
+    stmt = (
+        update(Host)
+        .where(
+            Host.host_type.in_([HostTypeEnum.windows_agent, HostTypeEnum.ubuntu_agent]),
+            Host.is_monitored == True,
+            Host.availability_status == HostAvailabilityStatusEnum.up,
+            or_(Host.last_metric_at.is_(None), Host.last_metric_at < func.now() - timeout)
+        )
+        .values(availability_status=case(
+            (Host.last_metric_at.is_(None), availability_literal(HostAvailabilityStatusEnum.unknown)),
+            else_=availability_literal(HostAvailabilityStatusEnum.down)
+        ))
+        .returning(Host.id, Host.name, Host.availability_status)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        changed = db.execute(stmt).all()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return changed
+
 def update_host_availability(db: Session, host_id: uuid.UUID, status: HostAvailabilityStatusEnum) -> Optional[Host]:
     db_host = get_host(db, host_id=host_id)
     if db_host and db_host.availability_status != HostAvailabilityStatusEnum.pending_approval:
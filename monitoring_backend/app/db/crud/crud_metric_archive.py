@@ -0,0 +1,74 @@
+from sqlalchemy import select, func, Select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from typing import Dict, Any, Optional
+import uuid
+from datetime import datetime
+
+from app.db.models.enums import HostTypeEnum
+from app.db.models.host import Host
+from app.db.models.metric_key import MetricKey
+from app.db.models.metric_data import MetricData
+from app.db.models.metric_text import MetricTextSample, MetricTextValue
+from app.db.models.metric_chunk import MetricChunk
+from app.db.models.metric_archive import MetricArchiveFile, MetricArchiveWatermark
+
+def get_archive_watermarks(db: Session) -> Dict[str, datetime]:
+    return {row.host_type: row.archived_until for row in db.scalars(select(MetricArchiveWatermark)).all()}
+
+def get_archive_watermark(db: Session, host_type: str) -> Optional[datetime]:
+    row = db.get(MetricArchiveWatermark, host_type)
+    return row.archived_until if row else None
+
+def set_archive_watermark(db: Session, host_type: str, archived_until: datetime) -> None:
+    stmt = pg_insert(MetricArchiveWatermark.__table__).values(host_type=host_type, archived_until=archived_until)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MetricArchiveWatermark.host_type],
+        set_={"archived_until": stmt.excluded.archived_until}
+    )
+    db.execute(stmt)
+
+def upsert_archive_file(db: Session, archive_file: Dict[str, Any]) -> None:
+    """Запис каталогу для файлу доби (повторне вивантаження доби перезаписує файл і запис). Commit не робить."""
+    stmt = pg_insert(MetricArchiveFile.__table__).values(**archive_file)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MetricArchiveFile.host_type, MetricArchiveFile.day],
+        set_={column: stmt.excluded[column] for column in archive_file if column not in ("host_type", "day")}
+    )
+    db.execute(stmt)
+
+def archive_file_paths_stmt(host_type: str, start_time: datetime, end_time: datetime) -> Select:
+    """Файли типу хоста, чиї дані перетинають [start_time, end_time) - за статистикою каталогу."""
+    return select(MetricArchiveFile.path).where(
+        MetricArchiveFile.host_type == host_type,
+        MetricArchiveFile.max_timestamp >= start_time,
+        MetricArchiveFile.min_timestamp < end_time,
+    ).order_by(MetricArchiveFile.day.desc())
+
+def get_oldest_timestamp_for_host_type(db: Session, host_type: str) -> Optional[datetime]:
+    """Найстаріший онлайн-вимір (сирий, текстовий або в чанку) хостів цього типу."""
+    host_ids = select(Host.id).where(Host.host_type == HostTypeEnum(host_type))
+    candidates = [
+        db.scalar(select(func.min(MetricData.timestamp)).where(MetricData.host_id.in_(host_ids))),
+        db.scalar(select(func.min(MetricTextSample.timestamp)).where(MetricTextSample.host_id.in_(host_ids))),
+        db.scalar(select(func.min(MetricChunk.start_time)).where(MetricChunk.host_id.in_(host_ids))),
+    ]
+    return min((candidate for candidate in candidates if candidate is not None), default=None)
+
+def numeric_samples_stmt(host_id: uuid.UUID, start_time: datetime, end_time: datetime) -> Select:
+    """Сирі числові виміри хоста за [start_time, end_time) для вивантаження в архів."""
+    return select(MetricKey.key, MetricData.timestamp, MetricData.value_numeric)\
+        .join(MetricKey, MetricKey.id == MetricData.metric_key_id)\
+        .where(MetricData.host_id == host_id, MetricData.timestamp >= start_time, MetricData.timestamp < end_time)
+
+def text_samples_stmt(host_id: uuid.UUID, start_time: datetime, end_time: datetime) -> Select:
+    return select(MetricKey.key, MetricTextSample.timestamp, MetricTextValue.value)\
+        .join(MetricKey, MetricKey.id == MetricTextSample.metric_key_id)\
+        .join(MetricTextValue, MetricTextValue.id == MetricTextSample.text_value_id)\
+        .where(MetricTextSample.host_id == host_id, MetricTextSample.timestamp >= start_time, MetricTextSample.timestamp < end_time)
+
+def chunks_stmt(host_id: uuid.UUID, start_time: datetime, end_time: datetime) -> Select:
+    """Чанки хоста, що перетинають [start_time, end_time) - точки поза інтервалом відкидаються після декодування."""
+    return select(MetricKey.key, MetricChunk.data)\
+        .join(MetricKey, MetricKey.id == MetricChunk.metric_key_id)\
+        .where(MetricChunk.host_id == host_id, MetricChunk.end_time >= start_time, MetricChunk.start_time < end_time)
@@ -0,0 +1,47 @@
+from sqlalchemy import insert, select, Select
+from sqlalchemy.orm import Session
+from typing import List, Optional, Dict, Any, Sequence, Tuple
+import uuid
+from datetime import datetime
+
+from app.db.models.metric_chunk import MetricChunk
+from app.db.crud.crud_metric_key import metric_key_id_subquery, metric_key_name_subquery
+from app.db.chunk_codec import encode_chunk, to_microseconds
+
+def build_chunk_row(
+    host_id: uuid.UUID, metric_key_id: int, samples: Sequence[Tuple[datetime, float]]
+) -> Dict[str, Any]:
+    """Рядок metric_chunks для виміряних точок серії (samples - за зростанням часу)."""
+    return {
+        "host_id": host_id,
+        "metric_key_id": metric_key_id,
+        "start_time": samples[0][0],
+        "end_time": samples[-1][0],
+        "sample_count": len(samples),
+        "data": encode_chunk([to_microseconds(ts) for ts, _ in samples], [value for _, value in samples]),
+    }
+
+def insert_metric_chunks(db: Session, chunk_rows: List[Dict[str, Any]]) -> None:
+    """Commit не робить - чанки записуються в одній транзакції з видаленням стиснених сирих даних."""
+    if chunk_rows:
+        db.execute(insert(MetricChunk.__table__), chunk_rows)
+
+def metric_chunks_for_host_stmt(
+    host_id: uuid.UUID,
+    metric_key: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None
+) -> Select:
+    """Чанки, що перетинають [start_time, end_time], від новіших до старіших."""
+    stmt = select(
+        metric_key_name_subquery(MetricChunk.metric_key_id).label("metric_key"),
+        MetricChunk.end_time,
+        MetricChunk.data,
+    ).where(MetricChunk.host_id == host_id)
+    if metric_key:
+        stmt = stmt.where(MetricChunk.metric_key_id == metric_key_id_subquery(metric_key))
+    if start_time:
+        stmt = stmt.where(MetricChunk.end_time >= start_time)
+    if end_time:
+        stmt = stmt.where(MetricChunk.start_time <= end_time)
+    return stmt.order_by(MetricChunk.end_time.desc())
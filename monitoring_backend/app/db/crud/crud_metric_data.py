@@ -1,81 +1,299 @@
+from sqlalchemy import select, tuple_, cast, null, union_all, Float, Text, Select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Tuple, Iterable, Set, NamedTuple, Sequence
+import heapq
 import uuid
 from datetime import datetime, timezone
 
 from app.db.models.metric_data import MetricData
+from app.db.models.metric_text import MetricTextSample, MetricTextValue
+from app.db.models.metric_latest import MetricLatest
 from app.schemas.metric_data import MetricDataCreate
-from app.db.crud.crud_host import update_host_last_metric_at
+from app.db.crud.crud_host import update_hosts_last_metric_at
+from app.db.crud.crud_metric_key import get_or_create_metric_key_ids, metric_key_id_subquery, metric_key_name_subquery
+from app.db.crud.crud_metric_text import get_or_create_text_value_ids
+from app.db.crud.crud_metric_chunk import metric_chunks_for_host_stmt
+from app.db.chunk_codec import decode_chunk, from_microseconds, to_microseconds
+from app.cache.metric_key_cache import metric_key_cache
 
-def get_metric_data_by_id(db: Session, metric_data_id: uuid.UUID) -> Optional[MetricData]:
-    return db.query(MetricData).filter(MetricData.id == metric_data_id).first()
+class MetricPoint(NamedTuple):
+    """Сирий вимір, декодований зі стисненого чанка (ті самі поля, що й рядки metric_data_for_host_stmt)."""
+    host_id: uuid.UUID
+    metric_key: str
+    value_numeric: Optional[float]
+    value_text: Optional[str]
+    timestamp: datetime
 
-def get_metric_data_for_host(
-    db: Session,
+def _as_utc(timestamp: datetime) -> datetime:
+    # Агенти можуть надсилати час без часової зони - вважаємо його UTC
+    return timestamp.replace(tzinfo=timezone.utc) if timestamp.tzinfo is None else timestamp
+
+def metric_data_for_host_stmt(
     host_id: uuid.UUID,
     metric_key: Optional[str] = None,
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None,
     skip: int = 0,
     limit: int = 1000
-) -> List[MetricData]:
-    query = db.query(MetricData).filter(MetricData.host_id == host_id)
+) -> Select:
+    """
+    Сирі виміри хоста: числові (metric_data) і текстові (metric_text_samples) одним потоком
+    у колонках MetricPointRead, від новіших до старіших.
+    """
+    numeric = select(
+        MetricData.host_id,
+        MetricData.metric_key_id,
+        MetricData.value_numeric,
+        cast(null(), Text).label("value_text"),
+        MetricData.timestamp,
+    ).where(MetricData.host_id == host_id)
+    text_samples = select(
+        MetricTextSample.host_id,
+        MetricTextSample.metric_key_id,
+        cast(null(), Float).label("value_numeric"),
+        MetricTextValue.value.label("value_text"),
+        MetricTextSample.timestamp,
+    ).join(MetricTextValue, MetricTextValue.id == MetricTextSample.text_value_id)\
+        .where(MetricTextSample.host_id == host_id)
+
+    # Умови на timestamp накладаються безпосередньо на колонку, щоб PostgreSQL
+    # відсікав партиції metric_data поза діапазоном [start_time, end_time]
     if metric_key:
-        query = query.filter(MetricData.metric_key == metric_key)
+        numeric = numeric.where(MetricData.metric_key_id == metric_key_id_subquery(metric_key))
+        text_samples = text_samples.where(MetricTextSample.metric_key_id == metric_key_id_subquery(metric_key))
     if start_time:
-        query = query.filter(MetricData.timestamp >= start_time)
+        numeric = numeric.where(MetricData.timestamp >= start_time)
+        text_samples = text_samples.where(MetricTextSample.timestamp >= start_time)
     if end_time:
-        query = query.filter(MetricData.timestamp <= end_time)
+        numeric = numeric.where(MetricData.timestamp <= end_time)
+        text_samples = text_samples.where(MetricTextSample.timestamp <= end_time)
+
+    points = union_all(numeric, text_samples).subquery()
+    return select(
+        points.c.host_id,
+        metric_key_name_subquery(points.c.metric_key_id).label("metric_key"),
+        points.c.value_numeric,
+        points.c.value_text,
+        points.c.timestamp,
+    ).order_by(points.c.timestamp.desc()).offset(skip).limit(limit)
+
+def get_metric_data_for_host(
+    db: Session,
+    host_id: uuid.UUID,
+    metric_key: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 1000
+) -> List:
+    """Сирі виміри хоста разом з холодними (стисненими в metric_chunks) - для API вони не відрізняються."""
+    raw_rows = db.execute(metric_data_for_host_stmt(host_id, metric_key, start_time, end_time, 0, skip + limit)).all()
+    chunk_rows = db.execute(metric_chunks_for_host_stmt(
+        host_id, metric_key, chunk_range_start(raw_rows, start_time, skip + limit), end_time
+    )).all()
+    return merge_chunk_points(host_id, raw_rows, chunk_rows, start_time, end_time, skip, limit)
+
+def chunk_range_start(raw_rows: Sequence, start_time: Optional[datetime], needed: int) -> Optional[datetime]:
+    # Якщо сирих рядків уже вистачає, потрібні лише чанки з точками, новішими за найстаріший з них
+    if raw_rows and len(raw_rows) >= needed:
+        oldest = raw_rows[-1].timestamp
+        return max(start_time, oldest) if start_time else oldest
+    return start_time
+
+def merge_chunk_points(
+    host_id: uuid.UUID,
+    raw_rows: Sequence,
+    chunk_rows: Sequence,
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    skip: int,
+    limit: int
+) -> List:
+    """
+    Зливає сирі рядки (перші skip + limit, від новіших) з точками чанків (чанки від новіших до старіших).
+    Чанки декодуються лише доти, доки старіші з них ще можуть потрапити в сторінку результату.
+    Точки збираються в один список і сортуються один раз; для ранньої зупинки купа тримає ще не
+    пораховані часові мітки, тож кожна точка рахується один раз, а не на кожному чанку.
+    """
+    if not chunk_rows:
+        return list(raw_rows[skip:skip + limit])
+
+    needed = skip + limit
+    start_us = to_microseconds(_as_utc(start_time)) if start_time else None
+    end_us = to_microseconds(_as_utc(end_time)) if end_time else None
+    points = list(raw_rows)
+    # Мін-купа від'ємних міток (= макс-купа міток) точок, новіших за межу, що ще не пораховані
+    uncounted = [-to_microseconds(_as_utc(row.timestamp)) for row in raw_rows]
+    heapq.heapify(uncounted)
+    counted = 0
+    for index, chunk in enumerate(chunk_rows):
+        timestamps, values = decode_chunk(chunk.data)
+        for timestamp_us, value in zip(timestamps, values):
+            if (start_us is None or timestamp_us >= start_us) and (end_us is None or timestamp_us <= end_us):
+                points.append(MetricPoint(host_id, chunk.metric_key, value, None, from_microseconds(timestamp_us)))
+                heapq.heappush(uncounted, -timestamp_us)
+        if index + 1 < len(chunk_rows):
+            # Усі точки решти чанків не новіші за end_time наступного чанка
+            next_end_us = to_microseconds(_as_utc(chunk_rows[index + 1].end_time))
+            while uncounted and -uncounted[0] >= next_end_us:
+                heapq.heappop(uncounted)
+                counted += 1
+            if counted >= needed:
+                break
+    points.sort(key=lambda point: point.timestamp, reverse=True)
+    return points[skip:needed]
 
-    return query.order_by(MetricData.timestamp.desc()).offset(skip).limit(limit).all()
+def create_metric_data(db: Session, metric_in: MetricDataCreate) -> int:
+    return create_multiple_metric_data(db, [metric_in])
 
-def create_metric_data(db: Session, metric_in: MetricDataCreate) -> MetricData:
-    timestamp = metric_in.timestamp if metric_in.timestamp else datetime.now(timezone.utc)
+def create_multiple_metric_data(db: Session, metrics_in: List[MetricDataCreate], touch_hosts: bool = True) -> int:
+    """
+    Масовий запис пачки метрик (агент або SNMP-опитування).
+    Числові виміри вставляються одним INSERT у metric_data, текстові - у metric_text_samples,
+    metric_latest оновлюється одним upsert, last_metric_at хостів - одним UPDATE, і все це в одній транзакції.
+    ORM-об'єкти не створюються і не перечитуються з БД, тому повертається лише кількість рядків.
+    touch_hosts=False - hosts не чіпається (для агентів це робить heartbeat_tracker).
+    """
+    if not metrics_in:
+        return 0
 
-    db_metric = MetricData(
-        host_id=metric_in.host_id,
-        metric_key=metric_in.metric_key,
-        value_numeric=metric_in.value_numeric,
-        value_text=metric_in.value_text,
-        timestamp=timestamp
+    now = datetime.now(timezone.utc)
+    rows = build_metric_rows(metrics_in, now)
+    host_ids_to_update = {row["host_id"] for row in rows}
+
+    try:
+        key_ids, registered = resolve_metric_key_ids(db, {row["metric_key"] for row in rows})
+        text_ids = get_or_create_text_value_ids(db, text_values_of(rows))
+        numeric_rows, text_rows = split_metric_rows(rows, key_ids, text_ids)
+        if numeric_rows:
+            db.execute(numeric_samples_insert_stmt(), numeric_rows)
+        if text_rows:
+            db.execute(text_samples_insert_stmt(), text_rows)
+        upsert_latest_metrics(db, rows)
+        if touch_hosts:
+            update_hosts_last_metric_at(db, host_ids=host_ids_to_update, seen_at=now, commit=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    # Нові ключі потрапляють у кеш лише після commit-у, інакше відкат залишив би в кеші неіснуючі id
+    metric_key_cache.update(registered)
+
+    return len(rows)
+
+def resolve_metric_key_ids(db: Session, keys: Iterable[str]) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """(id усіх ключів, щойно зареєстровані ключі - їх слід додати в кеш після commit-у)."""
+    key_ids, missing = metric_key_cache.get_many(keys)
+    registered = get_or_create_metric_key_ids(db, missing) if missing else {}
+    key_ids.update(registered)
+    return key_ids, registered
+
+def build_metric_rows(metrics_in: List[MetricDataCreate], now: datetime) -> List[Dict[str, Any]]:
+    """Рядки пачки з рядковим ключем (metric_latest, тригери); метрики без часу отримують now."""
+    return [
+        {
+            "host_id": metric_in.host_id,
+            "metric_key": metric_in.metric_key,
+            "value_numeric": metric_in.value_numeric,
+            "value_text": metric_in.value_text,
+            "timestamp": _as_utc(metric_in.timestamp) if metric_in.timestamp else now,
+        }
+        for metric_in in metrics_in
+    ]
+
+def text_values_of(rows: List[Dict[str, Any]]) -> Set[str]:
+    return {row["value_text"] for row in rows if row["value_numeric"] is None and row["value_text"] is not None}
+
+def split_metric_rows(
+    rows: List[Dict[str, Any]], key_ids: Dict[str, int], text_ids: Dict[str, int]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Рядки build_metric_rows у вигляді колонок metric_data та metric_text_samples.
+    Вимір з числовим значенням іде в metric_data, інакше текстовий - у metric_text_samples;
+    вимір без жодного значення зберігається лише в metric_latest.
+    """
+    numeric_rows, text_rows = [], []
+    for row in rows:
+        sample = {"host_id": row["host_id"], "metric_key_id": key_ids[row["metric_key"]], "timestamp": row["timestamp"]}
+        if row["value_numeric"] is not None:
+            numeric_rows.append({**sample, "value_numeric": row["value_numeric"]})
+        elif row["value_text"] is not None:
+            text_rows.append({**sample, "text_value_id": text_ids[row["value_text"]]})
+    return numeric_rows, text_rows
+
+def numeric_samples_insert_stmt():
+    # Повтор того самого виміру (та сама мітка часу, наприклад повторна відправка агентом) не дублюється
+    return pg_insert(MetricData.__table__).on_conflict_do_nothing(
+        index_elements=[MetricData.host_id, MetricData.metric_key_id, MetricData.timestamp]
+    )
+
+def text_samples_insert_stmt():
+    return pg_insert(MetricTextSample.__table__).on_conflict_do_nothing(
+        index_elements=[MetricTextSample.host_id, MetricTextSample.metric_key_id, MetricTextSample.timestamp]
     )
-    db.add(db_metric)
-    db.commit()
-    db.refresh(db_metric)
-
-    update_host_last_metric_at(db, host_id=metric_in.host_id)
-
-    return db_metric
-
-def create_multiple_metric_data(db: Session, metrics_in: List[MetricDataCreate]) -> List[MetricData]:
-    db_metrics = []
-    host_ids_to_update = set()
-
-    for metric_in in metrics_in:
-        timestamp = metric_in.timestamp if metric_in.timestamp else datetime.now(timezone.utc)
-        db_metric = MetricData(
-            host_id=metric_in.host_id,
-            metric_key=metric_in.metric_key,
-            value_numeric=metric_in.value_numeric,
-            value_text=metric_in.value_text,
-            timestamp=timestamp
-        )
-        db_metrics.append(db_metric)
-        host_ids_to_update.add(metric_in.host_id)
-
-    db.add_all(db_metrics)
-    db.commit()
-
-    for db_m in db_metrics:
-        db.refresh(db_m)
-
-    for host_id in host_ids_to_update:
-        update_host_last_metric_at(db, host_id=host_id)
-
-    return db_metrics
-
-def get_latest_metric(db: Session, host_id: uuid.UUID, metric_key: str) -> Optional[MetricData]: # <--- НОВА ФУНКЦІЯ
-    return db.query(MetricData)\
-        .filter(MetricData.host_id == host_id, MetricData.metric_key == metric_key)\
-        .order_by(MetricData.timestamp.desc())\
-        .first()
\ No newline at end of file
+
+def upsert_latest_metrics(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Оновлює таблицю metric_latest одним INSERT ... ON CONFLICT DO UPDATE.
+    З пачки береться найсвіжіший рядок для кожної пари (host_id, metric_key), а старіші
+    за вже збережене значення рядки (запізнілі пачки) не перезаписують його. Commit не робить.
+    """
+    stmt = latest_metrics_upsert_stmt(rows)
+    if stmt is not None:
+        db.execute(stmt)
+
+def latest_metrics_upsert_stmt(rows: List[Dict[str, Any]]):
+    """INSERT ... ON CONFLICT для metric_latest (None, якщо рядків немає)."""
+    latest_by_key: Dict[Tuple[uuid.UUID, str], Dict[str, Any]] = {}
+    for row in rows:
+        key = (row["host_id"], row["metric_key"])
+        current = latest_by_key.get(key)
+        if current is None or row["timestamp"] >= current["timestamp"]:
+            latest_by_key[key] = row
+    if not latest_by_key:
+        return None
+
+    stmt = pg_insert(MetricLatest.__table__).values([
+        {
+            "host_id": row["host_id"],
+            "metric_key": row["metric_key"],
+            "value_numeric": row["value_numeric"],
+            "value_text": row["value_text"],
+            "timestamp": row["timestamp"],
+        }
+        for row in latest_by_key.values()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MetricLatest.host_id, MetricLatest.metric_key],
+        set_={
+            "value_numeric": stmt.excluded.value_numeric,
+            "value_text": stmt.excluded.value_text,
+            "timestamp": stmt.excluded.timestamp,
+        },
+        where=MetricLatest.timestamp <= stmt.excluded.timestamp
+    )
+    return stmt
+
+def get_latest_metric(db: Session, host_id: uuid.UUID, metric_key: str) -> Optional[MetricLatest]:
+    """Поточне значення метрики - пошук за первинним ключем metric_latest, без сканування історії."""
+    return db.get(MetricLatest, (host_id, metric_key))
+
+def latest_metrics_for_host_stmt(host_id: uuid.UUID) -> Select:
+    return select(MetricLatest).where(MetricLatest.host_id == host_id).order_by(MetricLatest.metric_key)
+
+def get_latest_metrics_for_host(db: Session, host_id: uuid.UUID) -> List[MetricLatest]:
+    return db.scalars(latest_metrics_for_host_stmt(host_id)).all()
+
+def latest_metrics_for_keys_stmt(keys: List[Tuple[uuid.UUID, str]]) -> Select:
+    return select(MetricLatest).where(tuple_(MetricLatest.host_id, MetricLatest.metric_key).in_(keys))
+
+def get_latest_metrics_for_keys(
+    db: Session, keys: Iterable[Tuple[uuid.UUID, str]]
+) -> Dict[Tuple[uuid.UUID, str], MetricLatest]:
+    """Поточні значення для набору пар (host_id, metric_key) одним запитом."""
+    keys = list(keys)
+    if not keys:
+        return {}
+    rows = db.scalars(latest_metrics_for_keys_stmt(keys)).all()
+    return {(row.host_id, row.metric_key): row for row in rows}
@@ -0,0 +1,34 @@
+from sqlalchemy import select, Select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List
+
+from app.db.models.metric_key import MetricKey
+
+
+def metric_key_id_subquery(key: str):
+    """id ключа як скалярний підзапит - для фільтрів metric_data за рядковим ключем."""
+    return select(MetricKey.id).where(MetricKey.key == key).scalar_subquery()
+
+def metric_key_name_subquery(key_id_column):
+    """Рядковий ключ за id (корельований підзапит) - для виводу рядків зі збережених вимірів."""
+    return select(MetricKey.key).where(MetricKey.id == key_id_column).scalar_subquery()
+
+def register_metric_keys_stmt(keys: List[str]):
+    return pg_insert(MetricKey.__table__).values([{"key": key} for key in keys])\
+        .on_conflict_do_nothing(index_elements=[MetricKey.key])
+
+def metric_key_ids_stmt(keys: List[str]) -> Select:
+    return select(MetricKey.key, MetricKey.id).where(MetricKey.key.in_(keys))
+
+def get_or_create_metric_key_ids(db: Session, keys: Iterable[str]) -> Dict[str, int]:
+    """
+    id для набору ключів; відсутні ключі реєструються INSERT ... ON CONFLICT DO NOTHING
+    (паралельна реєстрація того самого ключа безпечна). Commit не робить - реєстрація
+    входить у транзакцію запису метрик.
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return {}
+    db.execute(register_metric_keys_stmt(keys))
+    return {key: key_id for key, key_id in db.execute(metric_key_ids_stmt(keys)).all()}
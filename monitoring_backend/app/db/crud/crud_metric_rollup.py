@@ -0,0 +1,148 @@
+from sqlalchemy import select, func, literal_column, union_all, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from typing import List, Optional
+import uuid
+from datetime import datetime
+
+from app.db.models.metric_data import MetricData
+from app.db.models.metric_key import MetricKey
+from app.db.models.metric_rollup import MetricRollup, RollupWatermark
+
+# Вирівнювання часу на початок bucket-а заданої роздільності (в секундах від епохи)
+_RAW_BUCKET_SQL = "to_timestamp(floor(extract(epoch FROM timestamp) / :res) * :res)"
+_ROLLUP_BUCKET_SQL = "to_timestamp(floor(extract(epoch FROM bucket_start) / :res) * :res)"
+
+_UPSERT_SET_SQL = """
+    ON CONFLICT (host_id, metric_key, resolution_seconds, bucket_start) DO UPDATE SET
+        value_min = EXCLUDED.value_min,
+        value_max = EXCLUDED.value_max,
+        value_avg = EXCLUDED.value_avg,
+        sample_count = EXCLUDED.sample_count,
+        value_last = EXCLUDED.value_last,
+        last_timestamp = EXCLUDED.last_timestamp
+"""
+
+
+def get_watermark(db: Session, resolution_seconds: int) -> Optional[datetime]:
+    row = db.get(RollupWatermark, resolution_seconds)
+    return row.watermark if row else None
+
+def set_watermark(db: Session, resolution_seconds: int, watermark: datetime) -> None:
+    stmt = pg_insert(RollupWatermark.__table__).values(resolution_seconds=resolution_seconds, watermark=watermark)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RollupWatermark.resolution_seconds],
+        set_={"watermark": stmt.excluded.watermark}
+    )
+    db.execute(stmt)
+
+def get_oldest_raw_timestamp(db: Session) -> Optional[datetime]:
+    return db.query(func.min(MetricData.timestamp)).scalar()
+
+def aggregate_raw_into_rollups(db: Session, resolution_seconds: int, start: datetime, end: datetime) -> int:
+    """Агрегує сирі числові значення metric_data з [start, end) у bucket-и resolution_seconds. Commit не робить."""
+    result = db.execute(text(f"""
+        INSERT INTO metric_rollups (host_id, metric_key, resolution_seconds, bucket_start,
+                                    value_min, value_max, value_avg, sample_count, value_last, last_timestamp)
+        SELECT host_id, metric_keys.key, :res, {_RAW_BUCKET_SQL} AS bucket,
+               min(value_numeric), max(value_numeric), avg(value_numeric), count(value_numeric),
+               (array_agg(value_numeric ORDER BY timestamp DESC))[1], max(timestamp)
+        FROM metric_data
+        JOIN metric_keys ON metric_keys.id = metric_data.metric_key_id
+        WHERE timestamp >= :start AND timestamp < :end
+        GROUP BY host_id, metric_keys.key, bucket
+        {_UPSERT_SET_SQL}
+    """), {"res": resolution_seconds, "start": start, "end": end})
+    return result.rowcount
+
+def aggregate_rollups_into_rollups(
+    db: Session, source_resolution_seconds: int, resolution_seconds: int, start: datetime, end: datetime
+) -> int:
+    """Будує грубішу роздільність з дрібнішої (5m з 1m, 1h з 5m) без повторного читання сирих даних."""
+    result = db.execute(text(f"""
+        INSERT INTO metric_rollups (host_id, metric_key, resolution_seconds, bucket_start,
+                                    value_min, value_max, value_avg, sample_count, value_last, last_timestamp)
+        SELECT host_id, metric_key, :res, {_ROLLUP_BUCKET_SQL} AS bucket,
+               min(value_min), max(value_max), sum(value_avg * sample_count) / sum(sample_count), sum(sample_count),
+               (array_agg(value_last ORDER BY last_timestamp DESC))[1], max(last_timestamp)
+        FROM metric_rollups
+        WHERE resolution_seconds = :source_res AND bucket_start >= :start AND bucket_start < :end
+        GROUP BY host_id, metric_key, bucket
+        {_UPSERT_SET_SQL}
+    """), {"res": resolution_seconds, "source_res": source_resolution_seconds, "start": start, "end": end})
+    return result.rowcount
+
+def get_rollup_points(
+    db: Session,
+    host_id: uuid.UUID,
+    metric_key: Optional[str],
+    resolution_seconds: int,
+    start_time: datetime,
+    end_time: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 1000
+) -> List:
+    """
+    Точки графіка заданої роздільності. Вже агреговані bucket-и читаються з metric_rollups,
+    а "хвіст" після watermark (ще не оброблений job-ом) агрегується на льоту з metric_data.
+    """
+    watermark = get_watermark(db, resolution_seconds)
+    return db.execute(rollup_points_stmt(
+        host_id, metric_key, resolution_seconds, start_time, end_time, skip, limit, watermark
+    )).all()
+
+def rollup_points_stmt(
+    host_id: uuid.UUID,
+    metric_key: Optional[str],
+    resolution_seconds: int,
+    start_time: datetime,
+    end_time: Optional[datetime],
+    skip: int,
+    limit: int,
+    watermark: Optional[datetime]
+):
+    # Роздільність підставляється як константа, щоб вираз bucket-а в SELECT і GROUP BY збігався
+    res = literal_column(str(int(resolution_seconds)))
+
+    stored = select(
+        MetricRollup.host_id,
+        MetricRollup.metric_key,
+        MetricRollup.bucket_start.label("timestamp"),
+        MetricRollup.value_avg.label("value_numeric"),
+        MetricRollup.value_min,
+        MetricRollup.value_max,
+        MetricRollup.sample_count,
+        res.label("resolution_seconds"),
+    ).where(
+        MetricRollup.host_id == host_id,
+        MetricRollup.resolution_seconds == resolution_seconds,
+        MetricRollup.last_timestamp >= start_time,
+    )
+    if metric_key:
+        stored = stored.where(MetricRollup.metric_key == metric_key)
+    if end_time:
+        stored = stored.where(MetricRollup.bucket_start <= end_time)
+    if watermark:
+        stored = stored.where(MetricRollup.bucket_start < watermark)
+
+    bucket = func.to_timestamp(func.floor(func.extract("epoch", MetricData.timestamp) / res) * res)
+    tail = select(
+        MetricData.host_id,
+        MetricKey.key.label("metric_key"),
+        bucket.label("timestamp"),
+        func.avg(MetricData.value_numeric).label("value_numeric"),
+        func.min(MetricData.value_numeric).label("value_min"),
+        func.max(MetricData.value_numeric).label("value_max"),
+        func.count(MetricData.value_numeric).label("sample_count"),
+        res.label("resolution_seconds"),
+    ).join(MetricKey, MetricKey.id == MetricData.metric_key_id).where(
+        MetricData.host_id == host_id,
+        MetricData.timestamp >= max(start_time, watermark) if watermark else MetricData.timestamp >= start_time,
+    ).group_by(MetricData.host_id, MetricKey.key, bucket)
+    if metric_key:
+        tail = tail.where(MetricKey.key == metric_key)
+    if end_time:
+        tail = tail.where(MetricData.timestamp <= end_time)
+
+    points = union_all(stored, tail).subquery()
+    return select(points).order_by(points.c.timestamp.desc()).offset(skip).limit(limit)
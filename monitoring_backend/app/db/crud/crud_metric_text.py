@@ -0,0 +1,33 @@
+import hashlib
+from sqlalchemy import select, Select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List
+
+from app.db.models.metric_text import MetricTextValue
+
+
+def text_value_hash(value: str) -> str:
+    # Збігається з md5(value) у PostgreSQL (UTF-8), тож міграція рахує той самий хеш у SQL
+    return hashlib.md5(value.encode("utf-8")).hexdigest()
+
+def register_text_values_stmt(values: List[str]):
+    return pg_insert(MetricTextValue.__table__).values([
+        {"value_hash": text_value_hash(value), "value": value} for value in values
+    ]).on_conflict_do_nothing(index_elements=[MetricTextValue.value_hash])
+
+def text_value_ids_stmt(values: List[str]) -> Select:
+    return select(MetricTextValue.value_hash, MetricTextValue.id)\
+        .where(MetricTextValue.value_hash.in_([text_value_hash(value) for value in values]))
+
+def text_value_ids_by_value(values: List[str], rows) -> Dict[str, int]:
+    ids_by_hash = {value_hash: value_id for value_hash, value_id in rows}
+    return {value: ids_by_hash[text_value_hash(value)] for value in values}
+
+def get_or_create_text_value_ids(db: Session, values: Iterable[str]) -> Dict[str, int]:
+    """id для набору текстових значень (нові додаються в словник). Commit не робить."""
+    values = sorted(set(values))
+    if not values:
+        return {}
+    db.execute(register_text_values_stmt(values))
+    return text_value_ids_by_value(values, db.execute(text_value_ids_stmt(values)).all())
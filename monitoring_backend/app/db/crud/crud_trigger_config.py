@@ -1,11 +1,14 @@
+from sqlalchemy import update, select, Select
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone
 
 from app.db.models.trigger_config import TriggerConfig
-from app.db.models.enums import TriggerStatusEnum
+from app.db.models.host import Host
+from app.db.models.enums import TriggerStatusEnum, HostAvailabilityStatusEnum
 from app.schemas.trigger_config import TriggerConfigCreate, TriggerConfigUpdate, TriggerConfigCreateForHost
+from app.cache.trigger_index import trigger_index
 
 
 def get_trigger_config(db: Session, trigger_config_id: uuid.UUID) -> Optional[TriggerConfig]:
@@ -21,6 +24,30 @@ def get_trigger_configs_by_host(
         query = query.filter(TriggerConfig.is_enabled == is_enabled)
     return query.offset(skip).limit(limit).all()
 
+def get_enabled_trigger_configs_for_active_hosts(
+    db: Session, trigger_ids: Optional[List[uuid.UUID]] = None
+) -> List[TriggerConfig]:
+    """Усі (або лише trigger_ids) увімкнені тригери хостів, що моніторяться і доступні (up) - одним запитом."""
+    return db.scalars(enabled_trigger_configs_for_active_hosts_stmt(trigger_ids)).all()
+
+def enabled_trigger_configs_for_active_hosts_stmt(trigger_ids: Optional[List[uuid.UUID]] = None) -> Select:
+    stmt = select(TriggerConfig).join(Host, TriggerConfig.host_id == Host.id).where(
+        TriggerConfig.is_enabled == True,
+        Host.is_monitored == True,
+        Host.availability_status == HostAvailabilityStatusEnum.up
+    )
+    if trigger_ids is not None:
+        stmt = stmt.where(TriggerConfig.id.in_(trigger_ids))
+    return stmt
+
+def get_enabled_trigger_keys(db: Session) -> List[tuple]:
+    """(id, host_id, internal_trigger_key) усіх увімкнених тригерів - для побудови trigger_index."""
+    return db.execute(enabled_trigger_keys_stmt()).all()
+
+def enabled_trigger_keys_stmt() -> Select:
+    return select(TriggerConfig.id, TriggerConfig.host_id, TriggerConfig.internal_trigger_key)\
+        .where(TriggerConfig.is_enabled == True)
+
 def get_trigger_config_by_host_and_key(
     db: Session, host_id: uuid.UUID, internal_trigger_key: str
 ) -> Optional[TriggerConfig]:
@@ -50,6 +77,7 @@ def create_trigger_config(db: Session, trigger_config_in: TriggerConfigCreateFor
     db.add(db_trigger_config)
     db.commit()
     db.refresh(db_trigger_config)
+    trigger_index.invalidate()
     return db_trigger_config
 
 
@@ -64,6 +92,7 @@ def update_trigger_config(
     db.add(db_trigger_config)
     db.commit()
     db.refresh(db_trigger_config)
+    trigger_index.invalidate()
     return db_trigger_config
 
 def update_trigger_status(
@@ -88,11 +117,26 @@ def update_trigger_status(
         db.refresh(db_trigger_config)
     return db_trigger_config
 
+def bulk_update_trigger_statuses(db: Session, updates: List[Dict[str, Any]]) -> None:
+    """
+    Пакетне оновлення статусів тригерів за первинним ключем (ORM bulk UPDATE, executemany)
+    в одній транзакції. Кожен словник містить "id" та колонки, які треба записати.
+    """
+    if not updates:
+        return
+    try:
+        db.execute(update(TriggerConfig), updates)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
 def delete_trigger_config(db: Session, trigger_config_id: uuid.UUID) -> Optional[TriggerConfig]:
     db_trigger_config = get_trigger_config(db, trigger_config_id=trigger_config_id)
     if db_trigger_config:
         db.delete(db_trigger_config)
         db.commit()
+        trigger_index.invalidate()
     return db_trigger_config
 
 
@@ -0,0 +1,36 @@
+# Асинхронні (AsyncSession) варіанти crud-функцій для гарячих шляхів.
+# Запити будуються тими самими *_stmt-функціями, що й у синхронному app.db.crud.
+from .crud_user import get_user_by_username
+from .crud_host import (
+    get_host, get_host_by_agent_id, get_pollable_snmp_hosts,
+    update_hosts_last_metric_at, set_hosts_availability, apply_host_heartbeats
+)
+from .crud_metric_data import (
+    create_multiple_metric_data, get_metric_data_for_host,
+    get_latest_metric, get_latest_metrics_for_host, get_latest_metrics_for_keys
+)
+from .crud_metric_key import get_or_create_metric_key_ids
+from .crud_metric_text import get_or_create_text_value_ids
+from .crud_metric_archive import get_archive_watermark, get_archive_file_paths
+from .crud_metric_rollup import get_rollup_points
+from .crud_trigger_config import (
+    get_enabled_trigger_configs_for_active_hosts, get_enabled_trigger_keys, bulk_update_trigger_statuses
+)
+
+from . import crud_user
+from . import crud_host
+from . import crud_metric_data
+from . import crud_metric_key
+from . import crud_metric_text
+from . import crud_metric_archive
+from . import crud_metric_rollup
+from . import crud_trigger_config
+
+user = crud_user
+host = crud_host
+metric_data = crud_metric_data
+metric_key = crud_metric_key
+metric_text = crud_metric_text
+metric_archive = crud_metric_archive
+metric_rollup = crud_metric_rollup
+trigger_config = crud_trigger_config
@@ -0,0 +1,58 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Iterable
+import uuid
+from datetime import datetime, timezone
+
+from app.db.models.host import Host
+from app.db.models.enums import HostAvailabilityStatusEnum
+from app.db.crud.crud_host import (
+    pollable_snmp_hosts_stmt, hosts_seen_stmt, hosts_availability_stmt,
+    host_heartbeats_stmt, host_heartbeat_params
+)
+
+
+async def get_host(db: AsyncSession, host_id: uuid.UUID) -> Optional[Host]:
+    return await db.get(Host, host_id)
+
+async def get_host_by_agent_id(db: AsyncSession, unique_agent_id: str) -> Optional[Host]:
+    return await db.scalar(select(Host).where(Host.unique_agent_id == unique_agent_id))
+
+async def get_pollable_snmp_hosts(db: AsyncSession) -> List[Host]:
+    return (await db.scalars(pollable_snmp_hosts_stmt())).all()
+
+async def update_hosts_last_metric_at(
+    db: AsyncSession,
+    host_ids: Iterable[uuid.UUID],
+    seen_at: Optional[datetime] = None,
+    commit: bool = True
+) -> None:
+    host_ids = list(host_ids)
+    if not host_ids:
+        return
+    await db.execute(hosts_seen_stmt(host_ids, seen_at or datetime.now(timezone.utc)))
+    if commit:
+        await db.commit()
+
+async def set_hosts_availability(
+    db: AsyncSession,
+    host_ids: Iterable[uuid.UUID],
+    status: HostAvailabilityStatusEnum,
+    commit: bool = True
+) -> None:
+    host_ids = list(host_ids)
+    if not host_ids:
+        return
+    await db.execute(hosts_availability_stmt(host_ids, status))
+    if commit:
+        await db.commit()
+
+async def apply_host_heartbeats(db: AsyncSession, heartbeats: Dict[uuid.UUID, datetime]) -> None:
+    if not heartbeats:
+        return
+    try:
+        await db.execute(host_heartbeats_stmt(), host_heartbeat_params(heartbeats))
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
@@ -0,0 +1,14 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
+
+from app.db.models.metric_archive import MetricArchiveWatermark
+from app.db.crud.crud_metric_archive import archive_file_paths_stmt
+
+
+async def get_archive_watermark(db: AsyncSession, host_type: str) -> Optional[datetime]:
+    row = await db.get(MetricArchiveWatermark, host_type)
+    return row.archived_until if row else None
+
+async def get_archive_file_paths(db: AsyncSession, host_type: str, start_time: datetime, end_time: datetime) -> List[str]:
+    return (await db.scalars(archive_file_paths_stmt(host_type, start_time, end_time))).all()
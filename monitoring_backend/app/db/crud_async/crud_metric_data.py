@@ -0,0 +1,83 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Dict, Tuple, Iterable
+import uuid
+from datetime import datetime, timezone
+
+from app.db.models.metric_latest import MetricLatest
+from app.schemas.metric_data import MetricDataCreate
+from app.db.crud.crud_metric_data import (
+    build_metric_rows, text_values_of, split_metric_rows, numeric_samples_insert_stmt, text_samples_insert_stmt,
+    latest_metrics_upsert_stmt,
+    metric_data_for_host_stmt, chunk_range_start, merge_chunk_points,
+    latest_metrics_for_host_stmt, latest_metrics_for_keys_stmt
+)
+from app.db.crud.crud_metric_chunk import metric_chunks_for_host_stmt
+from app.db.crud_async.crud_host import update_hosts_last_metric_at
+from app.db.crud_async.crud_metric_key import get_or_create_metric_key_ids
+from app.db.crud_async.crud_metric_text import get_or_create_text_value_ids
+from app.cache.metric_key_cache import metric_key_cache
+
+
+async def create_multiple_metric_data(
+    db: AsyncSession, metrics_in: List[MetricDataCreate], touch_hosts: bool = True
+) -> int:
+    """Асинхронний варіант crud.create_multiple_metric_data: INSERT-и вимірів, upsert metric_latest (і hosts) в одній транзакції."""
+    if not metrics_in:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    rows = build_metric_rows(metrics_in, now)
+    try:
+        key_ids, missing = metric_key_cache.get_many({row["metric_key"] for row in rows})
+        registered = await get_or_create_metric_key_ids(db, missing) if missing else {}
+        key_ids.update(registered)
+        text_ids = await get_or_create_text_value_ids(db, text_values_of(rows))
+        numeric_rows, text_rows = split_metric_rows(rows, key_ids, text_ids)
+        if numeric_rows:
+            await db.execute(numeric_samples_insert_stmt(), numeric_rows)
+        if text_rows:
+            await db.execute(text_samples_insert_stmt(), text_rows)
+        upsert_stmt = latest_metrics_upsert_stmt(rows)
+        if upsert_stmt is not None:
+            await db.execute(upsert_stmt)
+        if touch_hosts:
+            await update_hosts_last_metric_at(db, host_ids={row["host_id"] for row in rows}, seen_at=now, commit=False)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    metric_key_cache.update(registered)
+
+    return len(rows)
+
+async def get_metric_data_for_host(
+    db: AsyncSession,
+    host_id: uuid.UUID,
+    metric_key: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 1000
+) -> List:
+    raw_rows = (await db.execute(
+        metric_data_for_host_stmt(host_id, metric_key, start_time, end_time, 0, skip + limit)
+    )).all()
+    chunk_rows = (await db.execute(metric_chunks_for_host_stmt(
+        host_id, metric_key, chunk_range_start(raw_rows, start_time, skip + limit), end_time
+    ))).all()
+    return merge_chunk_points(host_id, raw_rows, chunk_rows, start_time, end_time, skip, limit)
+
+async def get_latest_metric(db: AsyncSession, host_id: uuid.UUID, metric_key: str) -> Optional[MetricLatest]:
+    return await db.get(MetricLatest, (host_id, metric_key))
+
+async def get_latest_metrics_for_host(db: AsyncSession, host_id: uuid.UUID) -> List[MetricLatest]:
+    return (await db.scalars(latest_metrics_for_host_stmt(host_id))).all()
+
+async def get_latest_metrics_for_keys(
+    db: AsyncSession, keys: Iterable[Tuple[uuid.UUID, str]]
+) -> Dict[Tuple[uuid.UUID, str], MetricLatest]:
+    keys = list(keys)
+    if not keys:
+        return {}
+    rows = (await db.scalars(latest_metrics_for_keys_stmt(keys))).all()
+    return {(row.host_id, row.metric_key): row for row in rows}
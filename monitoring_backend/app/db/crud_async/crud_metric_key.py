@@ -0,0 +1,12 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Iterable
+
+from app.db.crud.crud_metric_key import register_metric_keys_stmt, metric_key_ids_stmt
+
+
+async def get_or_create_metric_key_ids(db: AsyncSession, keys: Iterable[str]) -> Dict[str, int]:
+    keys = sorted(set(keys))
+    if not keys:
+        return {}
+    await db.execute(register_metric_keys_stmt(keys))
+    return {key: key_id for key, key_id in (await db.execute(metric_key_ids_stmt(keys))).all()}
@@ -0,0 +1,25 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import uuid
+from datetime import datetime
+
+from app.db.models.metric_rollup import RollupWatermark
+from app.db.crud.crud_metric_rollup import rollup_points_stmt
+
+
+async def get_rollup_points(
+    db: AsyncSession,
+    host_id: uuid.UUID,
+    metric_key: Optional[str],
+    resolution_seconds: int,
+    start_time: datetime,
+    end_time: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 1000
+) -> List:
+    watermark_row = await db.get(RollupWatermark, resolution_seconds)
+    watermark = watermark_row.watermark if watermark_row else None
+    result = await db.execute(rollup_points_stmt(
+        host_id, metric_key, resolution_seconds, start_time, end_time, skip, limit, watermark
+    ))
+    return result.all()
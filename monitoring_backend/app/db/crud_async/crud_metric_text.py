@@ -0,0 +1,12 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Iterable
+
+from app.db.crud.crud_metric_text import register_text_values_stmt, text_value_ids_stmt, text_value_ids_by_value
+
+
+async def get_or_create_text_value_ids(db: AsyncSession, values: Iterable[str]) -> Dict[str, int]:
+    values = sorted(set(values))
+    if not values:
+        return {}
+    await db.execute(register_text_values_stmt(values))
+    return text_value_ids_by_value(values, (await db.execute(text_value_ids_stmt(values))).all())
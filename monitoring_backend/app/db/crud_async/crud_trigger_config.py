@@ -0,0 +1,26 @@
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Dict, Any
+import uuid
+
+from app.db.models.trigger_config import TriggerConfig
+from app.db.crud.crud_trigger_config import enabled_trigger_configs_for_active_hosts_stmt, enabled_trigger_keys_stmt
+
+
+async def get_enabled_trigger_configs_for_active_hosts(
+    db: AsyncSession, trigger_ids: Optional[List[uuid.UUID]] = None
+) -> List[TriggerConfig]:
+    return (await db.scalars(enabled_trigger_configs_for_active_hosts_stmt(trigger_ids))).all()
+
+async def get_enabled_trigger_keys(db: AsyncSession) -> List[tuple]:
+    return (await db.execute(enabled_trigger_keys_stmt())).all()
+
+async def bulk_update_trigger_statuses(db: AsyncSession, updates: List[Dict[str, Any]]) -> None:
+    if not updates:
+        return
+    try:
+        await db.execute(update(TriggerConfig), updates)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
@@ -1,4 +1,7 @@
-from sqlalchemy import create_engine
+from typing import Optional
+
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
@@ -6,9 +9,46 @@ engine = create_engine(settings.DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Асинхронний варіант (asyncpg) для гарячих шляхів: прийом метрик, запити метрик, подієва оцінка тригерів,
+# запис результатів SNMP. Двигун створюється в init_async_engine() на старті процесу (lifespan / SNMP-воркер),
+# бо підключення asyncpg прив'язані до event loop-а, на якому створені.
+async_engine: Optional[AsyncEngine] = None
+
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+
+def _async_database_url() -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    url = make_url(settings.DATABASE_URL)
+    if url.drivername in ("postgresql", "postgresql+psycopg2"):
+        url = url.set(drivername="postgresql+asyncpg")
+    return url.render_as_string(hide_password=False)
+
+
+def init_async_engine() -> AsyncEngine:
+    global async_engine
+    if async_engine is None:
+        async_engine = create_async_engine(
+            _async_database_url(),
+            pool_size=settings.ASYNC_DB_POOL_SIZE,
+            max_overflow=settings.ASYNC_DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+        )
+        AsyncSessionLocal.configure(bind=async_engine)
+    return async_engine
+
+
+async def dispose_async_engine() -> None:
+    global async_engine
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = None
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -7,5 +7,11 @@ from .enums import (
 )
 from .user import User
 from .host import Host
+from .metric_key import MetricKey
 from .metric_data import MetricData
+from .metric_text import MetricTextValue, MetricTextSample
+from .metric_chunk import MetricChunk
+from .metric_archive import MetricArchiveFile, MetricArchiveWatermark
+from .metric_latest import MetricLatest
+from .metric_rollup import MetricRollup, RollupWatermark
 from .trigger_config import TriggerConfig
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, func, ForeignKey, Text
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, func, ForeignKey, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -18,6 +18,8 @@ class Host(Base):
     snmp_community = Column(String(255), nullable=True)
     snmp_port = Column(Integer, nullable=True, default=161)
     snmp_version = Column(String(10), nullable=True, default="2c")
+    snmp_poll_interval_seconds = Column(Integer, nullable=True)  # None - SNMP_DEFAULT_POLL_INTERVAL_SECONDS
+    agent_timeout_seconds = Column(Integer, nullable=True)  # None - AGENT_TIMEOUT_SECONDS
 
     availability_status = Column(SAEnum(HostAvailabilityStatusEnum, name="host_availability_status_enum_type", create_type=True), nullable=False, default=HostAvailabilityStatusEnum.unknown)
     last_metric_at = Column(DateTime(timezone=True), nullable=True)
@@ -27,5 +29,12 @@ class Host(Base):
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
 
-    metrics = relationship("MetricData", back_populates="host", cascade="all, delete-orphan")
-    trigger_configs = relationship("TriggerConfig", back_populates="host", cascade="all, delete-orphan")
\ No newline at end of file
+    metrics = relationship("MetricData", back_populates="host", cascade="all, delete-orphan", passive_deletes=True)
+    text_metrics = relationship("MetricTextSample", back_populates="host", cascade="all, delete-orphan", passive_deletes=True)
+    latest_metrics = relationship("MetricLatest", back_populates="host", cascade="all, delete-orphan", passive_deletes=True)
+    rollups = relationship("MetricRollup", back_populates="host", cascade="all, delete-orphan", passive_deletes=True)
+    trigger_configs = relationship("TriggerConfig", back_populates="host", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_hosts_type_status", "host_type", "availability_status"),
+    )
\ No newline at end of file
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, Date, DateTime, Float, BigInteger, func
+
+from app.db.base_class import Base
+
+class MetricArchiveFile(Base):
+    """Каталог Parquet-архіву: один файл на добу (UTC) і тип хоста, зі статистикою для вибору файлів без їх читання."""
+    __tablename__ = "metric_archive_files"
+
+    host_type = Column(String(50), primary_key=True)
+    day = Column(Date, primary_key=True)
+    path = Column(String(1024), nullable=False)
+    row_count = Column(BigInteger, nullable=False)
+    min_timestamp = Column(DateTime(timezone=True), nullable=False)
+    max_timestamp = Column(DateTime(timezone=True), nullable=False)
+    min_value = Column(Float, nullable=True)  # статистика числових значень (None, якщо в файлі лише текст)
+    max_value = Column(Float, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+class MetricArchiveWatermark(Base):
+    """До якого моменту (не включно) дані хостів цього типу вже вивантажені в архів."""
+    __tablename__ = "metric_archive_watermarks"
+
+    host_type = Column(String(50), primary_key=True)
+    archived_until = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, LargeBinary
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base_class import Base
+
+class MetricChunk(Base):
+    """
+    Холодне зберігання: числові виміри однієї серії за закрите вікно (партицію metric_data),
+    стиснені кодеком app.db.chunk_codec (delta-of-delta для часу, XOR для значень).
+    """
+    __tablename__ = "metric_chunks"
+
+    host_id = Column(UUID(as_uuid=True), ForeignKey("hosts.id", ondelete="CASCADE"), primary_key=True)
+    metric_key_id = Column(Integer, ForeignKey("metric_keys.id"), primary_key=True)
+    start_time = Column(DateTime(timezone=True), primary_key=True)  # перший вимір у чанку
+    end_time = Column(DateTime(timezone=True), nullable=False)  # останній вимір у чанку
+    sample_count = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
@@ -1,18 +1,32 @@
-from sqlalchemy import Column, String, DateTime, Float, func, ForeignKey, Text
+from sqlalchemy import Column, Integer, DateTime, Float, func, ForeignKey, PrimaryKeyConstraint, select
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
-import uuid
+from sqlalchemy.orm import relationship, column_property
 
 from app.db.base_class import Base
+from app.db.models.metric_key import MetricKey
 
 class MetricData(Base):
+    """Числові виміри (переважна більшість) - вузький рядок без сурогатного ключа; текстові - у MetricTextSample."""
     __tablename__ = "metric_data"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    host_id = Column(UUID(as_uuid=True), ForeignKey("hosts.id"), nullable=False, index=True)
-    metric_key = Column(String(255), nullable=False, index=True)
-    value_numeric = Column(Float, nullable=True)
-    value_text = Column(Text, nullable=True)
+    # Таблиця партиціонована за timestamp (RANGE), ключ партиціювання входить у первинний ключ
+    host_id = Column(UUID(as_uuid=True), ForeignKey("hosts.id", ondelete="CASCADE"), nullable=False)
+    metric_key_id = Column(Integer, ForeignKey("metric_keys.id"), nullable=False)
     timestamp = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+    value_numeric = Column(Float, nullable=False)
 
-    host = relationship("Host", back_populates="metrics")
\ No newline at end of file
+    # Рядковий ключ для читання (API, схеми) - підзапит до словника metric_keys; лише для читання
+    metric_key = column_property(
+        select(MetricKey.key).where(MetricKey.id == metric_key_id).correlate_except(MetricKey).scalar_subquery()
+    )
+
+    host = relationship("Host", back_populates="metrics")
+
+    __table_args__ = (
+        # Первинний ключ водночас є індексом усіх читань за (host_id, metric_key_id) з сортуванням за часом
+        # (зворотний прохід індексу); value_numeric в INCLUDE дає index-only scan для агрегації хвоста rollup-ів
+        PrimaryKeyConstraint(
+            "host_id", "metric_key_id", "timestamp", name="metric_data_pkey",
+            postgresql_include=["value_numeric"]
+        ),
+    )
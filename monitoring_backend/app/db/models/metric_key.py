@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, DateTime, func
+
+from app.db.base_class import Base
+
+class MetricKey(Base):
+    """Словник ключів метрик: metric_data зберігає лише цілий id замість рядка ключа."""
+    __tablename__ = "metric_keys"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    key = Column(String(255), nullable=False, unique=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, DateTime, Float, ForeignKey, Text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+
+from app.db.base_class import Base
+
+class MetricLatest(Base):
+    """Останнє значення кожної метрики хоста (одна строка на host_id + metric_key), оновлюється при записі метрик."""
+    __tablename__ = "metric_latest"
+
+    host_id = Column(UUID(as_uuid=True), ForeignKey("hosts.id", ondelete="CASCADE"), primary_key=True)
+    metric_key = Column(String(255), primary_key=True)
+    value_numeric = Column(Float, nullable=True)
+    value_text = Column(Text, nullable=True)
+    timestamp = Column(DateTime(timezone=True), nullable=False)
+
+    host = relationship("Host", back_populates="latest_metrics")
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, String, DateTime, Float, Integer, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+
+from app.db.base_class import Base
+
+class MetricRollup(Base):
+    """Агрегат числових значень метрики за інтервал (bucket) певної роздільності: 60, 300 або 3600 секунд."""
+    __tablename__ = "metric_rollups"
+
+    host_id = Column(UUID(as_uuid=True), ForeignKey("hosts.id", ondelete="CASCADE"), primary_key=True)
+    metric_key = Column(String(255), primary_key=True)
+    resolution_seconds = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+
+    value_min = Column(Float, nullable=False)
+    value_max = Column(Float, nullable=False)
+    value_avg = Column(Float, nullable=False)
+    sample_count = Column(Integer, nullable=False)
+    value_last = Column(Float, nullable=False)
+    last_timestamp = Column(DateTime(timezone=True), nullable=False)
+
+    host = relationship("Host", back_populates="rollups")
+
+class RollupWatermark(Base):
+    """До якого моменту (не включно) дані вже агреговані для кожної роздільності."""
+    __tablename__ = "rollup_watermarks"
+
+    resolution_seconds = Column(Integer, primary_key=True, autoincrement=False)
+    watermark = Column(DateTime(timezone=True), nullable=False)
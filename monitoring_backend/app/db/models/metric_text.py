@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, select
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship, column_property
+
+from app.db.base_class import Base
+from app.db.models.metric_key import MetricKey
+
+class MetricTextValue(Base):
+    """Словник текстових значень (стан інтерфейсу, опис системи тощо) - кожен рядок зберігається один раз."""
+    __tablename__ = "metric_text_values"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # md5 значення: унікальність за хешем, бо довгий текст не влазить в індекс B-tree
+    value_hash = Column(String(32), nullable=False, unique=True)
+    value = Column(Text, nullable=False)
+
+class MetricTextSample(Base):
+    """Текстовий вимір метрики: посилання на значення у словнику metric_text_values."""
+    __tablename__ = "metric_text_samples"
+
+    host_id = Column(UUID(as_uuid=True), ForeignKey("hosts.id", ondelete="CASCADE"), primary_key=True)
+    metric_key_id = Column(Integer, ForeignKey("metric_keys.id"), primary_key=True)
+    timestamp = Column(DateTime(timezone=True), primary_key=True, index=True)
+    text_value_id = Column(Integer, ForeignKey("metric_text_values.id"), nullable=False)
+
+    metric_key = column_property(
+        select(MetricKey.key).where(MetricKey.id == metric_key_id).correlate_except(MetricKey).scalar_subquery()
+    )
+    value_text = column_property(
+        select(MetricTextValue.value).where(MetricTextValue.id == text_value_id)
+        .correlate_except(MetricTextValue).scalar_subquery()
+    )
+
+    host = relationship("Host", back_populates="text_metrics")
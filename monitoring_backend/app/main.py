@@ -5,15 +5,38 @@ from contextlib import asynccontextmanager
 from app.api.api_v1.endpoints.api import api_router_v1
 from app.core.config import settings
 from app.background_tasks.scheduler import start_scheduler, shutdown_scheduler
+from app.background_tasks.snmp_worker_pool import snmp_worker_pool
+from app.background_tasks.jobs.heartbeat_flush_job import flush_agent_heartbeats_job
+from app.cache.snmp_session_cache import snmp_session_cache
+from app.db.database import SessionLocal, init_async_engine, dispose_async_engine
+from app.services.ingest_queue import ingest_queue
+from app.services.snmp_trap_service import snmp_trap_receiver
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Application startup...")
+    init_async_engine()
+    if settings.AGENT_INGEST_MODE == "queued":
+        ingest_queue.start(SessionLocal)
+    if settings.SNMP_POLLER_MODE == "process":
+        snmp_worker_pool.start()
+    if settings.SNMP_TRAP_ENABLED:
+        snmp_trap_receiver.start(SessionLocal)
     start_scheduler()
     yield
     print("Application shutdown...")
     shutdown_scheduler()
+    if settings.SNMP_POLLER_MODE == "process":
+        await snmp_worker_pool.stop()
+    if settings.SNMP_TRAP_ENABLED:
+        await snmp_trap_receiver.stop(SessionLocal)
+    if settings.AGENT_INGEST_MODE == "queued":
+        await ingest_queue.stop(SessionLocal)
+    # Удари агентів, які ще не встигли потрапити в hosts
+    flush_agent_heartbeats_job(SessionLocal)
+    snmp_session_cache.close()
+    await dispose_async_engine()
 
 
 app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
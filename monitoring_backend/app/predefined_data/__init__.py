@@ -1,2 +1,2 @@
-from .metric_definitions import METRIC_DEFINITIONS_BY_HOST_TYPE
+from .metric_definitions import METRIC_DEFINITIONS_BY_HOST_TYPE, RETENTION_DAYS_BY_HOST_TYPE, INTERFACE_METRICS_BY_HOST_TYPE
 from .trigger_templates import TRIGGER_TEMPLATES, TRIGGER_TEMPLATES_BY_KEY
\ No newline at end of file
@@ -24,24 +24,30 @@ COMMON_AGENT_METRICS = [
         "key": "system.uptime_seconds",
         "name": "Час роботи системи",
         "unit": "секунд",
-        "data_type": "numeric"
+        "data_type": "numeric",
+        "retention_days": 7  # Історія uptime потрібна лише для виявлення перезавантажень
     },
 ]
 
+# "poll_interval_seconds" - мінімальний інтервал опитування OID-а; фактичний інтервал -
+# більший з нього та інтервалу хоста (Host.snmp_poll_interval_seconds)
 MIKROTIK_SNMP_METRICS = [
     {
         "key": "mikrotik.system.uptime",
         "name": "Час роботи MikroTik",
         "unit": "seconds",
         "snmp_oid": ".1.3.6.1.2.1.1.3.0",
-        "data_type": "numeric_timeticks"
+        "data_type": "numeric_timeticks",
+        "retention_days": 7,
+        "poll_interval_seconds": 60
     },
     {
         "key": "mikrotik.system.memory.total",
         "name": "Загальна пам'ять MikroTik",
         "unit": "bytes",
         "snmp_oid": ".1.3.6.1.2.1.25.2.3.1.5.65536",  # Підтверджено
-        "data_type": "numeric"
+        "data_type": "numeric",
+        "poll_interval_seconds": 300  # Змінюється лише при заміні заліза
     },
     {
         "key": "mikrotik.system.memory.used",
@@ -66,55 +72,58 @@ MIKROTIK_SNMP_METRICS = [
         "data_type": "numeric"
     },
     # --- Метрики для інтерфейсів ---
-    # ether1 (ifIndex=1)
-    {
-        "key": "mikrotik.interface.ether1.in.octets",
-        "name": "MikroTik ether1 - Вхідні октети",
-        "unit": "bytes",
-        "snmp_oid": ".1.3.6.1.2.1.31.1.1.1.6.2",
-        "data_type": "numeric_counter"
-    },
+    # Інтерфейси виявляються автоматично обходом ifTable/ifXTable (GETBULK), метрики кожного
+    # інтерфейсу будуються з шаблонів MIKROTIK_SNMP_INTERFACE_METRICS нижче
     {
-        "key": "mikrotik.interface.ether1.out.octets",
-        "name": "MikroTik ether1 - Вихідні октети",
-        "unit": "bytes",
-        "snmp_oid": ".1.3.6.1.2.1.31.1.1.1.10.2",
-        "data_type": "numeric_counter"
-    },
-    # НОВА МЕТРИКА: Статус інтерфейсу ether1
-    {
-        "key": "mikrotik.interface.ether1.oper_status",
-        "name": "MikroTik ether1 - Операційний статус",
-        "unit": "",  # Це перелічуваний тип (enum)
-        "snmp_oid": ".1.3.6.1.2.1.2.2.1.8.2",  # ifOperStatus
-        "data_type": "numeric"  # Значення: 1=up, 2=down, 3=testing, etc.
+        "key": "mikrotik.interface.*",
+        "name": "Інтерфейси MikroTik",
+        "unit": "",
+        "snmp_oid": None,
+        "snmp_table": "interfaces",
+        "data_type": "interface_table"
     },
-    # ether2 (ifIndex=2)
+]
+
+# Метрики кожного виявленого інтерфейсу; {if_name} - ifName (напр. ether1), тож ключі
+# oper_status збігаються з тими, на які посилаються шаблони тригерів
+MIKROTIK_SNMP_INTERFACE_METRICS = [
     {
-        "key": "mikrotik.interface.ether2.in.octets",
-        "name": "MikroTik ether2 - Вхідні октети (лічильник)",
-        "unit": "bytes",
-        "snmp_oid": ".1.3.6.1.2.1.31.1.1.1.6.3",  # <--- Індекс .2
-        "data_type": "numeric_counter"
+        "key_template": "mikrotik.interface.{if_name}.in.bps",
+        "name_template": "MikroTik {if_name} - Вхідний трафік",
+        "unit": "bit/s",
+        "snmp_column_oid": ".1.3.6.1.2.1.31.1.1.1.6",  # ifHCInOctets (Counter64)
+        "data_type": "counter_rate",
+        "multiplier": 8  # октети -> біти
     },
     {
-        "key": "mikrotik.interface.ether2.out.octets",
-        "name": "MikroTik ether2 - Вихідні октети (лічильник)",
-        "unit": "bytes",
-        "snmp_oid": ".1.3.6.1.2.1.31.1.1.1.10.3",  # <--- Індекс .2
-        "data_type": "numeric_counter"
+        "key_template": "mikrotik.interface.{if_name}.out.bps",
+        "name_template": "MikroTik {if_name} - Вихідний трафік",
+        "unit": "bit/s",
+        "snmp_column_oid": ".1.3.6.1.2.1.31.1.1.1.10",  # ifHCOutOctets (Counter64)
+        "data_type": "counter_rate",
+        "multiplier": 8
     },
     {
-        "key": "mikrotik.interface.ether2.oper_status",
-        "name": "MikroTik ether2 - Операційний статус",
+        "key_template": "mikrotik.interface.{if_name}.oper_status",
+        "name_template": "MikroTik {if_name} - Операційний статус",
         "unit": "",
-        "snmp_oid": ".1.3.6.1.2.1.2.2.1.8.3",  # <--- Індекс .2
+        "snmp_column_oid": ".1.3.6.1.2.1.2.2.1.8",  # ifOperStatus: 1=up, 2=down, 3=testing, etc.
         "data_type": "numeric"
     },
 ]
 
+INTERFACE_METRICS_BY_HOST_TYPE = {
+    "mikrotik_snmp": MIKROTIK_SNMP_INTERFACE_METRICS,
+}
+
 METRIC_DEFINITIONS_BY_HOST_TYPE = {
     "windows_agent": COMMON_AGENT_METRICS,
     "ubuntu_agent": COMMON_AGENT_METRICS,
     "mikrotik_snmp": MIKROTIK_SNMP_METRICS,
 }
+
+# Скільки днів зберігати сирі дані metric_data для типу хоста (перекриває METRIC_RETENTION_DAYS).
+# Для окремої метрики термін задається полем "retention_days" у її визначенні вище.
+RETENTION_DAYS_BY_HOST_TYPE = {
+    "mikrotik_snmp": 14,
+}
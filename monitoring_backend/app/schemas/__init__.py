@@ -1,6 +1,7 @@
 from .user import UserCreate, UserRead, UserUpdate, UserBase
 from .host import HostCreate, HostRead, HostUpdate, HostBase, HostApproveData
-from .metric_data import MetricDataCreate, MetricDataRead, MetricDataBase
+from .metric_data import MetricDataCreate, MetricDataRead, MetricDataBase, MetricLatestRead, \
+    MetricPointRead
 from .trigger_config import TriggerConfigCreate, TriggerConfigRead, TriggerConfigUpdate, TriggerConfigBase, \
     TriggerConfigCreateForHost
 from .agent import AgentDataPayload, AgentMetricItem
@@ -12,6 +12,8 @@ class HostBase(BaseModel):
     snmp_community: Optional[str] = None
     snmp_port: Optional[int] = 161
     snmp_version: Optional[str] = "2c"
+    snmp_poll_interval_seconds: Optional[int] = None
+    agent_timeout_seconds: Optional[int] = None
     is_monitored: Optional[bool] = True
     notes: Optional[str] = None
 
@@ -26,6 +28,8 @@ class HostUpdate(BaseModel):
     snmp_community: Optional[str] = None
     snmp_port: Optional[int] = None
     snmp_version: Optional[str] = None
+    snmp_poll_interval_seconds: Optional[int] = None
+    agent_timeout_seconds: Optional[int] = None
     is_monitored: Optional[bool] = None
     notes: Optional[str] = None
 
@@ -12,9 +12,30 @@ class MetricDataCreate(MetricDataBase):
     host_id: uuid.UUID
     timestamp: Optional[datetime] = None
 
+class MetricPointRead(MetricDataBase):
+    """
+    Точка графіка: або сирий запис metric_data (resolution_seconds = None),
+    або агрегат за bucket (value_numeric - середнє, плюс min/max/кількість вимірів).
+    id залишено для сумісності: сирі виміри зберігаються без сурогатного ключа, тож він завжди None.
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: Optional[uuid.UUID] = None
+    host_id: uuid.UUID
+    timestamp: datetime
+    resolution_seconds: Optional[int] = None
+    value_min: Optional[float] = None
+    value_max: Optional[float] = None
+    sample_count: Optional[int] = None
+
+class MetricLatestRead(MetricDataBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    host_id: uuid.UUID
+    timestamp: datetime
+
 class MetricDataRead(MetricDataBase):
     model_config = ConfigDict(from_attributes=True)
 
-    id: uuid.UUID
     host_id: uuid.UUID
     timestamp: datetime
\ No newline at end of file
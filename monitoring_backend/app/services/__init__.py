@@ -1,3 +1,3 @@
-from .agent_service import process_agent_data, approve_pending_agent
-from .snmp_service import poll_snmp_host
-from .trigger_evaluation_service import evaluate_triggers_for_host
\ No newline at end of file
+from .agent_service import process_agent_data, enqueue_agent_data, approve_pending_agent
+from .snmp_service import poll_snmp_host, collect_snmp_metrics, write_snmp_poll_results
+from .trigger_evaluation_service import evaluate_triggers_for_host, evaluate_all_triggers, evaluate_triggers_for_metric_keys
\ No newline at end of file
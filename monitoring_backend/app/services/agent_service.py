@@ -1,9 +1,11 @@
 # app/services/agent_service.py
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timezone
+import uuid
 
-from app.db import crud
+from app.db import crud, crud_async
 from app.db.models.enums import HostAvailabilityStatusEnum, HostTypeEnum
 from app.schemas.host import HostCreate, HostApproveData
 from app.schemas.metric_data import MetricDataCreate
@@ -11,63 +13,197 @@ from app.schemas.agent import AgentDataPayload  # AgentMetricItem не вико
 # ВИПРАВЛЕННЯ: Імпортуємо правильну схему
 from app.schemas.trigger_config import TriggerConfigCreateForHost  # <--- ЗМІНА ТУТ
 from app.predefined_data import TRIGGER_TEMPLATES
+from app.services import trigger_evaluation_service
+from app.services.ingest_queue import ingest_queue
+from app.cache.heartbeat_tracker import heartbeat_tracker
+from app.cache.agent_identity_cache import agent_identity_cache, AgentIdentity
 
 
-def process_agent_data(
+def _identity_of(host: Optional[crud.crud_host.Host]) -> Optional[AgentIdentity]:
+    if not host:
+        return None
+    return AgentIdentity(host.id, host.availability_status, host.is_monitored)
+
+
+def _load_agent_identity(db: Session, unique_agent_id: str) -> Optional[AgentIdentity]:
+    return _identity_of(crud.crud_host.get_host_by_agent_id(db, unique_agent_id=unique_agent_id))
+
+
+def _register_agent_host(
         db: Session,
         unique_agent_id: str,
         payload: AgentDataPayload,
         client_ip: Optional[str] = None
-) -> Dict[str, Any]:
-    host = crud.crud_host.get_host_by_agent_id(db, unique_agent_id=unique_agent_id)
+) -> crud.crud_host.Host:
+    host_type_str = payload.agent_type or "windows_agent"
+    try:
+        host_type = HostTypeEnum[host_type_str]
+    except KeyError:
+        host_type = HostTypeEnum.windows_agent
 
-    if not host:
-        host_type_str = payload.agent_type or "windows_agent"
-        try:
-            host_type = HostTypeEnum[host_type_str]
-        except KeyError:
-            host_type = HostTypeEnum.windows_agent
-
-            # Намагаємося отримати IP з першого запиту агента, якщо він є
-        # Це потребує, щоб агент надсилав свій IP або щоб ми його визначали з запиту (складніше)
-        # Поки що залишимо IP опціональним при створенні
-        host_create_schema = HostCreate(
-            name=f"agent-{unique_agent_id[:8]}",
-            unique_agent_id=unique_agent_id,
-            host_type=host_type,
-            ip_address=client_ip
-        )
-        host = crud.crud_host.create_host(db, host_in=host_create_schema)
-        return {"status": "registered_pending_approval", "host_id": str(host.id), "name": host.name}
+    # Намагаємося отримати IP з першого запиту агента, якщо він є
+    # Це потребує, щоб агент надсилав свій IP або щоб ми його визначали з запиту (складніше)
+    # Поки що залишимо IP опціональним при створенні
+    host_create_schema = HostCreate(
+        name=f"agent-{unique_agent_id[:8]}",
+        unique_agent_id=unique_agent_id,
+        host_type=host_type,
+        ip_address=client_ip
+    )
+    return crud.crud_host.create_host(db, host_in=host_create_schema)
 
+
+def _check_agent_identity(host: AgentIdentity) -> Optional[Dict[str, Any]]:
+    """Відповідь агенту, якщо метрики від цього хоста приймати не можна."""
     if host.availability_status == HostAvailabilityStatusEnum.pending_approval:
-        return {"status": "host_pending_approval", "host_id": str(host.id),
+        return {"status": "host_pending_approval", "host_id": str(host.host_id),
                 "message": "Host is awaiting admin approval."}
 
     if not host.is_monitored:
-        return {"status": "host_not_monitored", "host_id": str(host.id), "message": "Host monitoring is disabled."}
-
-    metrics_to_create: List[MetricDataCreate] = []
-    for item in payload.metrics:
-        metrics_to_create.append(
-            MetricDataCreate(
-                host_id=host.id,
-                metric_key=item.metric_key,
-                value_numeric=item.value_numeric,
-                value_text=item.value_text,
-                timestamp=item.timestamp or datetime.utcnow()
-            )
+        return {"status": "host_not_monitored", "host_id": str(host.host_id),
+                "message": "Host monitoring is disabled."}
+    return None
+
+
+def _resolve_agent_host(
+        db: Session,
+        unique_agent_id: str,
+        payload: AgentDataPayload,
+        client_ip: Optional[str] = None
+) -> Tuple[Optional[AgentIdentity], Optional[Dict[str, Any]]]:
+    """
+    Знаходить хост агента (через agent_identity_cache, без читання hosts для відомих агентів).
+    Повертає (identity, None), якщо метрики можна приймати,
+    або (None, result) з відповіддю для агента (новий / очікує схвалення / не моніториться).
+    """
+    host = agent_identity_cache.get(unique_agent_id, lambda: _load_agent_identity(db, unique_agent_id))
+
+    if not host:
+        host = _register_agent_host(db, unique_agent_id, payload, client_ip)
+        return None, {"status": "registered_pending_approval", "host_id": str(host.id), "name": host.name}
+
+    early_result = _check_agent_identity(host)
+    if early_result:
+        return None, early_result
+    return host, None
+
+
+async def _resolve_agent_host_async(
+        db: AsyncSession,
+        unique_agent_id: str,
+        payload: AgentDataPayload,
+        client_ip: Optional[str] = None
+) -> Tuple[Optional[AgentIdentity], Optional[Dict[str, Any]]]:
+    host = agent_identity_cache.get_cached(unique_agent_id)
+    if host is None:
+        host = _identity_of(await crud_async.crud_host.get_host_by_agent_id(db, unique_agent_id=unique_agent_id))
+        agent_identity_cache.put(unique_agent_id, host)
+
+    if not host:
+        # Реєстрація - рідкісна подія, тож використовується синхронний crud через run_sync
+        # (той самий asyncpg-конект, event loop не блокується)
+        registered = await db.run_sync(_register_agent_host, unique_agent_id, payload, client_ip)
+        return None, {"status": "registered_pending_approval", "host_id": str(registered.id), "name": registered.name}
+
+    early_result = _check_agent_identity(host)
+    if early_result:
+        return None, early_result
+    return host, None
+
+
+def _build_metrics(host_id: uuid.UUID, payload: AgentDataPayload) -> List[MetricDataCreate]:
+    received_at = datetime.now(timezone.utc)
+    return [
+        MetricDataCreate(
+            host_id=host_id,
+            metric_key=item.metric_key,
+            value_numeric=item.value_numeric,
+            value_text=item.value_text,
+            timestamp=item.timestamp or received_at
         )
+        for item in payload.metrics
+    ]
+
+
+def process_agent_data(
+        db: Session,
+        unique_agent_id: str,
+        payload: AgentDataPayload,
+        client_ip: Optional[str] = None
+) -> Dict[str, Any]:
+    host, early_result = _resolve_agent_host(db, unique_agent_id, payload, client_ip)
+    if early_result:
+        return early_result
+
+    metrics_to_create = _build_metrics(host.host_id, payload)
 
     if metrics_to_create:
-        crud.crud_metric_data.create_multiple_metric_data(db, metrics_in=metrics_to_create)
-        if host.availability_status != HostAvailabilityStatusEnum.up:
-            crud.crud_host.update_host_availability(db, host_id=host.id, status=HostAvailabilityStatusEnum.up)
-        # commit відбувається всередині create_multiple_metric_data та update_host_availability (якщо він робить commit)
-        # Або краще один commit тут, якщо CRUD функції його не роблять самі по собі
-        db.commit()
-
-    return {"status": "metrics_processed", "host_id": str(host.id), "metrics_received": len(metrics_to_create)}
+        # Один INSERT для всієї пачки; рядок hosts у запиті не чіпається - last_metric_at
+        # та статус 'up' запише heartbeat job разом з іншими агентами
+        crud.crud_metric_data.create_multiple_metric_data(db, metrics_in=metrics_to_create, touch_hosts=False)
+        trigger_evaluation_service.on_metrics_ingested(db, metrics_to_create)
+    heartbeat_tracker.beat([host.host_id])
+
+    return {"status": "metrics_processed", "host_id": str(host.host_id), "metrics_received": len(metrics_to_create)}
+
+
+def enqueue_agent_data(
+        db: Session,
+        unique_agent_id: str,
+        payload: AgentDataPayload,
+        client_ip: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Варіант process_agent_data для режиму AGENT_INGEST_MODE="queued": метрики не пишуться
+    в запиті, а кладуться в ingest_queue. Якщо черга заповнена - кидає IngestQueueFullError.
+    """
+    host, early_result = _resolve_agent_host(db, unique_agent_id, payload, client_ip)
+    if early_result:
+        return early_result
+
+    metrics_to_queue = _build_metrics(host.host_id, payload)
+    ingest_queue.submit(metrics_to_queue)
+    heartbeat_tracker.beat([host.host_id])
+
+    return {"status": "metrics_queued", "host_id": str(host.host_id), "metrics_received": len(metrics_to_queue)}
+
+
+async def process_agent_data_async(
+        db: AsyncSession,
+        unique_agent_id: str,
+        payload: AgentDataPayload,
+        client_ip: Optional[str] = None
+) -> Dict[str, Any]:
+    """process_agent_data на AsyncSession - для async-ендпоінта прийому (без thread pool-у)."""
+    host, early_result = await _resolve_agent_host_async(db, unique_agent_id, payload, client_ip)
+    if early_result:
+        return early_result
+
+    metrics_to_create = _build_metrics(host.host_id, payload)
+
+    if metrics_to_create:
+        await crud_async.crud_metric_data.create_multiple_metric_data(db, metrics_in=metrics_to_create, touch_hosts=False)
+        await trigger_evaluation_service.on_metrics_ingested_async(db, metrics_to_create)
+    heartbeat_tracker.beat([host.host_id])
+
+    return {"status": "metrics_processed", "host_id": str(host.host_id), "metrics_received": len(metrics_to_create)}
+
+
+async def enqueue_agent_data_async(
+        db: AsyncSession,
+        unique_agent_id: str,
+        payload: AgentDataPayload,
+        client_ip: Optional[str] = None
+) -> Dict[str, Any]:
+    host, early_result = await _resolve_agent_host_async(db, unique_agent_id, payload, client_ip)
+    if early_result:
+        return early_result
+
+    metrics_to_queue = _build_metrics(host.host_id, payload)
+    ingest_queue.submit(metrics_to_queue)
+    heartbeat_tracker.beat([host.host_id])
+
+    return {"status": "metrics_queued", "host_id": str(host.host_id), "metrics_received": len(metrics_to_queue)}
 
 
 def approve_pending_agent(
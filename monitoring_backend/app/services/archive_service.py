@@ -0,0 +1,288 @@
+# app/services/archive_service.py
+import asyncio
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import crud, crud_async
+from app.db.chunk_codec import decode_chunk, to_microseconds
+from app.db.crud.crud_metric_data import MetricPoint
+from app.db.models.enums import HostTypeEnum
+from app.db.models.host import Host
+from app.services.retention_service import get_retention_policies
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # архів - опційна можливість, без pyarrow він просто вимкнений
+    pa = pc = ds = pq = None
+
+
+@dataclass
+class ArchiveReport:
+    files_written: List[str] = field(default_factory=list)
+    rows_archived: int = 0
+
+
+def is_archive_enabled() -> bool:
+    return bool(settings.METRIC_ARCHIVE_DIR) and pa is not None
+
+
+def archive_path(host_type: str, day: date) -> str:
+    return os.path.join(settings.METRIC_ARCHIVE_DIR, host_type, f"{day.isoformat()}.parquet")
+
+
+def _archive_schema() -> "pa.Schema":
+    return pa.schema([
+        ("host_id", pa.string()),
+        ("metric_key", pa.string()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("value_numeric", pa.float64()),
+        ("value_text", pa.string()),
+    ])
+
+
+def _day_start(ts: datetime) -> datetime:
+    return datetime.combine(ts.astimezone(timezone.utc).date(), time.min, tzinfo=timezone.utc)
+
+
+def _host_day_table(db: Session, host_id: uuid.UUID, start_time: datetime, end_time: datetime) -> "pa.Table":
+    """Усі виміри хоста за добу (сирі числові, текстові і з чанків), відсортовані за (metric_key, timestamp)."""
+    keys, timestamps_us, numeric, texts = [], [], [], []
+    for key, timestamp, value in db.execute(crud.crud_metric_archive.numeric_samples_stmt(host_id, start_time, end_time)):
+        keys.append(key)
+        timestamps_us.append(to_microseconds(timestamp))
+        numeric.append(value)
+        texts.append(None)
+    for key, timestamp, value in db.execute(crud.crud_metric_archive.text_samples_stmt(host_id, start_time, end_time)):
+        keys.append(key)
+        timestamps_us.append(to_microseconds(timestamp))
+        numeric.append(None)
+        texts.append(value)
+    tables = [_build_table(host_id, keys, timestamps_us, numeric, texts)]
+
+    start_us, end_us = to_microseconds(start_time), to_microseconds(end_time)
+    for key, data in db.execute(crud.crud_metric_archive.chunks_stmt(host_id, start_time, end_time)):
+        chunk_timestamps, chunk_values = decode_chunk(data)
+        table = _build_table(host_id, [key] * len(chunk_values), chunk_timestamps, chunk_values, [None] * len(chunk_values))
+        # Чанк може виходити за межі доби - зайві точки потраплять у файли сусідніх діб
+        timestamps = table["timestamp"].cast(pa.int64())
+        tables.append(table.filter(pc.and_(pc.greater_equal(timestamps, start_us), pc.less(timestamps, end_us))))
+
+    return pa.concat_tables(tables).sort_by([("metric_key", "ascending"), ("timestamp", "ascending")])
+
+
+def _build_table(host_id: uuid.UUID, keys: List[str], timestamps_us: List[int], numeric: List, texts: List) -> "pa.Table":
+    return pa.Table.from_arrays([
+        pa.array([str(host_id)] * len(keys), pa.string()),
+        pa.array(keys, pa.string()),
+        pa.array(timestamps_us, pa.int64()).cast(pa.timestamp("us", tz="UTC")),
+        pa.array(numeric, pa.float64()),
+        pa.array(texts, pa.string()),
+    ], schema=_archive_schema())
+
+
+def _min_max(column) -> tuple:
+    stats = pc.min_max(column)
+    return stats["min"].as_py(), stats["max"].as_py()
+
+
+def _merge_stat(current, value, pick):
+    if value is None:
+        return current
+    return value if current is None else pick(current, value)
+
+
+def export_day(db: Session, host_type: str, day: date) -> Optional[Dict[str, Any]]:
+    """
+    Вивантажує добу (UTC) усіх хостів типу в один Parquet-файл: row group на хост, тож статистика
+    row group-ів за host_id/timestamp дозволяє читачу пропускати чужі хости без декомпресії.
+    Файл пишеться у тимчасовий і атомарно підміняється. Повертає запис каталогу або None, якщо даних немає.
+    """
+    start_time = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    end_time = start_time + timedelta(days=1)
+    path = archive_path(host_type, day)
+    tmp_path = f"{path}.tmp"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    archive_file = {
+        "host_type": host_type, "day": day, "path": path, "row_count": 0,
+        "min_timestamp": None, "max_timestamp": None, "min_value": None, "max_value": None,
+    }
+    writer = None
+    try:
+        host_ids = db.scalars(select(Host.id).where(Host.host_type == HostTypeEnum(host_type))).all()
+        for host_id in host_ids:
+            table = _host_day_table(db, host_id, start_time, end_time)
+            if table.num_rows == 0:
+                continue
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, _archive_schema(), compression="zstd", write_statistics=True)
+            writer.write_table(table)
+
+            archive_file["row_count"] += table.num_rows
+            min_timestamp, max_timestamp = _min_max(table["timestamp"])
+            min_value, max_value = _min_max(table["value_numeric"])
+            archive_file["min_timestamp"] = _merge_stat(archive_file["min_timestamp"], min_timestamp, min)
+            archive_file["max_timestamp"] = _merge_stat(archive_file["max_timestamp"], max_timestamp, max)
+            archive_file["min_value"] = _merge_stat(archive_file["min_value"], min_value, min)
+            archive_file["max_value"] = _merge_stat(archive_file["max_value"], max_value, max)
+        if writer is not None:
+            writer.close()
+    except Exception:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if writer is None:
+        return None
+    os.replace(tmp_path, path)
+    return archive_file
+
+
+def archive_closed_days(db: Session, now: Optional[datetime] = None) -> ArchiveReport:
+    """
+    Вивантажує в архів доби, що закінчились раніше ніж METRIC_ARCHIVE_AFTER_DAYS тому,
+    починаючи з watermark типу хоста (або з найстарішого онлайн-виміру), не більше
+    METRIC_ARCHIVE_MAX_DAYS_PER_RUN діб за запуск. Кожна доба - окрема транзакція (запис каталогу + watermark).
+    """
+    now = now or datetime.now(timezone.utc)
+    report = ArchiveReport()
+    if not is_archive_enabled():
+        return report
+
+    horizon = _day_start(now - timedelta(days=settings.METRIC_ARCHIVE_AFTER_DAYS))
+    for host_type in HostTypeEnum:
+        watermark = crud.crud_metric_archive.get_archive_watermark(db, host_type.value)
+        if watermark is None:
+            oldest = crud.crud_metric_archive.get_oldest_timestamp_for_host_type(db, host_type.value)
+            if oldest is None:
+                # Даних ще немає - архівувати нічого, нові виміри прийдуть уже після horizon
+                crud.crud_metric_archive.set_archive_watermark(db, host_type.value, horizon)
+                db.commit()
+                continue
+            watermark = _day_start(oldest)
+
+        days_done = 0
+        while watermark < horizon and days_done < settings.METRIC_ARCHIVE_MAX_DAYS_PER_RUN:
+            try:
+                archive_file = export_day(db, host_type.value, watermark.date())
+                if archive_file is not None:
+                    crud.crud_metric_archive.upsert_archive_file(db, archive_file)
+                    report.files_written.append(archive_file["path"])
+                    report.rows_archived += archive_file["row_count"]
+                watermark += timedelta(days=1)
+                crud.crud_metric_archive.set_archive_watermark(db, host_type.value, watermark)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Metric archive: failed to archive {host_type.value} {watermark.date()}: {e}")
+                break
+            days_done += 1
+    return report
+
+
+def online_boundary(host_type: str, archived_until: Optional[datetime], now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Момент, з якого онлайн-дані типу хоста гарантовано повні: старіше нього читається архів.
+    Береться найкоротший термін зберігання серед метрик типу і не пізніше watermark архіву.
+    None - архівних даних для типу немає.
+    """
+    if archived_until is None:
+        return None
+    now = now or datetime.now(timezone.utc)
+    policy = next(policy for policy in get_retention_policies() if policy.host_type == host_type)
+    days = [days for days in [policy.default_days, *policy.metric_days.values()] if days > 0]
+    if not days:
+        return None
+    return min(now - timedelta(days=min(days)), archived_until)
+
+
+def read_archived_points(
+    paths: List[str],
+    host_id: uuid.UUID,
+    metric_key: Optional[str],
+    start_time: datetime,
+    end_time: datetime,
+    limit: int
+) -> List[MetricPoint]:
+    """
+    Найновіші limit вимірів хоста за [start_time, end_time) з Parquet-файлів.
+    Фільтр передається в pyarrow.dataset (відсікання row group-ів за статистикою), top-k і сортування -
+    векторні обчислення над колонками; в Python-об'єкти перетворюються лише повернуті рядки.
+    """
+    if not paths:
+        return []
+    timestamp_type = pa.timestamp("us", tz="UTC")
+    condition = (ds.field("host_id") == str(host_id)) \
+        & (ds.field("timestamp") >= pa.scalar(start_time, timestamp_type)) \
+        & (ds.field("timestamp") < pa.scalar(end_time, timestamp_type))
+    if metric_key:
+        condition = condition & (ds.field("metric_key") == metric_key)
+
+    table = ds.dataset(paths, format="parquet", schema=_archive_schema()).to_table(
+        columns=["metric_key", "value_numeric", "value_text", "timestamp"], filter=condition
+    )
+    if table.num_rows > limit:
+        table = table.take(pc.select_k_unstable(table, k=limit, sort_keys=[("timestamp", "descending")]))
+    table = table.sort_by([("timestamp", "descending")])
+
+    return [
+        MetricPoint(host_id, key, value_numeric, value_text, timestamp)
+        for key, value_numeric, value_text, timestamp in zip(
+            table["metric_key"].to_pylist(), table["value_numeric"].to_pylist(),
+            table["value_text"].to_pylist(), table["timestamp"].to_pylist()
+        )
+    ]
+
+
+async def get_metric_data_with_archive(
+    db: AsyncSession,
+    host: Host,
+    metric_key: Optional[str],
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    skip: int,
+    limit: int
+) -> Optional[List]:
+    """
+    Виміри хоста, коли start_time старіший за онлайн-вікно: новіша частина - з БД, старіша - з архіву.
+    None - запит повністю покривається онлайн-даними (або архів вимкнено).
+    """
+    if start_time is None or not is_archive_enabled():
+        return None
+    start_time = start_time if start_time.tzinfo else start_time.replace(tzinfo=timezone.utc)
+    if end_time and not end_time.tzinfo:
+        end_time = end_time.replace(tzinfo=timezone.utc)
+
+    host_type = host.host_type.value
+    boundary = online_boundary(host_type, await crud_async.crud_metric_archive.get_archive_watermark(db, host_type))
+    if boundary is None or start_time >= boundary:
+        return None
+
+    needed = skip + limit
+    online = []
+    if end_time is None or end_time >= boundary:
+        online = await crud_async.crud_metric_data.get_metric_data_for_host(
+            db, host_id=host.id, metric_key=metric_key, start_time=boundary, end_time=end_time, skip=0, limit=needed
+        )
+    archived = []
+    if len(online) < needed:
+        # end_time в API включний, межа архівного читання - виключна
+        archive_end = min(boundary, end_time + timedelta(microseconds=1)) if end_time else boundary
+        paths = await crud_async.crud_metric_archive.get_archive_file_paths(db, host_type, start_time, archive_end)
+        archived = await asyncio.to_thread(
+            read_archived_points, paths, host.id, metric_key, start_time, archive_end, needed - len(online)
+        )
+    return (list(online) + archived)[skip:needed]
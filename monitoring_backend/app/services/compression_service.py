@@ -0,0 +1,84 @@
+# app/services/compression_service.py
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from typing import List, Optional
+
+from sqlalchemy import bindparam, select, text, DateTime, Float, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import crud
+from app.db.models.host import Host
+from app.services import partition_service
+from app.services.rollup_service import ROLLUP_RESOLUTIONS
+
+
+@dataclass
+class CompressReport:
+    partitions_compressed: List[str] = field(default_factory=list)
+    chunks_written: int = 0
+    samples_packed: int = 0
+    raw_bytes: int = 0  # розмір стиснених партицій разом з індексами
+    chunk_bytes: int = 0
+
+
+def compress_partition(db: Session, partition: partition_service.Partition, report: CompressReport) -> None:
+    """
+    Пакує всі числові виміри партиції в чанки (один на серію host_id + metric_key) і видаляє партицію.
+    Партиція спершу блокується ACCESS EXCLUSIVE до кінця транзакції: запізнілий вимір, що пишеться в неї
+    між читанням і DROP, чекає на блокування замість того, щоб зникнути разом з партицією.
+    Чанки і DROP партиції - в одній транзакції, тож збій не залишає ні дублікатів, ні втрачених даних.
+    Серії читаються по хостах за первинним ключем, щоб не тримати в пам'яті всю партицію.
+    Commit не робить.
+    """
+    db.execute(text(f"LOCK TABLE {partition.name} IN ACCESS EXCLUSIVE MODE"))
+    statement = text(f"""
+        SELECT metric_key_id, timestamp, value_numeric FROM {partition.name}
+        WHERE host_id = :host_id
+        ORDER BY metric_key_id, timestamp
+    """).bindparams(bindparam("host_id", type_=UUID(as_uuid=True)))\
+        .columns(metric_key_id=Integer, timestamp=DateTime(timezone=True), value_numeric=Float)
+    for host_id in db.scalars(select(Host.id)).all():
+        rows = db.execute(statement, {"host_id": host_id}).all()
+        chunk_rows = []
+        for metric_key_id, samples in groupby(rows, key=lambda row: row.metric_key_id):
+            series = [(row.timestamp, row.value_numeric) for row in samples]
+            chunk_rows.append(crud.crud_metric_chunk.build_chunk_row(host_id, metric_key_id, series))
+        crud.crud_metric_chunk.insert_metric_chunks(db, chunk_rows)
+        report.chunks_written += len(chunk_rows)
+        report.samples_packed += len(rows)
+        report.chunk_bytes += sum(len(chunk["data"]) for chunk in chunk_rows)
+    db.execute(text(f"DROP TABLE {partition.name}"))
+    report.partitions_compressed.append(partition.name)
+    report.raw_bytes += partition.size_bytes
+
+
+def compress_cold_partitions(db: Session, now: Optional[datetime] = None) -> CompressReport:
+    """
+    Переводить у холодне зберігання партиції metric_data, що закінчились раніше ніж
+    METRIC_COMPRESS_AFTER_DAYS тому. Партиція стискається лише після того, як її дані потрапили
+    в rollups (watermark 1m), бо агрегація читає тільки сирі дані. Кожна партиція - окрема транзакція.
+    """
+    now = now or datetime.now(timezone.utc)
+    report = CompressReport()
+    if settings.METRIC_COMPRESS_AFTER_DAYS <= 0 or not partition_service.is_partitioning_supported(db):
+        return report
+
+    watermark = crud.crud_metric_rollup.get_watermark(db, ROLLUP_RESOLUTIONS[0])
+    if watermark is None:
+        return report
+    cutoff = min(now - timedelta(days=settings.METRIC_COMPRESS_AFTER_DAYS), watermark)
+
+    for partition in partition_service.list_partitions(db):
+        # DEFAULT-партиція (end = None) не стискається - в ній рядки з будь-яким часом
+        if partition.end is None or partition.end > cutoff:
+            continue
+        try:
+            compress_partition(db, partition, report)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Metric compression: failed to compress partition {partition.name}: {e}")
+    return report
@@ -0,0 +1,193 @@
+# app/services/ingest_queue.py
+import asyncio
+import threading
+from collections import deque
+from itertools import groupby
+from typing import Callable, Deque, List, Optional, Tuple
+
+from sqlalchemy.exc import InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import crud
+from app.schemas.metric_data import MetricDataCreate
+from app.services import trigger_evaluation_service
+
+
+class IngestQueueFullError(Exception):
+    """Черга прийому метрик заповнена - клієнт має повторити запит пізніше."""
+
+
+class MetricIngestQueue:
+    """
+    Обмежена in-process черга метрик від агентів з фоновим пакетним записом.
+
+    Ендпоінт лише кладе провалідовані метрики в буфер (submit), а writer-задача
+    на event loop-і скидає буфер у БД кожні flush_interval_ms мілісекунд або
+    одразу, як тільки назбиралось flush_max_rows рядків. Усі метрики всіх агентів,
+    що накопичились, пишуться одним INSERT в одній транзакції.
+
+    Пачка, що не записалась через тимчасову помилку БД, повторюється (не більше max_retries разів).
+    Якщо ж пачку відхиляють самі дані (наприклад, FK на вже видалений хост), вона ділиться по хостах
+    і навпіл, і відкидаються лише рядки, які не записуються, - решта черги продовжує зливатись.
+    """
+
+    def __init__(self, max_rows: int, flush_interval_ms: int, flush_max_rows: int, max_retries: int = 20):
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.flush_max_rows = flush_max_rows
+        self.max_retries = max_retries
+
+        self._buffer: Deque[MetricDataCreate] = deque()
+        # Пачки, що чекають на повтор після тимчасової помилки: (рядки, кількість невдалих спроб)
+        self._retries: Deque[Tuple[List[MetricDataCreate], int]] = deque()
+        self._lock = threading.Lock()  # submit() викликається з thread pool-у FastAPI
+        self._flush_lock = threading.Lock()  # гарантує, що одночасно йде лише один flush
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._queued_rows()
+
+    def _queued_rows(self) -> int:
+        return len(self._buffer) + sum(len(rows) for rows, _ in self._retries)
+
+    def submit(self, metrics: List[MetricDataCreate]) -> int:
+        """
+        Додає метрики в чергу. Якщо місця не вистачає - кидає IngestQueueFullError
+        (backpressure), пачка при цьому не приймається частково.
+        """
+        if not metrics:
+            return 0
+        with self._lock:
+            if self._stopping:
+                raise IngestQueueFullError("Ingest queue is shutting down")
+            queued = self._queued_rows()
+            if queued + len(metrics) > self.max_rows:
+                raise IngestQueueFullError(
+                    f"Ingest queue is full ({queued}/{self.max_rows} rows)"
+                )
+            self._buffer.extend(metrics)
+            flush_now = len(self._buffer) >= self.flush_max_rows
+
+        if flush_now and self._loop and self._wakeup:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return len(metrics)
+
+    def flush(self, db_session_factory: Callable[[], Session]) -> int:
+        """
+        Синхронно скидає чергу в БД: спершу пачки, що чекають на повтор, потім увесь накопичений буфер
+        однією транзакцією. Повертає кількість записаних рядків.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batches = list(self._retries)
+                self._retries.clear()
+                if self._buffer:
+                    batches.append((list(self._buffer), 0))
+                    self._buffer.clear()
+            return sum(self._write(db_session_factory, rows, attempts) for rows, attempts in batches)
+
+    def _write(self, db_session_factory: Callable[[], Session], batch: List[MetricDataCreate], attempts: int) -> int:
+        db: Session = db_session_factory()
+        try:
+            # last_metric_at агентів веде heartbeat_tracker (удар фіксується ще в submit-запиті)
+            written = crud.crud_metric_data.create_multiple_metric_data(db, metrics_in=batch, touch_hosts=False)
+        except (OperationalError, InterfaceError, PoolTimeoutError) as e:
+            db.close()
+            self._requeue(batch, attempts + 1, e)
+            return 0
+        except Exception as e:
+            try:
+                return self._write_valid_rows(db, db_session_factory, batch, attempts, e)
+            finally:
+                db.close()
+        try:
+            trigger_evaluation_service.on_metrics_ingested(db, batch)
+        finally:
+            db.close()
+        return written
+
+    def _write_valid_rows(
+        self, db: Session, db_session_factory: Callable[[], Session], batch: List[MetricDataCreate],
+        attempts: int, error: Exception
+    ) -> int:
+        """
+        Пачку відхилили дані: ділимо її по хостах, а пачку одного хоста - навпіл, доки не залишаться
+        окремі рядки, що не записуються; їх відкидаємо з записом у лог.
+        """
+        batch = sorted(batch, key=lambda metric: str(metric.host_id))
+        host_batches = [list(rows) for _, rows in groupby(batch, key=lambda metric: metric.host_id)]
+        if len(host_batches) > 1:
+            return sum(self._write(db_session_factory, rows, attempts) for rows in host_batches)
+
+        host_id = batch[0].host_id
+        if crud.crud_host.get_host(db, host_id=host_id) is None:
+            print(f"Ingest queue: dropped {len(batch)} metrics of deleted host {host_id}")
+            return 0
+        if len(batch) == 1:
+            print(f"Ingest queue: dropped metric {batch[0].metric_key} of host {host_id}: {error}")
+            return 0
+        middle = len(batch) // 2
+        return self._write(db_session_factory, batch[:middle], attempts) \
+            + self._write(db_session_factory, batch[middle:], attempts)
+
+    def _requeue(self, batch: List[MetricDataCreate], attempts: int, error: Exception) -> None:
+        """Повертає пачку на повтор після тимчасової помилки БД (наскільки дозволяє місце в черзі)."""
+        if attempts > self.max_retries:
+            print(f"Ingest queue: dropped {len(batch)} metrics after {attempts} failed attempts: {error}")
+            return
+        print(f"Ingest queue: failed to flush {len(batch)} metrics (attempt {attempts}), will retry: {error}")
+        with self._lock:
+            free_rows = max(self.max_rows - self._queued_rows(), 0)
+            requeued = batch[:free_rows]
+            if requeued:
+                self._retries.append((requeued, attempts))
+        if len(requeued) < len(batch):
+            print(f"Ingest queue: dropped {len(batch) - len(requeued)} metrics, queue is full")
+
+    async def _run_writer(self, db_session_factory: Callable[[], Session]) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await asyncio.to_thread(self.flush, db_session_factory)
+            except Exception as e:
+                print(f"Ingest queue writer error: {e}")
+
+    def start(self, db_session_factory: Callable[[], Session]) -> None:
+        """Запускає writer-задачу на поточному event loop-і (викликається з lifespan)."""
+        if self._writer_task and not self._writer_task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._writer_task = self._loop.create_task(self._run_writer(db_session_factory))
+        print("Metric ingest queue writer started.")
+
+    async def stop(self, db_session_factory: Callable[[], Session]) -> None:
+        """Зупиняє writer і дописує в БД усе, що залишилось у черзі (drain-on-shutdown)."""
+        with self._lock:
+            self._stopping = True
+        if self._wakeup:
+            self._wakeup.set()
+        if self._writer_task:
+            await self._writer_task
+            self._writer_task = None
+        written = await asyncio.to_thread(self.flush, db_session_factory)
+        print(f"Metric ingest queue drained on shutdown ({written} metrics written).")
+
+
+ingest_queue = MetricIngestQueue(
+    max_rows=settings.INGEST_QUEUE_MAX_ROWS,
+    flush_interval_ms=settings.INGEST_FLUSH_INTERVAL_MS,
+    flush_max_rows=settings.INGEST_FLUSH_MAX_ROWS,
+    max_retries=settings.INGEST_FLUSH_MAX_RETRIES,
+)
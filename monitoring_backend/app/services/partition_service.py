@@ -0,0 +1,142 @@
+# app/services/partition_service.py
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+METRIC_DATA_TABLE = "metric_data"
+DEFAULT_PARTITION_SUFFIX = "default"
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+@dataclass
+class Partition:
+    name: str
+    start: Optional[datetime]  # None для DEFAULT-партиції
+    end: Optional[datetime]
+    size_bytes: int = 0
+
+
+def is_partitioning_supported(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def partition_start(ts: datetime, span_days: Optional[int] = None) -> datetime:
+    """Початок інтервалу партиції (вирівнювання по добах UTC від епохи), у який потрапляє ts."""
+    span_days = max(span_days or settings.METRIC_PARTITION_INTERVAL_DAYS, 1)
+    days = (ts - EPOCH).days
+    return EPOCH + timedelta(days=days - days % span_days)
+
+
+def partition_name(start: datetime, parent: str = METRIC_DATA_TABLE) -> str:
+    return f"{parent}_p{start:%Y%m%d}"
+
+
+def list_partitions(db: Session, parent: str = METRIC_DATA_TABLE) -> List[Partition]:
+    rows = db.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), pg_total_relation_size(c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :parent
+        ORDER BY c.relname
+    """), {"parent": parent}).all()
+
+    partitions = []
+    for name, bound, size_bytes in rows:
+        match = _BOUND_RE.search(bound or "")
+        if match:
+            start = datetime.fromisoformat(match.group(1)).astimezone(timezone.utc)
+            end = datetime.fromisoformat(match.group(2)).astimezone(timezone.utc)
+            partitions.append(Partition(name=name, start=start, end=end, size_bytes=size_bytes))
+        else:
+            partitions.append(Partition(name=name, start=None, end=None, size_bytes=size_bytes))
+    return partitions
+
+
+def create_partition(db: Session, start: datetime, parent: str = METRIC_DATA_TABLE) -> str:
+    """
+    Створює партицію [start, start + інтервал). Таблиця спершу створюється окремо, в неї
+    переносяться рядки цього діапазону з DEFAULT-партиції (якщо такі є), і лише потім вона
+    приєднується через ATTACH PARTITION - інакше PostgreSQL відмовить у створенні.
+    """
+    end = start + timedelta(days=max(settings.METRIC_PARTITION_INTERVAL_DAYS, 1))
+    name = partition_name(start, parent)
+    default_name = f"{parent}_{DEFAULT_PARTITION_SUFFIX}"
+    params = {"start": start, "end": end}
+
+    db.execute(text(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    has_default = db.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": default_name}).scalar()
+    if has_default:
+        db.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {default_name}
+                WHERE timestamp >= :start AND timestamp < :end
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """), params)
+    db.execute(text(
+        f"ALTER TABLE {parent} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    return name
+
+
+def ensure_future_partitions(db: Session, now: Optional[datetime] = None, parent: str = METRIC_DATA_TABLE) -> List[str]:
+    """Гарантує наявність партицій для поточного інтервалу та METRIC_PARTITION_PRECREATE наступних."""
+    now = now or datetime.now(timezone.utc)
+    span = timedelta(days=max(settings.METRIC_PARTITION_INTERVAL_DAYS, 1))
+    existing = {p.start for p in list_partitions(db, parent) if p.start is not None}
+
+    created = []
+    start = partition_start(now)
+    for _ in range(settings.METRIC_PARTITION_PRECREATE + 1):
+        if start not in existing:
+            try:
+                created.append(create_partition(db, start, parent))
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Partition manager: failed to create partition for {start:%Y-%m-%d} on {parent}: {e}")
+        start += span
+    return created
+
+
+def drop_expired_partitions(
+    db: Session,
+    retention_days: int,
+    now: Optional[datetime] = None,
+    parent: str = METRIC_DATA_TABLE
+) -> List[Partition]:
+    """
+    Видаляє (або лише від'єднує, якщо METRIC_PARTITION_EXPIRE_ACTION="detach") партиції,
+    всі дані яких старші за retention_days. DEFAULT-партиція ніколи не чіпається.
+    """
+    if retention_days <= 0:
+        return []
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=retention_days)
+
+    removed = []
+    for partition in list_partitions(db, parent):
+        if partition.end is None or partition.end > cutoff:
+            continue
+        try:
+            if settings.METRIC_PARTITION_EXPIRE_ACTION == "detach":
+                db.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {partition.name}"))
+            else:
+                db.execute(text(f"DROP TABLE {partition.name}"))
+            db.commit()
+            removed.append(partition)
+        except Exception as e:
+            db.rollback()
+            print(f"Partition manager: failed to remove partition {partition.name}: {e}")
+    return removed
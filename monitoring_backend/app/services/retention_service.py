@@ -0,0 +1,163 @@
+# app/services/retention_service.py
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import crud
+from app.db.models.enums import HostTypeEnum
+from app.predefined_data import METRIC_DEFINITIONS_BY_HOST_TYPE, RETENTION_DAYS_BY_HOST_TYPE
+from app.services import partition_service
+
+# Таблиці сирих вимірів: (ключ рядка, колонка часу, за якою рядок застаріває).
+# Чанк видаляється, лише коли застаріла його остання точка
+SAMPLE_TABLES = {
+    "metric_data": (("host_id", "metric_key_id", "timestamp"), "timestamp"),
+    "metric_text_samples": (("host_id", "metric_key_id", "timestamp"), "timestamp"),
+    "metric_chunks": (("host_id", "metric_key_id", "start_time"), "end_time"),
+}
+
+
+@dataclass
+class RetentionPolicy:
+    host_type: str
+    default_days: int  # <= 0 - зберігати без обмежень
+    metric_days: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class PurgeReport:
+    rows_deleted: int = 0
+    bytes_reclaimed: int = 0
+    partitions_dropped: List[str] = field(default_factory=list)
+
+
+def get_retention_policies() -> List[RetentionPolicy]:
+    """
+    Політики зберігання для кожного типу хоста. Пріоритет: "retention_days" з визначення
+    метрики > RETENTION_DAYS_BY_HOST_TYPE > глобальний METRIC_RETENTION_DAYS.
+    """
+    policies = []
+    for host_type in HostTypeEnum:
+        metric_days = {
+            definition["key"]: definition["retention_days"]
+            for definition in METRIC_DEFINITIONS_BY_HOST_TYPE.get(host_type.value, [])
+            if definition.get("retention_days") is not None
+        }
+        policies.append(RetentionPolicy(
+            host_type=host_type.value,
+            default_days=RETENTION_DAYS_BY_HOST_TYPE.get(host_type.value, settings.METRIC_RETENTION_DAYS),
+            metric_days=metric_days,
+        ))
+    return policies
+
+
+def max_retention_days(policies: List[RetentionPolicy]) -> Optional[int]:
+    """Найдовший термін серед усіх політик; None, якщо хоч щось зберігається безстроково."""
+    all_days = [days for policy in policies for days in [policy.default_days, *policy.metric_days.values()]]
+    if not all_days or any(days <= 0 for days in all_days):
+        return None
+    return max(all_days)
+
+
+def _delete_in_batches(
+    db: Session, table: str, where_sql: str, params: Dict, report: PurgeReport, max_batches: int
+) -> int:
+    """
+    Видаляє рядки таблиці вимірів пачками по METRIC_PURGE_BATCH_SIZE, кожна пачка - окрема коротка транзакція,
+    щоб не тримати довгих блокувань і не генерувати величезний WAL одним DELETE.
+    Повертає кількість виконаних пачок (не більше max_batches).
+    """
+    key_columns, _ = SAMPLE_TABLES[table]
+    statement = text(f"""
+        WITH doomed AS (
+            SELECT {", ".join(key_columns)} FROM {table}
+            WHERE {where_sql}
+            LIMIT :batch_size
+        ), deleted AS (
+            DELETE FROM {table} m
+            USING doomed d
+            WHERE {" AND ".join(f"m.{column} = d.{column}" for column in key_columns)}
+            RETURNING pg_column_size(m.*) AS row_size
+        )
+        SELECT count(*), coalesce(sum(row_size), 0) FROM deleted
+    """)
+    batches = 0
+    while batches < max_batches:
+        batches += 1
+        try:
+            rows_deleted, bytes_deleted = db.execute(
+                statement, {**params, "batch_size": settings.METRIC_PURGE_BATCH_SIZE}
+            ).one()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        report.rows_deleted += rows_deleted
+        report.bytes_reclaimed += int(bytes_deleted)
+        if rows_deleted < settings.METRIC_PURGE_BATCH_SIZE:
+            break
+    return batches
+
+
+def purge_expired_metrics(db: Session, now: Optional[datetime] = None) -> PurgeReport:
+    """
+    Видаляє сирі метрики, старші за їхній термін зберігання.
+    1) Партиції metric_data, цілком старші за найдовший термін, видаляються без DELETE.
+    2) Решта застарілих рядків metric_data, текстові виміри (metric_text_samples) і стиснені чанки
+       (metric_chunks) видаляються обмеженими пачками окремо для кожної політики.
+    При увімкненому архіві (METRIC_ARCHIVE_DIR) дані, ще не вивантажені в Parquet, не видаляються.
+    bytes_reclaimed для DELETE - розмір видалених рядків (місце стає доступним після VACUUM),
+    для партицій - повний розмір таблиці разом з індексами.
+    """
+    now = now or datetime.now(timezone.utc)
+    report = PurgeReport()
+    policies = get_retention_policies()
+
+    # Якщо увімкнено архів, видаляється лише вже вивантажене: cutoff не пізніше watermark архіву типу хоста
+    archived_until = crud.crud_metric_archive.get_archive_watermarks(db) if settings.METRIC_ARCHIVE_DIR else None
+
+    def cutoff(host_type: str, days: int) -> datetime:
+        expires_at = now - timedelta(days=days)
+        if archived_until is None:
+            return expires_at
+        return min(expires_at, archived_until.get(host_type, datetime.min.replace(tzinfo=timezone.utc)))
+
+    longest = max_retention_days(policies)
+    partitions_now = now
+    if longest and archived_until is not None:
+        horizons = [archived_until.get(policy.host_type) for policy in policies]
+        partitions_now = None if None in horizons else min(now, min(horizons) + timedelta(days=longest))
+    if longest and partitions_now and partition_service.is_partitioning_supported(db):
+        for partition in partition_service.drop_expired_partitions(db, retention_days=longest, now=partitions_now):
+            report.partitions_dropped.append(partition.name)
+            report.bytes_reclaimed += partition.size_bytes
+
+    batches_left = settings.METRIC_PURGE_MAX_BATCHES
+    host_filter = "host_id IN (SELECT id FROM hosts WHERE host_type = :host_type)"
+    for table, (_, time_column) in SAMPLE_TABLES.items():
+        for policy in policies:
+            for metric_key, days in policy.metric_days.items():
+                if days > 0:
+                    batches_left -= _delete_in_batches(
+                        db, table,
+                        f"{time_column} < :cutoff AND metric_key_id = (SELECT id FROM metric_keys WHERE key = :metric_key) "
+                        f"AND {host_filter}",
+                        {"cutoff": cutoff(policy.host_type, days), "metric_key": metric_key, "host_type": policy.host_type},
+                        report, batches_left
+                    )
+            if policy.default_days > 0:
+                where_sql = f"{time_column} < :cutoff AND {host_filter}"
+                params = {"cutoff": cutoff(policy.host_type, policy.default_days), "host_type": policy.host_type}
+                if policy.metric_days:
+                    # Метрики з власним терміном обробляються окремо вище
+                    where_sql += " AND metric_key_id <> ALL(ARRAY(SELECT id FROM metric_keys WHERE key = ANY(:override_keys)))"
+                    params["override_keys"] = list(policy.metric_days.keys())
+                batches_left -= _delete_in_batches(db, table, where_sql, params, report, batches_left)
+
+    if batches_left <= 0:
+        print("Metric purge: batch limit reached, the rest will be purged on the next run.")
+    return report
@@ -0,0 +1,84 @@
+# app/services/rollup_service.py
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import crud
+
+# Роздільності агрегатів (секунди) у порядку від дрібної до грубої.
+# Кожна наступна будується з попередньої, 1m - із сирих даних.
+ROLLUP_RESOLUTIONS = [60, 300, 3600]
+
+
+def _floor_to_resolution(ts: datetime, resolution_seconds: int) -> datetime:
+    epoch_seconds = int(ts.timestamp())
+    return datetime.fromtimestamp(epoch_seconds - epoch_seconds % resolution_seconds, tz=timezone.utc)
+
+
+def choose_resolution(start_time: datetime, end_time: datetime, max_points: int) -> Optional[int]:
+    """
+    Підбирає роздільність для графіка: найдрібнішу, при якій кількість точок на одну метрику
+    вкладається в max_points. None означає, що вистачає сирих даних.
+    Якщо навіть годинні агрегати не вкладаються в бюджет - повертається найгрубша роздільність.
+    """
+    span_seconds = max((end_time - start_time).total_seconds(), 0)
+    if span_seconds / settings.ROLLUP_RAW_INTERVAL_SECONDS <= max_points:
+        return None
+    for resolution_seconds in ROLLUP_RESOLUTIONS:
+        if span_seconds / resolution_seconds <= max_points:
+            return resolution_seconds
+    return ROLLUP_RESOLUTIONS[-1]
+
+
+def run_rollups(db: Session, now: Optional[datetime] = None) -> Dict[int, int]:
+    """
+    Інкрементальна агрегація: для кожної роздільності обробляються лише повні bucket-и між
+    її watermark і поточним моментом (мінус ROLLUP_LATENESS_SECONDS на запізнілі дані),
+    після чого watermark зсувається. Кожна роздільність комітиться окремою транзакцією.
+    Повертає кількість записаних bucket-ів по роздільностях.
+    """
+    now = now or datetime.now(timezone.utc)
+    horizon = now - timedelta(seconds=settings.ROLLUP_LATENESS_SECONDS)
+    written: Dict[int, int] = {}
+
+    source_resolution: Optional[int] = None
+    for resolution_seconds in ROLLUP_RESOLUTIONS:
+        upper = _floor_to_resolution(horizon, resolution_seconds)
+        if source_resolution is not None:
+            # Грубша роздільність не може випереджати ту, з якої вона будується
+            source_watermark = crud.crud_metric_rollup.get_watermark(db, source_resolution)
+            if source_watermark is None:
+                break
+            upper = min(upper, _floor_to_resolution(source_watermark, resolution_seconds))
+
+        watermark = crud.crud_metric_rollup.get_watermark(db, resolution_seconds)
+        if watermark is None:
+            oldest = crud.crud_metric_rollup.get_oldest_raw_timestamp(db)
+            if oldest is None:
+                break
+            watermark = _floor_to_resolution(oldest, resolution_seconds)
+
+        # Обмежуємо обсяг роботи за один запуск (актуально для першого запуску на великій історії)
+        upper = min(upper, watermark + timedelta(seconds=resolution_seconds * settings.ROLLUP_MAX_BUCKETS_PER_RUN))
+        if upper <= watermark:
+            source_resolution = resolution_seconds
+            continue
+
+        try:
+            if source_resolution is None:
+                count = crud.crud_metric_rollup.aggregate_raw_into_rollups(db, resolution_seconds, watermark, upper)
+            else:
+                count = crud.crud_metric_rollup.aggregate_rollups_into_rollups(
+                    db, source_resolution, resolution_seconds, watermark, upper
+                )
+            crud.crud_metric_rollup.set_watermark(db, resolution_seconds, upper)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        written[resolution_seconds] = count
+        source_resolution = resolution_seconds
+
+    return written
@@ -0,0 +1,228 @@
+# app/services/snmp_interfaces.py
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from pysnmp.hlapi.v3arch.asyncio import (
+    SnmpEngine,
+    CommunityData,
+    UdpTransportTarget,
+    ContextData,
+    ObjectType,
+    ObjectIdentity,
+    bulk_cmd
+)
+from pysnmp.error import PySnmpError
+from pysnmp.proto.rfc1905 import EndOfMibView
+
+from app.core.config import settings
+from app.schemas.metric_data import MetricDataCreate
+
+IF_NAME_OID = ".1.3.6.1.2.1.31.1.1.1.1"  # ifXTable.ifName
+COUNTER64_MAX = 2 ** 64
+
+OidTuple = Tuple[int, ...]
+
+
+def parse_oid(oid: str) -> OidTuple:
+    return tuple(int(part) for part in oid.strip(".").split("."))
+
+
+def _format_oid(oid: OidTuple) -> str:
+    return "." + ".".join(str(part) for part in oid)
+
+
+def _varbind_oid(name: Any) -> OidTuple:
+    # З lookupMib=False приходить ObjectName, з резолвом MIB - ObjectIdentity
+    return tuple(name.get_oid()) if hasattr(name, "get_oid") else tuple(name)
+
+
+def metric_safe_name(if_name: str) -> str:
+    # Крапка - роздільник у ключах метрик, тому в імені інтерфейсу вона (і пробіли) замінюються
+    return re.sub(r"[^\w\-]", "_", if_name.strip()) or "unnamed"
+
+
+class CounterRateStore:
+    """
+    Попередні значення лічильників (in-memory) для перетворення Counter64 у швидкість.
+    Перше значення лише запам'ятовується. Спад лічильника у верхній половині діапазону вважається
+    переповненням (wrap), інакше - скиданням (перезавантаження пристрою), і така точка пропускається.
+    """
+
+    def __init__(self):
+        self._samples: Dict[Tuple[uuid.UUID, str], Tuple[int, float]] = {}
+
+    def rate(self, host_id: uuid.UUID, metric_key: str, value: int, ts: float) -> Optional[float]:
+        key = (host_id, metric_key)
+        previous = self._samples.get(key)
+        self._samples[key] = (value, ts)
+        if previous is None:
+            return None
+        previous_value, previous_ts = previous
+        elapsed = ts - previous_ts
+        if elapsed <= 0:
+            return None
+        delta = value - previous_value
+        if delta < 0:
+            if previous_value < COUNTER64_MAX // 2:
+                return None
+            delta += COUNTER64_MAX
+        return delta / elapsed
+
+    def forget_missing(self, host_ids: set) -> None:
+        for key in [k for k in self._samples if k[0] not in host_ids]:
+            del self._samples[key]
+
+
+class InterfaceNameCache:
+    """ifIndex -> ifName для кожного хоста, перечитується раз на SNMP_IFNAME_REFRESH_SECONDS."""
+
+    def __init__(self):
+        self._names: Dict[uuid.UUID, Tuple[float, Dict[int, str]]] = {}
+
+    def get(self, host_id: uuid.UUID) -> Optional[Dict[int, str]]:
+        cached = self._names.get(host_id)
+        if not cached or time.monotonic() - cached[0] >= settings.SNMP_IFNAME_REFRESH_SECONDS:
+            return None
+        return cached[1]
+
+    def set(self, host_id: uuid.UUID, names: Dict[int, str]) -> None:
+        self._names[host_id] = (time.monotonic(), names)
+
+    def lookup(self, host_id: uuid.UUID, if_index: int) -> Optional[str]:
+        """Ім'я з кешу без перевірки свіжості (для trap-ів, які приходять між опитуваннями)."""
+        cached = self._names.get(host_id)
+        return cached[1].get(if_index) if cached else None
+
+    def invalidate(self, host_id: uuid.UUID) -> None:
+        self._names.pop(host_id, None)
+
+    def forget_missing(self, host_ids: set) -> None:
+        for host_id in [h for h in self._names if h not in host_ids]:
+            del self._names[host_id]
+
+
+counter_rates = CounterRateStore()
+interface_names = InterfaceNameCache()
+
+
+async def bulk_walk_columns(
+    snmp_engine: SnmpEngine,
+    community_data: CommunityData,
+    transport_target: UdpTransportTarget,
+    context_data: ContextData,
+    column_oids: List[str],
+    host_name: str
+) -> Tuple[Dict[str, Dict[int, Any]], int]:
+    """
+    Обходить кілька колонок таблиці (ifTable/ifXTable) паралельно GETBULK-запитами:
+    кожен запит містить по одному varbind на ще не завершену колонку. Повертає
+    ({колонка: {індекс рядка: значення}}, кількість помилок).
+    """
+    prefixes = {column: parse_oid(column) for column in column_oids}
+    cursors: Dict[str, Optional[OidTuple]] = dict(prefixes)
+    table: Dict[str, Dict[int, Any]] = {column: {} for column in column_oids}
+    max_repetitions = max(settings.SNMP_BULK_MAX_REPETITIONS, 1)
+
+    while True:
+        active = [column for column in column_oids if cursors[column] is not None]
+        if not active:
+            break
+        try:
+            errorIndication, errorStatus, errorIndex, varBinds = await bulk_cmd(
+                snmp_engine, community_data, transport_target, context_data,
+                0, max_repetitions,
+                *[ObjectType(ObjectIdentity(_format_oid(cursors[column]))) for column in active],
+                lookupMib=False
+            )
+        except PySnmpError as e:
+            print(f"SNMP PySnmpError during bulk walk for host {host_name}: {e}")
+            return table, 1
+        if errorIndication or errorStatus:
+            error_msg = errorIndication or errorStatus.prettyPrint()
+            print(f"SNMP bulk walk error for host {host_name}: {error_msg}")
+            return table, 1
+
+        progressed = False
+        # Відповідь GETBULK - рядки по len(active) varbind-ів, у тому ж порядку, що й запит
+        for position, varBindRow in enumerate(varBinds):
+            column = active[position % len(active)]
+            cursor = cursors[column]
+            if cursor is None:
+                continue
+            oid = _varbind_oid(varBindRow[0])
+            value = varBindRow[1]
+            prefix = prefixes[column]
+            if oid[:len(prefix)] != prefix or len(oid) <= len(prefix) or oid <= cursor \
+                    or isinstance(value, EndOfMibView):
+                cursors[column] = None  # Колонка закінчилась
+                continue
+            table[column][oid[len(prefix)]] = value
+            cursors[column] = oid
+            progressed = True
+        if not progressed:
+            break
+
+    return table, 0
+
+
+async def collect_interface_metrics(
+    snmp_engine: SnmpEngine,
+    community_data: CommunityData,
+    transport_target: UdpTransportTarget,
+    context_data: ContextData,
+    host_id: uuid.UUID,
+    host_name: str,
+    interface_definitions: List[Dict[str, Any]],
+    timestamp
+) -> Tuple[List[MetricDataCreate], int]:
+    """
+    Автовиявлення інтерфейсів і метрики по кожному з них. Лічильники ("counter_rate")
+    зберігаються як швидкість (з множником, напр. 8 для октетів -> біт/с), а не як сирі значення.
+    """
+    names = interface_names.get(host_id)
+    column_oids = [d["snmp_column_oid"] for d in interface_definitions]
+    if names is None:
+        column_oids.append(IF_NAME_OID)
+
+    table, errors = await bulk_walk_columns(
+        snmp_engine, community_data, transport_target, context_data, column_oids, host_name
+    )
+    if errors:
+        return [], errors
+
+    if names is None:
+        names = {index: metric_safe_name(value.prettyPrint()) for index, value in table[IF_NAME_OID].items()}
+        interface_names.set(host_id, names)
+
+    now_ts = time.monotonic()
+    metrics: List[MetricDataCreate] = []
+    for definition in interface_definitions:
+        for index, raw_value in table[definition["snmp_column_oid"]].items():
+            if_name = names.get(index)
+            if if_name is None:
+                # Новий інтерфейс - імена перечитаються на наступному опитуванні
+                interface_names.invalidate(host_id)
+                if_name = f"if{index}"
+            metric_key = definition["key_template"].format(if_name=if_name)
+            try:
+                numeric_value = int(raw_value)
+            except (ValueError, TypeError):
+                continue
+            if definition.get("data_type") == "counter_rate":
+                rate = counter_rates.rate(host_id, metric_key, numeric_value, now_ts)
+                if rate is None:
+                    continue
+                value_numeric = rate * definition.get("multiplier", 1)
+            else:
+                value_numeric = float(numeric_value)
+            metrics.append(MetricDataCreate(
+                host_id=host_id, metric_key=metric_key, value_numeric=value_numeric, timestamp=timestamp
+            ))
+    return metrics, 0
+
+
+def forget_missing_hosts(host_ids: set) -> None:
+    counter_rates.forget_missing(host_ids)
+    interface_names.forget_missing(host_ids)
@@ -0,0 +1,59 @@
+# app/services/snmp_schedule.py
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.db.models.enums import HostTypeEnum
+from app.predefined_data import METRIC_DEFINITIONS_BY_HOST_TYPE
+
+
+def host_poll_interval(host_interval_seconds: Optional[int]) -> int:
+    return max(host_interval_seconds or settings.SNMP_DEFAULT_POLL_INTERVAL_SECONDS, 1)
+
+
+def metric_groups(host_type: HostTypeEnum, host_interval_seconds: Optional[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """Визначення SNMP-метрик хоста, згруповані за фактичним інтервалом опитування."""
+    base_interval = host_poll_interval(host_interval_seconds)
+    groups: Dict[int, List[Dict[str, Any]]] = {}
+    for definition in METRIC_DEFINITIONS_BY_HOST_TYPE.get(host_type.value, []):
+        if not definition.get("snmp_oid") and not definition.get("snmp_table"):
+            continue
+        interval = max(base_interval, definition.get("poll_interval_seconds") or 0)
+        groups.setdefault(interval, []).append(definition)
+    return groups
+
+
+def poll_offset(host_id: uuid.UUID, interval_seconds: int) -> float:
+    """
+    Стабільний зсув хоста в межах інтервалу (з його UUID). UUID-и розподілені рівномірно,
+    тож хости рівномірно розкидані по інтервалу замість одночасного опитування всіх.
+    """
+    return (host_id.int % (interval_seconds * 1000)) / 1000.0
+
+
+class PollSchedule:
+    """
+    Розклад опитування: група (хост, інтервал) опитується в моменти offset + k * interval.
+    Зберігає номер останнього відпрацьованого слоту для кожної групи.
+    """
+
+    def __init__(self):
+        self._last_slot: Dict[Tuple[uuid.UUID, int], int] = {}
+
+    def is_due(self, host_id: uuid.UUID, interval_seconds: int, now_ts: float) -> bool:
+        key = (host_id, interval_seconds)
+        slot = int((now_ts - poll_offset(host_id, interval_seconds)) // interval_seconds)
+        last_slot = self._last_slot.get(key)
+        if last_slot is None:
+            # Новий хост чекає на свій слот, щоб після рестарту не опитувати всіх одночасно
+            self._last_slot[key] = slot
+            return False
+        if slot > last_slot:
+            self._last_slot[key] = slot
+            return True
+        return False
+
+    def forget_missing(self, host_ids: set) -> None:
+        """Прибирає стан хостів, яких більше немає в списку опитування."""
+        for key in [k for k in self._last_slot if k[0] not in host_ids]:
+            del self._last_slot[key]
@@ -1,8 +1,12 @@
 # app/services/snmp_service.py
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Dict, Any, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 import asyncio
+import uuid
 
 # Імпорти для нової версії pysnmp (v3arch.asyncio)
 from pysnmp.hlapi.v3arch.asyncio import (
@@ -15,87 +19,202 @@ from pysnmp.hlapi.v3arch.asyncio import (
     get_cmd
 )
 from pysnmp.error import PySnmpError
+from pysnmp.proto.rfc1905 import NoSuchObject, NoSuchInstance, EndOfMibView
 
-from app.db import crud
+from app.cache.snmp_session_cache import snmp_session_cache
+from app.core.config import settings
+from app.db import crud, crud_async
 from app.db.models.host import Host
 from app.db.models.enums import HostAvailabilityStatusEnum, HostTypeEnum
 from app.schemas.metric_data import MetricDataCreate
-from app.predefined_data import METRIC_DEFINITIONS_BY_HOST_TYPE
+from app.predefined_data import METRIC_DEFINITIONS_BY_HOST_TYPE, INTERFACE_METRICS_BY_HOST_TYPE
+from app.services import snmp_interfaces, trigger_evaluation_service
 
 
-async def poll_snmp_host(db: Session, host: Host) -> Dict[str, Any]:
-    if not host.is_monitored or host.availability_status == HostAvailabilityStatusEnum.pending_approval:
-        return {"status": "skipped", "reason": "Host not monitored or pending approval"}
+@dataclass
+class SnmpTarget:
+    """Знімок SNMP-налаштувань хоста, не прив'язаний до сесії БД (опитування йде без сесії)."""
+    host_id: uuid.UUID
+    name: str
+    host_type: HostTypeEnum
+    ip_address: str
+    port: int
+    community: str
+    version: Optional[str]
+    poll_interval_seconds: Optional[int] = None
 
-    if host.host_type != HostTypeEnum.mikrotik_snmp:
-        return {"status": "skipped", "reason": "Host is not an SNMP type"}
+    @classmethod
+    def from_host(cls, host: Host) -> "SnmpTarget":
+        return cls(
+            host_id=host.id,
+            name=host.name,
+            host_type=host.host_type,
+            ip_address=str(host.ip_address),
+            port=host.snmp_port or 161,
+            community=host.snmp_community or "public",
+            version=host.snmp_version,
+            poll_interval_seconds=host.snmp_poll_interval_seconds,
+        )
 
-    snmp_definitions = METRIC_DEFINITIONS_BY_HOST_TYPE.get(host.host_type.value, [])
-    if not snmp_definitions:
-        return {"status": "skipped", "reason": "No SNMP metric definitions for this host type"}
 
+@dataclass
+class SnmpPollResult:
+    host_id: uuid.UUID
+    status: str
+    # Новий статус доступності хоста; None - не змінювати. Для хостів з метриками 'up' ставить сам запис метрик
+    availability: Optional[HostAvailabilityStatusEnum] = None
+    metrics: List[MetricDataCreate] = field(default_factory=list)
+    snmp_errors: int = 0
+    message: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        result = {"status": self.status, "host_id": str(self.host_id)}
+        if self.message is not None:
+            result["message"] = self.message
+        else:
+            result["metrics_collected"] = len(self.metrics)
+            result["snmp_errors"] = self.snmp_errors
+        return result
+
+
+async def _get_oid_values(
+    snmp_engine: SnmpEngine,
+    community_data: CommunityData,
+    transport_target: UdpTransportTarget,
+    context_data: ContextData,
+    oids: List[str],
+    host_name: str
+) -> Tuple[Dict[str, Any], int]:
+    """
+    Один GET PDU на весь список oids. Повертає ({oid: значення}, кількість помилок).
+    Якщо агент відхилив PDU через конкретний OID (errorStatus + errorIndex), цей OID
+    виключається і запитується окремо, а решта надсилається повторно одним PDU.
+    """
+    values: Dict[str, Any] = {}
+    errors = 0
+    pending = list(oids)
+    retry_single: List[str] = []
+
+    while pending:
+        try:
+            errorIndication, errorStatus, errorIndex, varBinds = await get_cmd(
+                snmp_engine, community_data, transport_target, context_data,
+                *[ObjectType(ObjectIdentity(oid)) for oid in pending]
+            )
+        except PySnmpError as e:
+            print(f"SNMP PySnmpError during get_cmd for host {host_name} OIDs {pending}: {e}")
+            errors += len(pending)
+            break
+
+        if errorIndication:
+            # Таймаут або помилка транспорту - повторювати по одному OID немає сенсу
+            print(f"SNMP data error for host {host_name} OIDs {pending}: {errorIndication}")
+            errors += len(pending)
+            break
+
+        if errorStatus:
+            if len(pending) == 1:
+                print(f"SNMP data error for host {host_name} OID {pending[0]}: {errorStatus.prettyPrint()}")
+                errors += 1
+                break
+            failed_index = int(errorIndex) - 1
+            if 0 <= failed_index < len(pending):
+                retry_single.append(pending.pop(failed_index))
+                continue
+            # Помилка без вказівки на OID (напр. tooBig) - опитуємо весь PDU по одному
+            retry_single.extend(pending)
+            break
+
+        for oid, varBindRow in zip(pending, varBinds):
+            raw_value_obj = varBindRow[1]
+            if isinstance(raw_value_obj, (NoSuchObject, NoSuchInstance, EndOfMibView)):
+                # SNMPv2c повідомляє про відсутній OID у самому varbind, решта PDU валідна
+                print(f"SNMP data error for host {host_name} OID {oid}: {raw_value_obj.prettyPrint()}")
+                errors += 1
+                continue
+            values[oid] = raw_value_obj
+        break
+
+    for oid in retry_single:
+        single_values, single_errors = await _get_oid_values(
+            snmp_engine, community_data, transport_target, context_data, [oid], host_name
+        )
+        values.update(single_values)
+        errors += single_errors
+
+    return values, errors
+
+
+# Останні числові значення кожного хоста - для віртуальних метрик, складові яких
+# опитуються з різними інтервалами (memory.total рідше, ніж memory.used)
+_last_polled_values: Dict[uuid.UUID, Dict[str, float]] = {}
+
+
+def forget_missing_hosts(host_ids: set) -> None:
+    for host_id in [h for h in _last_polled_values if h not in host_ids]:
+        del _last_polled_values[host_id]
+    snmp_interfaces.forget_missing_hosts(host_ids)
+
+
+async def collect_snmp_metrics(
+    target: SnmpTarget, definitions: Optional[List[Dict[str, Any]]] = None
+) -> SnmpPollResult:
+    """
+    Опитує хост і повертає зібрані метрики та новий статус доступності. До БД не звертається.
+    definitions - підмножина визначень метрик для цього опитування (за замовчуванням усі метрики типу хоста).
+    """
+    snmp_definitions = definitions if definitions is not None else \
+        METRIC_DEFINITIONS_BY_HOST_TYPE.get(target.host_type.value, [])
     metrics_to_create: List[MetricDataCreate] = []
     snmp_errors = 0
-    snmp_engine = SnmpEngine()
+    # Engine спільний для всього процесу, dispatcher закривається лише при зупинці застосунку
+    snmp_engine = snmp_session_cache.get_engine()
 
     try:
-        mp_model = 1 if host.snmp_version and host.snmp_version.lower() == '2c' else 0
+        mp_model = 1 if target.version and target.version.lower() == '2c' else 0
 
-        community_data = CommunityData(host.snmp_community or "public", mpModel=mp_model)
+        community_data = CommunityData(target.community, mpModel=mp_model)
 
         try:
-            transport_target = await UdpTransportTarget.create(
-                (str(host.ip_address), host.snmp_port or 161)
+            transport_target = await snmp_session_cache.get_transport(
+                target.host_id, target.ip_address, target.port,
+                timeout=settings.SNMP_TIMEOUT_SECONDS, retries=settings.SNMP_RETRIES
             )
-            # За потреби можна налаштувати таймаути після створення:
-            # transport_target.timeout = 2.0
-            # transport_target.retries = 1
         except PySnmpError as e:
-            print(f"SNMP error creating transport target for host {host.name}: {e}")
-            if host.availability_status != HostAvailabilityStatusEnum.down:
-                crud.host.update_host_availability(db, host_id=host.id, status=HostAvailabilityStatusEnum.down)
-                db.commit()
-            return {"status": "error", "host_id": str(host.id),
-                    "message": f"Failed to create SNMP transport target: {e}"}
+            print(f"SNMP error creating transport target for host {target.name}: {e}")
+            return SnmpPollResult(target.host_id, "error", availability=HostAvailabilityStatusEnum.down,
+                                  message=f"Failed to create SNMP transport target: {e}")
 
         context_data = ContextData()
 
         # Зберігаємо результати тут для подальших обчислень
         polled_values: Dict[str, Any] = {}
 
-        for metric_def in snmp_definitions:
-            oid_str = metric_def.get("snmp_oid")
-            if not oid_str:
-                continue
-
-            object_type = ObjectType(ObjectIdentity(oid_str))
-
-            try:
-                errorIndication, errorStatus, errorIndex, varBinds = await get_cmd(
-                    snmp_engine, community_data, transport_target, context_data, object_type
-                )
-            except PySnmpError as e:
-                print(f"SNMP PySnmpError during get_cmd for host {host.name} OID {oid_str}: {e}")
-                snmp_errors += 1
-                continue
+        # Усі OID-и хоста пакуються в мінімум GET PDU (по SNMP_MAX_VARBINDS_PER_PDU) замість запиту на кожен OID
+        oid_definitions = [d for d in snmp_definitions if d.get("snmp_oid")]
+        max_varbinds = max(settings.SNMP_MAX_VARBINDS_PER_PDU, 1)
+        oid_values: Dict[str, Any] = {}
+        for i in range(0, len(oid_definitions), max_varbinds):
+            chunk_values, chunk_errors = await _get_oid_values(
+                snmp_engine, community_data, transport_target, context_data,
+                [d["snmp_oid"] for d in oid_definitions[i:i + max_varbinds]], target.name
+            )
+            oid_values.update(chunk_values)
+            snmp_errors += chunk_errors
 
-            if errorIndication or errorStatus:
-                error_msg = errorIndication or errorStatus.prettyPrint()
-                print(f"SNMP data error for host {host.name} OID {oid_str}: {error_msg}")
-                snmp_errors += 1
+        for metric_def in oid_definitions:
+            raw_value_obj = oid_values.get(metric_def["snmp_oid"])
+            if raw_value_obj is None:
                 continue
+            metric_key = metric_def["key"]
 
-            for varBindRow in varBinds:
-                raw_value_obj = varBindRow[1]
-                metric_key = metric_def["key"]
-
-                try:
-                    current_raw_value = float(raw_value_obj.prettyPrint())
-                    if metric_def.get("divisor"):
-                        current_raw_value /= metric_def["divisor"]
-                    polled_values[metric_key] = current_raw_value
-                except (ValueError, TypeError, AttributeError):
-                    polled_values[metric_key] = str(raw_value_obj.prettyPrint())
+            try:
+                current_raw_value = float(raw_value_obj.prettyPrint())
+                if metric_def.get("divisor"):
+                    current_raw_value /= metric_def["divisor"]
+                polled_values[metric_key] = current_raw_value
+            except (ValueError, TypeError, AttributeError):
+                polled_values[metric_key] = str(raw_value_obj.prettyPrint())
 
         # Обробляємо зібрані значення та створюємо метрики для запису в БД
         current_timestamp = datetime.now(timezone.utc)
@@ -118,21 +237,23 @@ async def poll_snmp_host(db: Session, host: Host) -> Dict[str, Any]:
             if value_numeric is not None or value_text is not None:
                 metrics_to_create.append(
                     MetricDataCreate(
-                        host_id=host.id, metric_key=metric_key,
+                        host_id=target.host_id, metric_key=metric_key,
                         value_numeric=value_numeric, value_text=value_text,
                         timestamp=current_timestamp
                     )
                 )
 
         # --- Обчислення та додавання віртуальних метрик ---
-        if host.host_type == HostTypeEnum.mikrotik_snmp:
-            total_mem = polled_values.get("mikrotik.system.memory.total")
+        last_values = _last_polled_values.setdefault(target.host_id, {})
+        last_values.update({k: v for k, v in polled_values.items() if isinstance(v, (int, float))})
+        if target.host_type == HostTypeEnum.mikrotik_snmp and "mikrotik.system.memory.used" in polled_values:
+            total_mem = last_values.get("mikrotik.system.memory.total")
             used_mem = polled_values.get("mikrotik.system.memory.used")
             if isinstance(total_mem, (int, float)) and isinstance(used_mem, (int, float)) and total_mem > 0:
                 used_percent = (used_mem / total_mem) * 100
                 metrics_to_create.append(
                     MetricDataCreate(
-                        host_id=host.id,
+                        host_id=target.host_id,
                         metric_key="mikrotik.system.memory.used_percent",
                         value_numeric=used_percent,
                         value_text=None,
@@ -140,45 +261,128 @@ async def poll_snmp_host(db: Session, host: Host) -> Dict[str, Any]:
                     )
                 )
 
-        # Оновлення статусу хоста та збереження метрик
-        if metrics_to_create:
-            crud.metric_data.create_multiple_metric_data(db, metrics_in=metrics_to_create)
-            if host.availability_status != HostAvailabilityStatusEnum.up:
-                crud.host.update_host_availability(db, host_id=host.id, status=HostAvailabilityStatusEnum.up)
-            db.commit()
-        elif snmp_errors == 0 and len([d for d in snmp_definitions if d.get("snmp_oid")]) > 0:
-            if host.availability_status != HostAvailabilityStatusEnum.up:
-                crud.host.update_host_availability(db, host_id=host.id, status=HostAvailabilityStatusEnum.up)
-                db.commit()
-        elif snmp_errors > 0 and not metrics_to_create:
-            if host.availability_status != HostAvailabilityStatusEnum.down:
-                crud.host.update_host_availability(db, host_id=host.id, status=HostAvailabilityStatusEnum.down)
-                db.commit()
-
-        return {"status": "snmp_polled", "host_id": str(host.id), "metrics_collected": len(metrics_to_create),
-                "snmp_errors": snmp_errors}
+        # --- Таблиця інтерфейсів (GETBULK, лише SNMPv2c) ---
+        polls_interfaces = any(d.get("snmp_table") == "interfaces" for d in snmp_definitions)
+        interface_definitions = INTERFACE_METRICS_BY_HOST_TYPE.get(target.host_type.value, [])
+        if polls_interfaces and interface_definitions:
+            if mp_model == 1:
+                interface_metrics, interface_errors = await snmp_interfaces.collect_interface_metrics(
+                    snmp_engine, community_data, transport_target, context_data,
+                    target.host_id, target.name, interface_definitions, current_timestamp
+                )
+                metrics_to_create.extend(interface_metrics)
+                snmp_errors += interface_errors
+            else:
+                print(f"SNMP host {target.name}: interface discovery needs SNMPv2c (GETBULK), skipped")
+
+        availability = None
+        if not metrics_to_create:
+            if snmp_errors == 0 and (oid_definitions or polls_interfaces):
+                availability = HostAvailabilityStatusEnum.up
+            elif snmp_errors > 0:
+                availability = HostAvailabilityStatusEnum.down
+
+        return SnmpPollResult(target.host_id, "snmp_polled", availability=availability,
+                              metrics=metrics_to_create, snmp_errors=snmp_errors)
 
     except PySnmpError as e_main:
-        print(f"CRITICAL PySnmpError during SNMP polling for host {host.name}: {e_main}")
-        if host.availability_status != HostAvailabilityStatusEnum.down:
-            try:
-                crud.host.update_host_availability(db, host_id=host.id, status=HostAvailabilityStatusEnum.down)
-                db.commit()
-            except Exception as e_db_critical:
-                print(f"Failed to update host status after critical PySnmpError for {host.name}: {e_db_critical}")
-        return {"status": "critical_pysnmp_error", "host_id": str(host.id), "message": str(e_main)}
+        print(f"CRITICAL PySnmpError during SNMP polling for host {target.name}: {e_main}")
+        return SnmpPollResult(target.host_id, "critical_pysnmp_error",
+                              availability=HostAvailabilityStatusEnum.down, message=str(e_main))
     except Exception as e_general:
-        print(f"CRITICAL GENERAL ERROR during SNMP polling for host {host.name}: {e_general}")
-        if host.availability_status != HostAvailabilityStatusEnum.down:
-            try:
-                crud.host.update_host_availability(db, host_id=host.id, status=HostAvailabilityStatusEnum.down)
-                db.commit()
-            except Exception as e_db_critical:
-                print(f"Failed to update host status after critical general error for {host.name}: {e_db_critical}")
-        return {"status": "critical_general_error", "host_id": str(host.id), "message": str(e_general)}
-    finally:
-        if snmp_engine and hasattr(snmp_engine, 'transportDispatcher') and snmp_engine.transportDispatcher:
-            try:
-                snmp_engine.transportDispatcher.closeDispatcher()
-            except Exception as e_close:
-                print(f"Error closing SNMP transport dispatcher for host {host.name}: {e_close}")
\ No newline at end of file
+        print(f"CRITICAL GENERAL ERROR during SNMP polling for host {target.name}: {e_general}")
+        return SnmpPollResult(target.host_id, "critical_general_error",
+                              availability=HostAvailabilityStatusEnum.down, message=str(e_general))
+
+
+def write_snmp_poll_results(db: Session, results: List[SnmpPollResult]) -> int:
+    """
+    Записує результати опитування багатьох хостів однією транзакцією: зміни статусів - bulk UPDATE-ами,
+    усі метрики - одним INSERT. Повертає кількість записаних метрик.
+    Якщо пачку відхилено через обмеження БД (наприклад, хост видалили під час опитування), результати
+    пишуться окремо по хостах, і втрачаються лише метрики хоста, що не записується.
+    """
+    try:
+        return _write_poll_batch(db, results)
+    except IntegrityError as e:
+        if len(results) <= 1:
+            raise
+        print(f"SNMP poll results of {len(results)} hosts rejected as one batch, writing per host: {e.orig}")
+    written = 0
+    for result in results:
+        try:
+            written += _write_poll_batch(db, [result])
+        except IntegrityError as e:
+            print(f"SNMP: dropped poll results of host {result.host_id}: {e.orig}")
+    return written
+
+
+def _write_poll_batch(db: Session, results: List[SnmpPollResult]) -> int:
+    metrics = [metric for result in results for metric in result.metrics]
+    try:
+        for status in (HostAvailabilityStatusEnum.down, HostAvailabilityStatusEnum.up):
+            host_ids = [r.host_id for r in results if r.availability == status and not r.metrics]
+            crud.host.set_hosts_availability(db, host_ids, status, commit=False)
+        if metrics:
+            # Статус 'up' хостам з метриками виставляється в тій самій транзакції
+            crud.metric_data.create_multiple_metric_data(db, metrics_in=metrics)
+        else:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    trigger_evaluation_service.on_metrics_ingested(db, metrics)
+    return len(metrics)
+
+
+async def write_snmp_poll_results_async(db: AsyncSession, results: List[SnmpPollResult]) -> int:
+    """write_snmp_poll_results на AsyncSession - SNMP job пише результати тіку, не виходячи з event loop-а."""
+    try:
+        return await _write_poll_batch_async(db, results)
+    except IntegrityError as e:
+        if len(results) <= 1:
+            raise
+        print(f"SNMP poll results of {len(results)} hosts rejected as one batch, writing per host: {e.orig}")
+    written = 0
+    for result in results:
+        try:
+            written += await _write_poll_batch_async(db, [result])
+        except IntegrityError as e:
+            print(f"SNMP: dropped poll results of host {result.host_id}: {e.orig}")
+    return written
+
+
+async def _write_poll_batch_async(db: AsyncSession, results: List[SnmpPollResult]) -> int:
+    metrics = [metric for result in results for metric in result.metrics]
+    try:
+        for status in (HostAvailabilityStatusEnum.down, HostAvailabilityStatusEnum.up):
+            host_ids = [r.host_id for r in results if r.availability == status and not r.metrics]
+            await crud_async.crud_host.set_hosts_availability(db, host_ids, status, commit=False)
+        if metrics:
+            await crud_async.crud_metric_data.create_multiple_metric_data(db, metrics_in=metrics)
+        else:
+            await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    await trigger_evaluation_service.on_metrics_ingested_async(db, metrics)
+    return len(metrics)
+
+
+async def poll_snmp_host(db: Session, host: Host) -> Dict[str, Any]:
+    if not host.is_monitored or host.availability_status == HostAvailabilityStatusEnum.pending_approval:
+        return {"status": "skipped", "reason": "Host not monitored or pending approval"}
+
+    if host.host_type != HostTypeEnum.mikrotik_snmp:
+        return {"status": "skipped", "reason": "Host is not an SNMP type"}
+
+    snmp_definitions = METRIC_DEFINITIONS_BY_HOST_TYPE.get(host.host_type.value, [])
+    if not snmp_definitions:
+        return {"status": "skipped", "reason": "No SNMP metric definitions for this host type"}
+
+    result = await collect_snmp_metrics(SnmpTarget.from_host(host))
+    try:
+        write_snmp_poll_results(db, [result])
+    except Exception as e_db:
+        print(f"Failed to store SNMP poll results for {host.name}: {e_db}")
+    return result.as_dict()
@@ -0,0 +1,178 @@
+# app/services/snmp_trap_service.py
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pysnmp.carrier.asyncio.dgram import udp
+from pysnmp.entity import config, engine
+from pysnmp.entity.rfc3413 import ntfrcv
+from sqlalchemy.orm import Session
+
+from app.cache.host_ip_cache import host_ip_cache
+from app.core.config import settings
+from app.db import crud
+from app.predefined_data import METRIC_DEFINITIONS_BY_HOST_TYPE, INTERFACE_METRICS_BY_HOST_TYPE
+from app.schemas.metric_data import MetricDataCreate
+from app.services import snmp_service
+from app.services.snmp_interfaces import IF_NAME_OID, interface_names, metric_safe_name, parse_oid
+from app.services.snmp_service import SnmpPollResult, SnmpTarget
+
+IF_DESCR_OID = ".1.3.6.1.2.1.2.2.1.2"
+
+OidTuple = Tuple[int, ...]
+PendingTrap = Tuple[str, List[Tuple[OidTuple, Any]], datetime]
+
+
+def _scalar_oids(host_type: str) -> Dict[OidTuple, Dict[str, Any]]:
+    return {
+        parse_oid(d["snmp_oid"]): d
+        for d in METRIC_DEFINITIONS_BY_HOST_TYPE.get(host_type, []) if d.get("snmp_oid")
+    }
+
+
+def _interface_columns(host_type: str) -> Dict[OidTuple, Dict[str, Any]]:
+    # Лічильники в trap-і не дають швидкості (немає попереднього значення в тому ж ряду), тож лише стани
+    return {
+        parse_oid(d["snmp_column_oid"]): d
+        for d in INTERFACE_METRICS_BY_HOST_TYPE.get(host_type, []) if d.get("data_type") != "counter_rate"
+    }
+
+
+def trap_to_metrics(target: SnmpTarget, var_binds: List[Tuple[OidTuple, Any]], timestamp: datetime) -> List[MetricDataCreate]:
+    """
+    Перетворює varbind-и trap-а на метрики хоста. Відомі скалярні OID-и з визначень метрик
+    мапляться на їхні ключі; колонки таблиці інтерфейсів (ifOperStatus з linkUp/linkDown) - на
+    mikrotik.interface.{ifName}.*, ім'я береться з ifName/ifDescr у самому trap-і або з кешу імен опитувача.
+    """
+    host_type = target.host_type.value
+    scalars = _scalar_oids(host_type)
+    columns = _interface_columns(host_type)
+
+    names_in_trap: Dict[int, str] = {}
+    name_columns = (parse_oid(IF_NAME_OID), parse_oid(IF_DESCR_OID))
+    for oid, value in var_binds:
+        if oid[:-1] in name_columns:
+            names_in_trap.setdefault(oid[-1], metric_safe_name(value.prettyPrint()))
+
+    metrics: List[MetricDataCreate] = []
+    for oid, value in var_binds:
+        metric_key = None
+        definition = scalars.get(oid)
+        if definition:
+            metric_key = definition["key"]
+        elif oid[:-1] in columns:
+            definition = columns[oid[:-1]]
+            if_index = oid[-1]
+            if_name = names_in_trap.get(if_index) or interface_names.lookup(target.host_id, if_index)
+            if not if_name:
+                print(f"SNMP trap from {target.name}: unknown ifIndex {if_index}, skipped until the next poll")
+                continue
+            metric_key = definition["key_template"].format(if_name=if_name)
+        if not metric_key:
+            continue
+
+        value_numeric: Optional[float] = None
+        value_text: Optional[str] = None
+        try:
+            value_numeric = float(value.prettyPrint())
+            if definition.get("divisor"):
+                value_numeric /= definition["divisor"]
+            if definition.get("data_type") == "numeric_timeticks":
+                value_numeric /= 100.0
+        except (ValueError, TypeError, AttributeError):
+            value_text = str(value.prettyPrint())
+        metrics.append(MetricDataCreate(
+            host_id=target.host_id, metric_key=metric_key,
+            value_numeric=value_numeric, value_text=value_text, timestamp=timestamp
+        ))
+    return metrics
+
+
+def _load_hosts_by_ip(db: Session) -> Dict[str, SnmpTarget]:
+    return {str(host.ip_address): SnmpTarget.from_host(host)
+            for host in crud.crud_host.get_pollable_snmp_hosts(db) if host.ip_address}
+
+
+def store_traps(db: Session, traps: List[PendingTrap]) -> int:
+    """Зіставляє trap-и з хостами за IP джерела і пише метрики звичайним пакетним шляхом запису SNMP."""
+    results: Dict[Any, SnmpPollResult] = {}
+    for source_ip, var_binds, received_at in traps:
+        target = host_ip_cache.lookup(source_ip, lambda: _load_hosts_by_ip(db))
+        if target is None:
+            print(f"SNMP trap from unknown source {source_ip} ignored")
+            continue
+        metrics = trap_to_metrics(target, var_binds, received_at)
+        if metrics:
+            results.setdefault(target.host_id, SnmpPollResult(target.host_id, "trap")).metrics.extend(metrics)
+    if not results:
+        return 0
+    return snmp_service.write_snmp_poll_results(db, list(results.values()))
+
+
+class SnmpTrapReceiver:
+    """
+    UDP-приймач SNMP trap/inform (v1/v2c) на стеку pysnmp. Колбек лише складає trap-и в буфер,
+    а фонова задача раз на SNMP_TRAP_FLUSH_INTERVAL_MS пише все накопичене однією транзакцією в потоці.
+    """
+
+    def __init__(self):
+        self._engine: Optional[engine.SnmpEngine] = None
+        self._receiver: Optional[ntfrcv.NotificationReceiver] = None
+        self._pending: List[PendingTrap] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _on_notification(self, snmp_engine, state_reference, context_engine_id, context_name, var_binds, cb_ctx):
+        _, transport_address = snmp_engine.message_dispatcher.get_transport_info(state_reference)
+        self._pending.append((
+            str(transport_address[0]),
+            [(tuple(oid), value) for oid, value in var_binds],
+            datetime.now(timezone.utc),
+        ))
+
+    def _flush(self, db_session_factory, traps: List[PendingTrap]) -> None:
+        db: Session = db_session_factory()
+        try:
+            store_traps(db, traps)
+        except Exception as e:
+            print(f"SNMP trap receiver: failed to store {len(traps)} traps: {e}")
+        finally:
+            db.close()
+
+    async def _run_flusher(self, db_session_factory) -> None:
+        while True:
+            await asyncio.sleep(settings.SNMP_TRAP_FLUSH_INTERVAL_MS / 1000.0)
+            if self._pending:
+                traps, self._pending = self._pending, []
+                await asyncio.to_thread(self._flush, db_session_factory, traps)
+
+    def start(self, db_session_factory) -> None:
+        if self._engine:
+            return
+        self._engine = engine.SnmpEngine()
+        config.add_transport(
+            self._engine, udp.DOMAIN_NAME,
+            udp.UdpTransport().open_server_mode((settings.SNMP_TRAP_HOST, settings.SNMP_TRAP_PORT))
+        )
+        for position, community in enumerate(c.strip() for c in settings.SNMP_TRAP_COMMUNITIES.split(",")):
+            if community:
+                config.add_v1_system(self._engine, f"trap-area-{position}", community)
+        self._receiver = ntfrcv.NotificationReceiver(self._engine, self._on_notification)
+        self._flush_task = asyncio.get_running_loop().create_task(self._run_flusher(db_session_factory))
+        print(f"SNMP trap receiver listening on {settings.SNMP_TRAP_HOST}:{settings.SNMP_TRAP_PORT}")
+
+    async def stop(self, db_session_factory) -> None:
+        if not self._engine:
+            return
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._receiver.close(self._engine)
+        self._engine.close_dispatcher()
+        self._engine = None
+        if self._pending:
+            traps, self._pending = self._pending, []
+            await asyncio.to_thread(self._flush, db_session_factory, traps)
+        print("SNMP trap receiver stopped.")
+
+
+snmp_trap_receiver = SnmpTrapReceiver()
@@ -1,86 +1,220 @@
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from datetime import datetime, timedelta, timezone
+import uuid
 
-from ..db import crud
+from ..db import crud, crud_async
 from ..db.models.host import Host
+from ..db.models.metric_latest import MetricLatest
+from ..db.models.trigger_config import TriggerConfig
 from ..db.models.enums import TriggerStatusEnum, HostAvailabilityStatusEnum
+from ..core.config import settings
 from ..predefined_data import TRIGGER_TEMPLATES_BY_KEY
+from ..schemas.metric_data import MetricDataCreate
+from ..cache.trigger_index import trigger_index
 
-def evaluate_triggers_for_host(db: Session, host: Host) -> Dict[str, Any]:
-    if not host.is_monitored or host.availability_status != HostAvailabilityStatusEnum.up:
-        trigger_configs = crud.crud_trigger_config.get_trigger_configs_by_host(db, host_id=host.id, is_enabled=True)
-        for tc in trigger_configs:
-            if tc.current_status != TriggerStatusEnum.unknown:
-                crud.crud_trigger_config.update_trigger_status(db, trigger_config_id=tc.id, new_status=TriggerStatusEnum.unknown)
-        return {"status": "skipped", "reason": "Host not monitored or not UP"}
+# Значення метрики старіше за цей інтервал вважається відсутнім
+METRIC_LOOKBACK = timedelta(minutes=5)
 
-    active_trigger_configs = crud.crud_trigger_config.get_trigger_configs_by_host(db, host_id=host.id, is_enabled=True)
-    evaluated_count = 0
-    problems_found = 0
 
-    for tc in active_trigger_configs:
+def _evaluate_trigger(
+    tc: TriggerConfig,
+    template: Optional[Dict[str, Any]],
+    latest_metric: Optional[MetricLatest],
+    lookback_time: datetime
+) -> Tuple[TriggerStatusEnum, Optional[str]]:
+    """Обчислює новий статус тригера в пам'яті. Повертає (статус, значення метрики для знімка)."""
+    if not template:
+        print(f"Warning: No template found for trigger key {tc.internal_trigger_key}")
+        return TriggerStatusEnum.unknown, None
+
+    if not latest_metric or latest_metric.timestamp < lookback_time:
+        return TriggerStatusEnum.unknown, "N/A (no recent data)"
+
+    current_metric_value_for_log = None
+    try:
+        if template["value_type"] == "numeric":
+            if latest_metric.value_numeric is None:
+                return TriggerStatusEnum.unknown, "N/A (numeric value missing)"
+            metric_value_to_check = float(latest_metric.value_numeric)
+            current_metric_value_for_log = str(metric_value_to_check)
+            threshold = float(tc.user_threshold_value)
+        else:
+            metric_value_to_check = latest_metric.value_text
+            current_metric_value_for_log = str(metric_value_to_check)
+            threshold = tc.user_threshold_value # Порівнюємо рядки як є
+
+        operator = template["default_operator"]
+
+        if operator == ">": problem_detected = metric_value_to_check > threshold
+        elif operator == "<": problem_detected = metric_value_to_check < threshold
+        elif operator == ">=": problem_detected = metric_value_to_check >= threshold
+        elif operator == "<=": problem_detected = metric_value_to_check <= threshold
+        elif operator == "==": problem_detected = metric_value_to_check == threshold
+        elif operator == "!=": problem_detected = metric_value_to_check != threshold
+        else:
+            return TriggerStatusEnum.unknown, current_metric_value_for_log
+
+    except (ValueError, TypeError) as e:
+        print(f"Error evaluating trigger {tc.id}: {e}")
+        return TriggerStatusEnum.unknown, "Error"
+
+    return (TriggerStatusEnum.problem if problem_detected else TriggerStatusEnum.ok), current_metric_value_for_log
+
+
+def _build_status_update(
+    tc: TriggerConfig,
+    new_status: TriggerStatusEnum,
+    current_metric_value: Optional[str],
+    now: datetime
+) -> Dict[str, Any]:
+    """
+    Рядок для пакетного UPDATE trigger_configs (та сама логіка, що й crud.update_trigger_status).
+    Усі рядки мають однаковий набір колонок, тому вся пачка йде одним executemany.
+    """
+    update = {
+        "id": tc.id,
+        "current_status": tc.current_status,
+        "last_status_change_at": tc.last_status_change_at,
+        "problem_started_at": tc.problem_started_at,
+        "current_metric_value_snapshot": tc.current_metric_value_snapshot,
+        "last_evaluated_at": now,
+    }
+    if tc.current_status != new_status:
+        update["current_status"] = new_status
+        update["last_status_change_at"] = now
+        if new_status == TriggerStatusEnum.problem:
+            update["problem_started_at"] = now
+            update["current_metric_value_snapshot"] = current_metric_value
+        elif tc.current_status == TriggerStatusEnum.problem and new_status == TriggerStatusEnum.ok:
+            update["current_metric_value_snapshot"] = current_metric_value
+    return update
+
+
+def _metric_keys_to_check(trigger_configs: List[TriggerConfig]) -> set:
+    metric_keys = set()
+    for tc in trigger_configs:
         template = TRIGGER_TEMPLATES_BY_KEY.get(tc.internal_trigger_key)
-        if not template:
-            print(f"Warning: No template found for trigger key {tc.internal_trigger_key}")
-            crud.crud_trigger_config.update_trigger_status(db, trigger_config_id=tc.id, new_status=TriggerStatusEnum.unknown)
-            continue
-
-        
-        lookback_time = datetime.now(timezone.utc) - timedelta(minutes=5)
-        latest_metrics = crud.crud_metric_data.get_metric_data_for_host(
-            db,
-            host_id=host.id,
-            metric_key=template["metric_key_to_check"],
-            start_time=lookback_time,
-            limit=1
-        )
-
-        if not latest_metrics:
-            crud.crud_trigger_config.update_trigger_status(db, trigger_config_id=tc.id, new_status=TriggerStatusEnum.unknown, current_metric_value="N/A (no recent data)")
-            continue
-
-        latest_metric = latest_metrics[0]
-        current_metric_value_for_log = None
-
-        problem_detected = False
-        try:
-            metric_value_to_check = None
-            if template["value_type"] == "numeric":
-                if latest_metric.value_numeric is not None:
-                    metric_value_to_check = float(latest_metric.value_numeric)
-                    current_metric_value_for_log = str(metric_value_to_check)
-                else:
-                     crud.crud_trigger_config.update_trigger_status(db, trigger_config_id=tc.id, new_status=TriggerStatusEnum.unknown, current_metric_value="N/A (numeric value missing)")
-                     continue
-                threshold = float(tc.user_threshold_value)
-            else:
-                metric_value_to_check = latest_metric.value_text
-                current_metric_value_for_log = str(metric_value_to_check)
-                threshold = tc.user_threshold_value # Порівнюємо рядки як є
-
-            operator = template["default_operator"]
-
-            if operator == ">": problem_detected = metric_value_to_check > threshold
-            elif operator == "<": problem_detected = metric_value_to_check < threshold
-            elif operator == ">=": problem_detected = metric_value_to_check >= threshold
-            elif operator == "<=": problem_detected = metric_value_to_check <= threshold
-            elif operator == "==": problem_detected = metric_value_to_check == threshold
-            elif operator == "!=": problem_detected = metric_value_to_check != threshold
-            else:
-                crud.crud_trigger_config.update_trigger_status(db, trigger_config_id=tc.id, new_status=TriggerStatusEnum.unknown, current_metric_value=current_metric_value_for_log)
-                continue
-
-        except (ValueError, TypeError) as e:
-            print(f"Error evaluating trigger {tc.id}: {e}")
-            crud.crud_trigger_config.update_trigger_status(db, trigger_config_id=tc.id, new_status=TriggerStatusEnum.unknown, current_metric_value="Error")
-            continue
-
-        new_status = TriggerStatusEnum.problem if problem_detected else TriggerStatusEnum.ok
-        crud.crud_trigger_config.update_trigger_status(db, trigger_config_id=tc.id, new_status=new_status, current_metric_value=current_metric_value_for_log)
+        if template:
+            metric_keys.add((tc.host_id, template["metric_key_to_check"]))
+    return metric_keys
+
+
+def _evaluate_batch(
+    trigger_configs: List[TriggerConfig],
+    latest_metrics: Dict[Tuple[uuid.UUID, str], MetricLatest]
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Оцінка пачки тригерів у пам'яті: (рядки для bulk UPDATE, підсумок)."""
+    now = datetime.now(timezone.utc)
+    lookback_time = now - METRIC_LOOKBACK
 
+    updates = []
+    problems_found = 0
+    status_changes = 0
+    for tc in trigger_configs:
+        template = TRIGGER_TEMPLATES_BY_KEY.get(tc.internal_trigger_key)
+        latest_metric = latest_metrics.get((tc.host_id, template["metric_key_to_check"])) if template else None
+        new_status, current_metric_value = _evaluate_trigger(tc, template, latest_metric, lookback_time)
         if new_status == TriggerStatusEnum.problem:
-            problems_found +=1
-        evaluated_count += 1
+            problems_found += 1
+        if new_status != tc.current_status:
+            status_changes += 1
+        updates.append(_build_status_update(tc, new_status, current_metric_value, now))
+    return updates, {"evaluated_count": len(updates), "problems_found": problems_found, "status_changes": status_changes}
 
-    return {"status": "triggers_evaluated", "host_id": host.id, "evaluated_count": evaluated_count, "problems_found": problems_found}
\ No newline at end of file
+
+def evaluate_trigger_configs(db: Session, trigger_configs: List[TriggerConfig]) -> Dict[str, Any]:
+    """
+    Пакетна оцінка тригерів: останні значення всіх потрібних метрик читаються одним запитом
+    з metric_latest, оцінка йде в пам'яті, а результати записуються одним bulk UPDATE в одній транзакції.
+    """
+    latest_metrics = crud.crud_metric_data.get_latest_metrics_for_keys(db, _metric_keys_to_check(trigger_configs))
+    updates, result = _evaluate_batch(trigger_configs, latest_metrics)
+    crud.crud_trigger_config.bulk_update_trigger_statuses(db, updates)
+    return result
+
+
+async def evaluate_trigger_configs_async(db: AsyncSession, trigger_configs: List[TriggerConfig]) -> Dict[str, Any]:
+    latest_metrics = await crud_async.crud_metric_data.get_latest_metrics_for_keys(
+        db, _metric_keys_to_check(trigger_configs)
+    )
+    updates, result = _evaluate_batch(trigger_configs, latest_metrics)
+    await crud_async.crud_trigger_config.bulk_update_trigger_statuses(db, updates)
+    return result
+
+
+def evaluate_all_triggers(db: Session) -> Dict[str, Any]:
+    """Оцінка всіх увімкнених тригерів усіх активних (monitored + up) хостів: два SELECT-и та один UPDATE."""
+    # Повний прохід заодно перебудовує індекс для подієвої оцінки (страховка від пропущених invalidate)
+    trigger_index.rebuild(crud.crud_trigger_config.get_enabled_trigger_keys(db))
+    trigger_configs = crud.crud_trigger_config.get_enabled_trigger_configs_for_active_hosts(db)
+    result = evaluate_trigger_configs(db, trigger_configs)
+    return {"status": "triggers_evaluated", **result}
+
+
+def evaluate_triggers_for_metric_keys(db: Session, keys: Iterable[Tuple[uuid.UUID, str]]) -> Dict[str, Any]:
+    """Переоцінює лише тригери, що перевіряють метрики з keys (пари host_id, metric_key)."""
+    if trigger_index.is_stale:
+        trigger_index.rebuild(crud.crud_trigger_config.get_enabled_trigger_keys(db))
+    trigger_ids = trigger_index.lookup(keys)
+    if not trigger_ids:
+        return {"evaluated_count": 0, "problems_found": 0, "status_changes": 0}
+    trigger_configs = crud.crud_trigger_config.get_enabled_trigger_configs_for_active_hosts(
+        db, trigger_ids=list(trigger_ids)
+    )
+    return evaluate_trigger_configs(db, trigger_configs)
+
+
+async def evaluate_triggers_for_metric_keys_async(
+    db: AsyncSession, keys: Iterable[Tuple[uuid.UUID, str]]
+) -> Dict[str, Any]:
+    if trigger_index.is_stale:
+        trigger_index.rebuild(await crud_async.crud_trigger_config.get_enabled_trigger_keys(db))
+    trigger_ids = trigger_index.lookup(keys)
+    if not trigger_ids:
+        return {"evaluated_count": 0, "problems_found": 0, "status_changes": 0}
+    trigger_configs = await crud_async.crud_trigger_config.get_enabled_trigger_configs_for_active_hosts(
+        db, trigger_ids=list(trigger_ids)
+    )
+    return await evaluate_trigger_configs_async(db, trigger_configs)
+
+
+def on_metrics_ingested(db: Session, metrics: List[MetricDataCreate]) -> None:
+    """
+    Хук після запису метрик (агенти, черга прийому, SNMP): в режимі TRIGGER_EVALUATION_MODE="event"
+    одразу переоцінює тригери, зачеплені новими значеннями. Помилки не ламають прийом даних.
+    """
+    if settings.TRIGGER_EVALUATION_MODE != "event" or not metrics:
+        return
+    try:
+        evaluate_triggers_for_metric_keys(db, {(m.host_id, m.metric_key) for m in metrics})
+    except Exception as e:
+        db.rollback()
+        print(f"Error in event-driven trigger evaluation: {e}")
+
+
+async def on_metrics_ingested_async(db: AsyncSession, metrics: List[MetricDataCreate]) -> None:
+    """Те саме, що on_metrics_ingested, для асинхронних шляхів запису."""
+    if settings.TRIGGER_EVALUATION_MODE != "event" or not metrics:
+        return
+    try:
+        await evaluate_triggers_for_metric_keys_async(db, {(m.host_id, m.metric_key) for m in metrics})
+    except Exception as e:
+        await db.rollback()
+        print(f"Error in event-driven trigger evaluation: {e}")
+
+
+def evaluate_triggers_for_host(db: Session, host: Host) -> Dict[str, Any]:
+    if not host.is_monitored or host.availability_status != HostAvailabilityStatusEnum.up:
+        now = datetime.now(timezone.utc)
+        trigger_configs = crud.crud_trigger_config.get_trigger_configs_by_host(db, host_id=host.id, is_enabled=True)
+        crud.crud_trigger_config.bulk_update_trigger_statuses(db, [
+            _build_status_update(tc, TriggerStatusEnum.unknown, None, now)
+            for tc in trigger_configs if tc.current_status != TriggerStatusEnum.unknown
+        ])
+        return {"status": "skipped", "reason": "Host not monitored or not UP"}
+
+    active_trigger_configs = crud.crud_trigger_config.get_trigger_configs_by_host(db, host_id=host.id, is_enabled=True)
+    result = evaluate_trigger_configs(db, active_trigger_configs)
+    return {"status": "triggers_evaluated", "host_id": host.id, **result}
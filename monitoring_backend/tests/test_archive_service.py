@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from app.core.config import settings
+from app.db import crud, crud_async
+from app.db.models.enums import HostTypeEnum
+from app.db.models.metric_archive import MetricArchiveFile
+from app.schemas.metric_data import MetricDataCreate
+from app.services import archive_service
+
+NOW = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+DAY = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRIC_ARCHIVE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _write(db, host, metric_key, timestamps, values=None, texts=None):
+    crud.crud_metric_data.create_multiple_metric_data(db, [
+        MetricDataCreate(
+            host_id=host.id, metric_key=metric_key, timestamp=ts,
+            value_numeric=values[i] if values else None, value_text=texts[i] if texts else None
+        )
+        for i, ts in enumerate(timestamps)
+    ], touch_hosts=False)
+
+
+def test_archive_export_and_read_back(db, make_host, archive_dir):
+    host = make_host("agent-1")
+    other = make_host("agent-2")
+    snmp = make_host("switch-1", host_type=HostTypeEnum.mikrotik_snmp)
+    day_times = [DAY + timedelta(minutes=10 * i) for i in range(144 * 2)]  # дві доби
+    _write(db, host, "cpu_usage", day_times, values=[float(i) for i in range(len(day_times))])
+    _write(db, host, "os_version", [DAY + timedelta(hours=1)], texts=["Windows 11"])
+    _write(db, other, "cpu_usage", day_times[:10], values=[-1.0] * 10)
+    _write(db, snmp, "if_in_octets", day_times[:5], values=[5.0] * 5)
+    # Частина історії вже в стисненому чанку
+    chunk_times = [DAY + timedelta(days=2, minutes=i) for i in range(30)]
+    crud.crud_metric_chunk.insert_metric_chunks(db, [crud.crud_metric_chunk.build_chunk_row(
+        host.id, crud.crud_metric_key.get_or_create_metric_key_ids(db, ["cpu_usage"])["cpu_usage"],
+        [(ts, 1000.0 + i) for i, ts in enumerate(chunk_times)]
+    )])
+    db.commit()
+
+    report = archive_service.archive_closed_days(db, now=NOW)
+
+    windows_files = sorted(p.name for p in (archive_dir / "windows_agent").iterdir())
+    assert windows_files == ["2026-03-01.parquet", "2026-03-02.parquet", "2026-03-03.parquet"]
+    assert sorted(p.name for p in (archive_dir / "mikrotik_snmp").iterdir()) == ["2026-03-01.parquet"]
+    assert report.rows_archived == len(day_times) + 1 + 10 + 5 + len(chunk_times)
+    # METRIC_ARCHIVE_MAX_DAYS_PER_RUN = 7 діб за запуск
+    assert crud.get_archive_watermark(db, "windows_agent") == DAY + timedelta(days=7)
+
+    first_day = db.get(MetricArchiveFile, ("windows_agent", DAY.date()))
+    assert first_day.row_count == 144 + 1 + 10
+    assert first_day.min_timestamp == DAY and first_day.max_timestamp == day_times[143]
+    assert first_day.min_value == -1.0 and first_day.max_value == 143.0
+
+    archived_until = crud.get_archive_watermark(db, "windows_agent")
+    paths = db.scalars(crud.crud_metric_archive.archive_file_paths_stmt(
+        "windows_agent", DAY, archived_until
+    )).all()
+    points = archive_service.read_archived_points(paths, host.id, "cpu_usage", DAY, archived_until, 5)
+    assert [(point.value_numeric, point.timestamp) for point in points] == [
+        (1000.0 + i, chunk_times[i]) for i in range(29, 24, -1)
+    ]
+    assert all(point.host_id == host.id and point.metric_key == "cpu_usage" for point in points)
+
+    texts = archive_service.read_archived_points(paths, host.id, "os_version", DAY, archived_until, 10)
+    assert [(point.value_numeric, point.value_text) for point in texts] == [(None, "Windows 11")]
+
+    # Межі читання: [start, end), чужі хости не потрапляють
+    window = archive_service.read_archived_points(
+        paths, other.id, None, day_times[2], day_times[5], 100
+    )
+    assert [point.timestamp for point in window] == [day_times[4], day_times[3], day_times[2]]
+
+
+def test_archive_resumes_from_watermark(db, make_host, archive_dir):
+    host = make_host("agent-1")
+    _write(db, host, "cpu_usage", [DAY + timedelta(days=d, hours=1) for d in range(5)], values=[1.0] * 5)
+    db.commit()
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "METRIC_ARCHIVE_MAX_DAYS_PER_RUN", 2)
+        first = archive_service.archive_closed_days(db, now=NOW)
+        second = archive_service.archive_closed_days(db, now=NOW)
+
+    assert len(first.files_written) == 2 and len(second.files_written) == 2
+    assert crud.get_archive_watermark(db, "windows_agent") == DAY + timedelta(days=4)
+    # Тип без даних одразу отримує watermark на межі архівації
+    assert crud.get_archive_watermark(db, "ubuntu_agent") == datetime(2026, 3, 9, tzinfo=timezone.utc)
+
+
+def test_metric_query_reads_archive_before_online_window(db, make_host, archive_dir, run_async, monkeypatch):
+    monkeypatch.setattr(settings, "METRIC_ARCHIVE_MAX_DAYS_PER_RUN", 100)
+    host = make_host("agent-1")
+    now = datetime.now(timezone.utc)
+    # Початок онлайн-вікна типу хоста (watermark архіву не обмежує)
+    online_since = archive_service.online_boundary("windows_agent", now, now)
+    old = [now - timedelta(days=60, hours=i) for i in range(3)]
+    recent = [now - timedelta(minutes=i) for i in range(3)]
+    _write(db, host, "cpu_usage", old + recent, values=[1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+    db.commit()
+    archive_service.archive_closed_days(db, now=now)
+    # Онлайн-копію старих діб прибрано - такі дані читаються лише з архіву
+    db.execute(crud.crud_metric_data.MetricData.__table__.delete().where(
+        crud.crud_metric_data.MetricData.timestamp < online_since
+    ))
+    db.commit()
+
+    async def query(session):
+        db_host = await crud_async.crud_host.get_host(session, host.id)
+        return await archive_service.get_metric_data_with_archive(
+            session, db_host, "cpu_usage", now - timedelta(days=90), None, 1, 4
+        )
+
+    points = run_async(query)
+
+    assert [point.value_numeric for point in points] == [5.0, 6.0, 1.0, 2.0]
+
+
+def test_retention_keeps_rows_not_yet_archived(db, make_host, archive_dir):
+    from app.services import retention_service
+
+    host = make_host("agent-1")
+    now = datetime.now(timezone.utc)
+    old = [now - timedelta(days=40, hours=i) for i in range(3)]
+    _write(db, host, "cpu_usage", old, values=[1.0, 2.0, 3.0])
+    db.commit()
+
+    retention_service.purge_expired_metrics(db, now=now)
+    assert len(crud.crud_metric_data.get_metric_data_for_host(db, host.id)) == 3
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "METRIC_ARCHIVE_MAX_DAYS_PER_RUN", 100)
+        archive_service.archive_closed_days(db, now=now)
+    retention_service.purge_expired_metrics(db, now=now)
+    assert crud.crud_metric_data.get_metric_data_for_host(db, host.id) == []
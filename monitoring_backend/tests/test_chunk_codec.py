@@ -0,0 +1,68 @@
+import math
+import random
+import struct
+
+import pytest
+
+from app.db.chunk_codec import ChunkFormatError, decode_chunk, encode_chunk
+
+START_US = 1_760_000_000_000_000
+STEP_US = 5_000_000
+
+
+def _bits(values):
+    # Порівняння за бітами: NaN != NaN, а -0.0 == 0.0 при звичайному порівнянні
+    return [struct.pack(">d", value) for value in values]
+
+
+def _assert_round_trip(timestamps, values):
+    decoded_timestamps, decoded_values = decode_chunk(encode_chunk(timestamps, values))
+    assert decoded_timestamps == list(timestamps)
+    assert _bits(decoded_values) == _bits(values)
+
+
+@pytest.mark.parametrize("timestamps, values", [
+    pytest.param([], [], id="empty"),
+    pytest.param([START_US], [42.0], id="single point"),
+    pytest.param([START_US], [math.nan], id="single NaN"),
+    pytest.param([1, 2, 3, 4, 5, 6], [math.nan, math.inf, -math.inf, -0.0, 0.0, math.nan], id="special floats"),
+    pytest.param([START_US + i * STEP_US for i in range(50)], [7.5] * 50, id="repeated values"),
+    pytest.param([START_US + i * STEP_US for i in range(6)], [1.0, 1.0, math.nan, math.nan, 1.0, 1.0], id="repeated NaN"),
+    pytest.param([10, 10, 5, 5, 100, -50], [1.0, 1.0, 2.0, 2.0, 2.0, 3.0], id="negative and zero deltas"),
+    pytest.param([-10**15, -10**15 + 1, 0], [1.0, 2.0, 3.0], id="before epoch"),
+    pytest.param(
+        [0, 10, 20, 50, 8_050, 508_050, 2_000_508_050, 2**62, 2**62 + 1, 0],
+        [1.0] * 10, id="delta-of-delta widths and 64-bit escape"
+    ),
+    pytest.param(
+        [START_US + i for i in range(8)],
+        [1e308, -1e308, 5e-324, -5e-324, 1.7976931348623157e308, 2.2250738585072014e-308, 1e-300, 1e300],
+        id="large and tiny exponents"
+    ),
+])
+def test_round_trip_edge_cases(timestamps, values):
+    _assert_round_trip(timestamps, values)
+
+
+def test_round_trip_irregular_series():
+    rng = random.Random(7)
+    timestamps, ts = [], START_US
+    for _ in range(5000):
+        ts += rng.choice([STEP_US, STEP_US + rng.randint(-3000, 3000), rng.randint(-10**6, 10**11)])
+        timestamps.append(ts)
+    values = [rng.choice([rng.random(), rng.uniform(-1e12, 1e12), float(rng.randint(0, 3)), math.nan])
+              for _ in timestamps]
+    _assert_round_trip(timestamps, values)
+
+
+def test_encode_rejects_mismatched_lengths():
+    with pytest.raises(ValueError):
+        encode_chunk([1, 2], [1.0])
+
+
+def test_decode_rejects_corrupt_data():
+    data = encode_chunk([START_US, START_US + STEP_US], [1.0, 2.0])
+    with pytest.raises(ChunkFormatError):
+        decode_chunk(bytes([data[0] + 1]) + data[1:])
+    with pytest.raises(ChunkFormatError):
+        decode_chunk(data[:-4])
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, text
+
+from app.db import crud
+from app.db.chunk_codec import decode_chunk, to_microseconds
+from app.db.models.metric_chunk import MetricChunk
+from app.schemas.metric_data import MetricDataCreate
+from app.services import compression_service, partition_service
+
+DAY = datetime(2026, 1, 5, tzinfo=timezone.utc)
+
+
+def test_compress_partition_packs_samples_and_drops_partition(db, make_host):
+    host = make_host("agent-1")
+    name = partition_service.create_partition(db, partition_service.partition_start(DAY))
+    db.commit()
+    timestamps = [DAY + timedelta(seconds=5 * i) for i in range(100)]
+    crud.crud_metric_data.create_multiple_metric_data(db, [
+        MetricDataCreate(host_id=host.id, metric_key="cpu_usage", value_numeric=float(i), timestamp=ts)
+        for i, ts in enumerate(timestamps)
+    ], touch_hosts=False)
+
+    partition = next(p for p in partition_service.list_partitions(db) if p.name == name)
+    report = compression_service.CompressReport()
+    compression_service.compress_partition(db, partition, report)
+    db.commit()
+
+    assert report.partitions_compressed == [name] and report.samples_packed == 100 and report.chunks_written == 1
+    assert db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None
+    chunk = db.scalars(select(MetricChunk)).one()
+    assert decode_chunk(chunk.data) == ([to_microseconds(ts) for ts in timestamps], [float(i) for i in range(100)])
+
+    points = crud.crud_metric_data.get_metric_data_for_host(db, host.id, "cpu_usage", skip=10, limit=5)
+    assert [point.value_numeric for point in points] == [89.0, 88.0, 87.0, 86.0, 85.0]
+
+
+
+def test_compress_partition_blocks_late_writes(db, make_host, pg_engine, monkeypatch):
+    """Запізнілий вимір, що пишеться між читанням партиції і DROP, не може потрапити в неї."""
+    from sqlalchemy.exc import OperationalError
+
+    host = make_host("agent-1")
+    key_id = crud.crud_metric_key.get_or_create_metric_key_ids(db, ["cpu_usage"])["cpu_usage"]
+    db.commit()
+    name = partition_service.create_partition(db, partition_service.partition_start(DAY))
+    db.commit()
+    partition = next(p for p in partition_service.list_partitions(db) if p.name == name)
+
+    late_write_errors = []
+    insert_metric_chunks = crud.crud_metric_chunk.insert_metric_chunks
+
+    def insert_chunks_after_late_write(session, chunk_rows):
+        with pg_engine.connect() as late_writer:
+            late_writer.execute(text("SET lock_timeout = '200ms'"))
+            try:
+                late_writer.execute(text(
+                    "INSERT INTO metric_data (host_id, metric_key_id, timestamp, value_numeric) "
+                    "VALUES (:host_id, :key_id, :ts, 1)"
+                ), {"host_id": host.id, "key_id": key_id, "ts": DAY + timedelta(hours=1)})
+                late_writer.commit()
+            except OperationalError as e:
+                late_write_errors.append(e)
+        insert_metric_chunks(session, chunk_rows)
+
+    monkeypatch.setattr(crud.crud_metric_chunk, "insert_metric_chunks", insert_chunks_after_late_write)
+    compression_service.compress_partition(db, partition, compression_service.CompressReport())
+    db.rollback()
+
+    assert len(late_write_errors) == 1 and "lock timeout" in str(late_write_errors[0])
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, text
+
+from app.db import crud, crud_async
+from app.db.models.enums import HostAvailabilityStatusEnum
+from app.schemas.metric_data import MetricDataCreate
+
+SEEN_AT = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+def test_update_hosts_last_metric_at_marks_hosts_up(db, make_host):
+    host = make_host("agent-1")
+    pending = make_host("agent-2", status=HostAvailabilityStatusEnum.pending_approval)
+
+    crud.crud_host.update_hosts_last_metric_at(db, [host.id, pending.id], seen_at=SEEN_AT)
+
+    db.expire_all()
+    assert host.availability_status == HostAvailabilityStatusEnum.up
+    assert host.last_metric_at == SEEN_AT
+    assert pending.availability_status == HostAvailabilityStatusEnum.pending_approval
+    assert pending.last_metric_at == SEEN_AT
+
+
+def test_update_hosts_last_metric_at_async(db, make_host, run_async):
+    host = make_host("agent-1")
+
+    run_async(lambda session: crud_async.crud_host.update_hosts_last_metric_at(session, [host.id], seen_at=SEEN_AT))
+
+    db.expire_all()
+    assert host.availability_status == HostAvailabilityStatusEnum.up
+    assert host.last_metric_at == SEEN_AT
+
+
+def test_create_multiple_metric_data_touches_hosts(db, make_host):
+    host = make_host("switch-1")
+    metrics = [
+        MetricDataCreate(host_id=host.id, metric_key="cpu_usage", value_numeric=12.5, timestamp=SEEN_AT),
+        MetricDataCreate(host_id=host.id, metric_key="sys_descr", value_text="switch", timestamp=SEEN_AT),
+    ]
+
+    assert crud.crud_metric_data.create_multiple_metric_data(db, metrics, touch_hosts=True) == 2
+
+    db.expire_all()
+    assert host.availability_status == HostAvailabilityStatusEnum.up
+    points = crud.crud_metric_data.get_metric_data_for_host(db, host.id)
+    assert sorted((point.metric_key, point.value_numeric, point.value_text) for point in points) == [
+        ("cpu_usage", 12.5, None), ("sys_descr", None, "switch"),
+    ]
+
+
+def test_apply_host_heartbeats_marks_agent_up(db, make_host):
+    host = make_host("agent-1")
+    pending = make_host("agent-2", status=HostAvailabilityStatusEnum.pending_approval)
+
+    crud.crud_host.apply_host_heartbeats(db, {host.id: SEEN_AT, pending.id: SEEN_AT})
+
+    db.expire_all()
+    assert host.availability_status == HostAvailabilityStatusEnum.up
+    assert host.last_metric_at == SEEN_AT
+    assert pending.availability_status == HostAvailabilityStatusEnum.pending_approval
+
+
+def test_apply_host_heartbeats_never_moves_last_metric_at_back(db, make_host):
+    host = make_host("agent-1", last_metric_at=SEEN_AT)
+
+    crud.crud_host.apply_host_heartbeats(db, {host.id: datetime(2026, 10, 18, 11, 0, tzinfo=timezone.utc)})
+
+    db.expire_all()
+    assert host.last_metric_at == SEEN_AT
+
+
+def test_apply_host_heartbeats_async(db, make_host, run_async):
+    host = make_host("agent-1")
+
+    run_async(lambda session: crud_async.crud_host.apply_host_heartbeats(session, {host.id: SEEN_AT}))
+
+    db.expire_all()
+    assert host.availability_status == HostAvailabilityStatusEnum.up
+    assert host.last_metric_at == SEEN_AT
+
+
+def test_heartbeat_flush_job_drains_tracker(db, make_host):
+    from app.background_tasks.jobs.heartbeat_flush_job import flush_agent_heartbeats_job
+    from app.cache.heartbeat_tracker import heartbeat_tracker
+    from app.db.database import SessionLocal
+
+    host = make_host("agent-1")
+    heartbeat_tracker.beat([host.id], seen_at=SEEN_AT)
+
+    flush_agent_heartbeats_job(SessionLocal)
+
+    assert len(heartbeat_tracker) == 0
+    db.expire_all()
+    assert host.availability_status == HostAvailabilityStatusEnum.up
+
+
+def test_mark_stale_agents(db, make_host):
+    from datetime import timedelta
+    from app.db.models.enums import HostTypeEnum
+
+    now = datetime.now(timezone.utc)
+    stale = make_host("agent-stale", status=HostAvailabilityStatusEnum.up, last_metric_at=now - timedelta(minutes=10))
+    silent = make_host("agent-silent", status=HostAvailabilityStatusEnum.up)
+    fresh = make_host("agent-fresh", status=HostAvailabilityStatusEnum.up, last_metric_at=now)
+    own_timeout = make_host(
+        "agent-slow", status=HostAvailabilityStatusEnum.up, last_metric_at=now - timedelta(minutes=10),
+        agent_timeout_seconds=3600
+    )
+    switch = make_host(
+        "switch-1", host_type=HostTypeEnum.mikrotik_snmp, status=HostAvailabilityStatusEnum.up,
+        last_metric_at=now - timedelta(minutes=10)
+    )
+
+    changed = crud.crud_host.mark_stale_agents(db, default_timeout_seconds=180)
+
+    assert {(host_id, status) for host_id, _, status in changed} == {
+        (stale.id, HostAvailabilityStatusEnum.down), (silent.id, HostAvailabilityStatusEnum.unknown),
+    }
+    db.expire_all()
+    assert stale.availability_status == HostAvailabilityStatusEnum.down
+    assert silent.availability_status == HostAvailabilityStatusEnum.unknown
+    for host in (fresh, own_timeout, switch):
+        assert host.availability_status == HostAvailabilityStatusEnum.up
+
+
+def test_delete_host_leaves_metrics_to_on_delete_cascade(db, make_host):
+    host = make_host("switch-1")
+    metrics = [
+        MetricDataCreate(host_id=host.id, metric_key="cpu_usage", value_numeric=12.5, timestamp=SEEN_AT),
+        MetricDataCreate(host_id=host.id, metric_key="sys_descr", value_text="switch", timestamp=SEEN_AT),
+    ]
+    crud.crud_metric_data.create_multiple_metric_data(db, metrics)
+    crud.crud_metric_rollup.aggregate_raw_into_rollups(db, 300, SEEN_AT, SEEN_AT + timedelta(minutes=5))
+    db.commit()
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    try:
+        crud.crud_host.delete_host(db, host.id)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", record)
+
+    # Дочірні рядки не завантажуються в сесію - їх видаляє ON DELETE CASCADE
+    tables = ("metric_data", "metric_text_samples", "metric_latest", "metric_rollups")
+    assert not [sql for sql in statements if sql.lstrip().startswith("SELECT") and any(f"FROM {t} " in sql for t in tables)]
+    for table in tables:
+        assert db.execute(text(f"SELECT count(*) FROM {table}")).scalar() == 0
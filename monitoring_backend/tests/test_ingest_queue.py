@@ -0,0 +1,109 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.db import crud
+from app.schemas.metric_data import MetricDataCreate
+from app.services import ingest_queue as ingest_queue_module
+from app.services.ingest_queue import IngestQueueFullError, MetricIngestQueue
+
+SEEN_AT = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+def _metrics(host_id, count, metric_key="cpu_usage"):
+    return [
+        MetricDataCreate(host_id=host_id, metric_key=metric_key, value_numeric=float(i), timestamp=SEEN_AT + timedelta(seconds=i))
+        for i in range(count)
+    ]
+
+
+class _FakeSession:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def no_triggers(monkeypatch):
+    monkeypatch.setattr(ingest_queue_module.trigger_evaluation_service, "on_metrics_ingested", lambda db, batch: None)
+
+
+def test_transient_errors_are_retried_then_dropped(monkeypatch, no_triggers):
+    calls = []
+
+    def failing_write(db, metrics_in, touch_hosts):
+        calls.append(len(metrics_in))
+        raise OperationalError("INSERT", {}, Exception("connection refused"))
+
+    monkeypatch.setattr(crud.crud_metric_data, "create_multiple_metric_data", failing_write)
+    queue = MetricIngestQueue(max_rows=100, flush_interval_ms=500, flush_max_rows=50, max_retries=2)
+    queue.submit(_metrics(uuid.uuid4(), 5))
+
+    assert queue.flush(_FakeSession) == 0 and len(queue) == 5
+    assert queue.flush(_FakeSession) == 0 and len(queue) == 5
+    assert queue.flush(_FakeSession) == 0 and len(queue) == 0  # третя невдала спроба - пачку відкинуто
+    assert calls == [5, 5, 5]
+
+
+def test_retried_batch_keeps_its_attempts_apart_from_new_rows(monkeypatch, no_triggers):
+    written = []
+    outcomes = iter(["fail", "ok", "ok"])
+
+    def flaky_write(db, metrics_in, touch_hosts):
+        if next(outcomes) == "fail":
+            raise OperationalError("INSERT", {}, Exception("server closed the connection"))
+        written.append(len(metrics_in))
+        return len(metrics_in)
+
+    monkeypatch.setattr(crud.crud_metric_data, "create_multiple_metric_data", flaky_write)
+    queue = MetricIngestQueue(max_rows=100, flush_interval_ms=500, flush_max_rows=50, max_retries=1)
+    queue.submit(_metrics(uuid.uuid4(), 3))
+    queue.flush(_FakeSession)
+    queue.submit(_metrics(uuid.uuid4(), 4))
+
+    assert queue.flush(_FakeSession) == 7
+    assert written == [3, 4] and len(queue) == 0
+
+
+def test_requeued_rows_count_towards_capacity(monkeypatch, no_triggers):
+    def failing_write(db, metrics_in, touch_hosts):
+        raise OperationalError("INSERT", {}, Exception("timeout"))
+
+    monkeypatch.setattr(crud.crud_metric_data, "create_multiple_metric_data", failing_write)
+    queue = MetricIngestQueue(max_rows=10, flush_interval_ms=500, flush_max_rows=50)
+    queue.submit(_metrics(uuid.uuid4(), 8))
+    queue.flush(_FakeSession)
+
+    with pytest.raises(IngestQueueFullError):
+        queue.submit(_metrics(uuid.uuid4(), 3))
+
+
+def test_rows_of_deleted_host_do_not_block_the_queue(db, make_host, no_triggers):
+    from app.db.database import SessionLocal
+
+    host = make_host("agent-1")
+    deleted_host_id = uuid.uuid4()
+    queue = MetricIngestQueue(max_rows=100, flush_interval_ms=500, flush_max_rows=50)
+    queue.submit(_metrics(host.id, 3) + _metrics(deleted_host_id, 4))
+
+    assert queue.flush(SessionLocal) == 3
+    assert len(queue) == 0
+    assert len(crud.crud_metric_data.get_metric_data_for_host(db, host.id)) == 3
+
+    queue.submit(_metrics(host.id, 2, metric_key="memory_usage"))
+    assert queue.flush(SessionLocal) == 2
+
+
+def test_only_the_bad_row_is_dropped(db, make_host, no_triggers):
+    from app.db.database import SessionLocal
+
+    host = make_host("agent-1")
+    queue = MetricIngestQueue(max_rows=100, flush_interval_ms=500, flush_max_rows=50)
+    # Ключ довший за String(255) - DataError лише для цього рядка
+    queue.submit(_metrics(host.id, 5) + _metrics(host.id, 1, metric_key="x" * 300) + _metrics(host.id, 2, "memory_usage"))
+
+    assert queue.flush(SessionLocal) == 7
+    assert len(queue) == 0
+    keys = {point.metric_key for point in crud.crud_metric_data.get_metric_data_for_host(db, host.id)}
+    assert keys == {"cpu_usage", "memory_usage"}
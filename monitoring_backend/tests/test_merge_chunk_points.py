@@ -0,0 +1,91 @@
+import random
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.db.chunk_codec import encode_chunk, to_microseconds
+from app.db.crud.crud_metric_data import MetricPoint, merge_chunk_points
+
+HOST_ID = uuid.uuid4()
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+ChunkRow = namedtuple("ChunkRow", "metric_key end_time data")
+
+
+def _chunk(metric_key, timestamps, values):
+    timestamps_us = [to_microseconds(ts) for ts in timestamps]
+    return ChunkRow(metric_key, timestamps[-1], encode_chunk(timestamps_us, values))
+
+
+def _series(offset_seconds, points, step_seconds=60):
+    return [START + timedelta(seconds=offset_seconds + i * step_seconds) for i in range(points)]
+
+
+def _expected(raw_points, chunk_points, start_time, end_time, skip, limit):
+    in_range = [
+        point for point in chunk_points
+        if (start_time is None or point.timestamp >= start_time) and (end_time is None or point.timestamp <= end_time)
+    ]
+    merged = sorted(raw_points + in_range, key=lambda point: point.timestamp, reverse=True)
+    return [(point.metric_key, point.value_numeric, point.timestamp) for point in merged[skip:skip + limit]]
+
+
+def _key(points):
+    return [(point.metric_key, point.value_numeric, point.timestamp) for point in points]
+
+
+def test_without_chunks_returns_raw_page():
+    raw = [MetricPoint(HOST_ID, "cpu", float(i), None, ts) for i, ts in enumerate(reversed(_series(0, 5)))]
+    assert merge_chunk_points(HOST_ID, raw, [], None, None, 1, 2) == raw[1:3]
+
+
+def test_merges_raw_rows_and_chunks_newest_first():
+    chunk_times = _series(0, 10)
+    raw_times = _series(600, 3)
+    raw = [MetricPoint(HOST_ID, "cpu", 100.0 + i, None, ts) for i, ts in reversed(list(enumerate(raw_times)))]
+    chunk = _chunk("cpu", chunk_times, [float(i) for i in range(10)])
+
+    result = merge_chunk_points(HOST_ID, raw, [chunk], None, None, 0, 5)
+
+    assert [point.value_numeric for point in result] == [102.0, 101.0, 100.0, 9.0, 8.0]
+    assert all(point.host_id == HOST_ID and point.value_text is None for point in result)
+
+
+def test_filters_chunk_points_by_inclusive_range():
+    chunk = _chunk("cpu", _series(0, 10), [float(i) for i in range(10)])
+    start_time, end_time = START + timedelta(minutes=2), START + timedelta(minutes=5)
+
+    result = merge_chunk_points(HOST_ID, [], [chunk], start_time, end_time, 0, 100)
+
+    assert [point.value_numeric for point in result] == [5.0, 4.0, 3.0, 2.0]
+
+
+def test_naive_bounds_are_treated_as_utc():
+    chunk = _chunk("cpu", _series(0, 10), [float(i) for i in range(10)])
+    result = merge_chunk_points(HOST_ID, [], [chunk], datetime(2026, 1, 1, 0, 8), None, 0, 100)
+    assert [point.value_numeric for point in result] == [9.0, 8.0]
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_matches_full_merge_with_early_stop(seed):
+    """Рання зупинка декодування не змінює результат порівняно з повним злиттям усіх чанків."""
+    rng = random.Random(seed)
+    chunks, chunk_points = [], []
+    for index in range(rng.randint(1, 8)):
+        # Чанки різних ключів можуть перекриватися в часі
+        timestamps = _series(rng.randint(0, 20_000), rng.randint(1, 40), step_seconds=rng.randint(1, 120))
+        values = [float(rng.randint(0, 1000)) for _ in timestamps]
+        chunk = _chunk(f"key{index}", timestamps, values)
+        chunks.append(chunk)
+        chunk_points += [MetricPoint(HOST_ID, chunk.metric_key, value, None, ts) for ts, value in zip(timestamps, values)]
+    chunks.sort(key=lambda chunk: chunk.end_time, reverse=True)
+    raw_times = sorted(_series(rng.randint(0, 30_000), rng.randint(0, 20), step_seconds=7), reverse=True)
+    raw = [MetricPoint(HOST_ID, "raw", float(i), None, ts) for i, ts in enumerate(raw_times)]
+    start_time = rng.choice([None, START + timedelta(seconds=rng.randint(0, 10_000))])
+    end_time = rng.choice([None, START + timedelta(seconds=rng.randint(10_000, 40_000))])
+    skip, limit = rng.randint(0, 10), rng.randint(1, 30)
+
+    result = merge_chunk_points(HOST_ID, raw, chunks, start_time, end_time, skip, limit)
+
+    assert _key(result) == _expected(raw, chunk_points, start_time, end_time, skip, limit)
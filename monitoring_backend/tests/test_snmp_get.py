@@ -0,0 +1,71 @@
+import asyncio
+
+from pysnmp.proto.rfc1902 import Integer, ObjectName
+from pysnmp.proto.rfc1905 import NoSuchInstance
+
+from app.services import snmp_service
+
+CPU_LOAD = ".1.3.6.1.2.1.25.3.3.1.2.1"
+MEMORY_USED = ".1.3.6.1.2.1.25.2.3.1.6.65536"
+UPTIME = ".1.3.6.1.2.1.1.3.0"
+NO_SUCH_NAME = Integer(2)
+TOO_BIG = Integer(1)
+
+
+def _get(monkeypatch, oids, agent):
+    """_get_oid_values з підміненим get_cmd: agent(список OID-ів запиту) -> (errorStatus, errorIndex, значення)."""
+    requests = []
+
+    async def fake_get_cmd(engine, community, transport, context, *var_binds, **kwargs):
+        requests.append(list(var_binds))
+        error_status, error_index, values = agent(list(var_binds))
+        var_bind_rows = [(ObjectName(oid.strip(".")), value) for oid, value in zip(var_binds, values)]
+        return None, error_status, error_index, var_bind_rows
+
+    monkeypatch.setattr(snmp_service, "get_cmd", fake_get_cmd)
+    monkeypatch.setattr(snmp_service, "ObjectType", lambda identity: identity)
+    monkeypatch.setattr(snmp_service, "ObjectIdentity", str)
+    values, errors = asyncio.run(snmp_service._get_oid_values(None, None, None, None, oids, "router-1"))
+    return values, errors, requests
+
+
+def _v1_agent(missing):
+    # SNMPv1: відсутній OID відхиляє весь PDU з noSuchName і errorIndex (з 1) цього OID-а
+    def agent(oids):
+        for position, oid in enumerate(oids):
+            if oid in missing:
+                return NO_SUCH_NAME, position + 1, []
+        return 0, 0, [Integer(position + 10) for position in range(len(oids))]
+    return agent
+
+
+def test_error_index_drops_only_the_failing_oid(monkeypatch):
+    values, errors, requests = _get(monkeypatch, [CPU_LOAD, MEMORY_USED, UPTIME], _v1_agent({MEMORY_USED}))
+
+    assert errors == 1
+    assert set(values) == {CPU_LOAD, UPTIME}
+    assert requests == [[CPU_LOAD, MEMORY_USED, UPTIME], [CPU_LOAD, UPTIME], [MEMORY_USED]]
+
+
+def test_error_without_index_retries_every_oid_alone(monkeypatch):
+    def agent(oids):
+        if len(oids) > 1:
+            return TOO_BIG, 0, []
+        return 0, 0, [Integer(10)]
+
+    values, errors, requests = _get(monkeypatch, [CPU_LOAD, UPTIME], agent)
+
+    assert errors == 0
+    assert set(values) == {CPU_LOAD, UPTIME}
+    assert requests == [[CPU_LOAD, UPTIME], [CPU_LOAD], [UPTIME]]
+
+
+def test_missing_oid_in_v2c_varbind_keeps_the_rest_of_the_pdu(monkeypatch):
+    def agent(oids):
+        return 0, 0, [NoSuchInstance() if oid == MEMORY_USED else Integer(10) for oid in oids]
+
+    values, errors, requests = _get(monkeypatch, [CPU_LOAD, MEMORY_USED, UPTIME], agent)
+
+    assert errors == 1
+    assert set(values) == {CPU_LOAD, UPTIME}
+    assert len(requests) == 1
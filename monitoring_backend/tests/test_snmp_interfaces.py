@@ -0,0 +1,106 @@
+import asyncio
+import uuid
+
+from pysnmp.proto.rfc1902 import Integer, ObjectName
+from pysnmp.proto.rfc1905 import EndOfMibView
+
+from app.services import snmp_interfaces
+from app.services.snmp_interfaces import COUNTER64_MAX, CounterRateStore, bulk_walk_columns
+
+HOST_ID = uuid.uuid4()
+IF_IN_OCTETS = ".1.3.6.1.2.1.31.1.1.1.6"
+IF_OUT_OCTETS = ".1.3.6.1.2.1.31.1.1.1.10"
+NEXT_COLUMN = ".1.3.6.1.2.1.31.1.1.1.11"
+
+
+def test_first_sample_has_no_rate():
+    rates = CounterRateStore()
+    assert rates.rate(HOST_ID, "if_in", 1000, ts=10.0) is None
+    assert rates.rate(HOST_ID, "if_in", 1500, ts=15.0) == 100.0
+
+
+def test_counter64_wrap_counts_across_the_boundary():
+    rates = CounterRateStore()
+    rates.rate(HOST_ID, "if_in", COUNTER64_MAX - 100, ts=10.0)
+    assert rates.rate(HOST_ID, "if_in", 400, ts=15.0) == 100.0
+
+
+def test_counter_reset_is_skipped_and_restarts_from_new_value():
+    rates = CounterRateStore()
+    rates.rate(HOST_ID, "if_in", 5_000_000, ts=10.0)
+    assert rates.rate(HOST_ID, "if_in", 200, ts=15.0) is None  # перезавантаження пристрою
+    assert rates.rate(HOST_ID, "if_in", 700, ts=20.0) == 100.0
+
+
+def test_non_positive_elapsed_gives_no_rate():
+    rates = CounterRateStore()
+    rates.rate(HOST_ID, "if_in", 1000, ts=10.0)
+    assert rates.rate(HOST_ID, "if_in", 2000, ts=10.0) is None
+    assert rates.rate(HOST_ID, "if_in", 3000, ts=9.0) is None
+
+
+def test_forget_missing_drops_previous_samples():
+    rates = CounterRateStore()
+    rates.rate(HOST_ID, "if_in", 1000, ts=10.0)
+    rates.forget_missing(set())
+    assert rates.rate(HOST_ID, "if_in", 2000, ts=15.0) is None
+
+
+def _varbind(oid, value):
+    return ObjectName(oid.strip(".")), value
+
+
+def _walk(monkeypatch, responses, column_oids):
+    """bulk_walk_columns з підміненим bulk_cmd: кожен запит отримує наступну відповідь зі списку, varbind-и запиту - рядки OID."""
+    requests = []
+    pending = iter(responses)
+
+    async def fake_bulk_cmd(engine, community, transport, context, non_repeaters, max_repetitions, *var_binds, **kwargs):
+        requests.append(list(var_binds))
+        return None, 0, 0, next(pending)
+
+    monkeypatch.setattr(snmp_interfaces, "bulk_cmd", fake_bulk_cmd)
+    monkeypatch.setattr(snmp_interfaces, "ObjectType", lambda identity: identity)
+    monkeypatch.setattr(snmp_interfaces, "ObjectIdentity", str)
+    table, errors = asyncio.run(bulk_walk_columns(None, None, None, None, column_oids, "switch-1"))
+    return table, errors, requests
+
+
+def test_walk_stops_each_column_on_prefix_change(monkeypatch):
+    responses = [
+        [
+            _varbind(f"{IF_IN_OCTETS}.1", Integer(10)), _varbind(f"{IF_OUT_OCTETS}.1", Integer(20)),
+            _varbind(f"{IF_IN_OCTETS}.2", Integer(11)), _varbind(f"{IF_OUT_OCTETS}.2", Integer(21)),
+        ],
+        [
+            # ifOutOctets закінчилась (наступна колонка), ifInOctets ще має рядок
+            _varbind(f"{IF_IN_OCTETS}.3", Integer(12)), _varbind(f"{NEXT_COLUMN}.1", Integer(0)),
+        ],
+        [_varbind(".1.3.6.1.2.1.31.1.1.1.7.1", Integer(0))],  # ifInUcastPkts - кінець ifInOctets
+    ]
+    table, errors, requests = _walk(monkeypatch, responses, [IF_IN_OCTETS, IF_OUT_OCTETS])
+
+    assert errors == 0
+    assert table == {IF_IN_OCTETS: {1: 10, 2: 11, 3: 12}, IF_OUT_OCTETS: {1: 20, 2: 21}}
+    # Завершена колонка більше не запитується
+    assert requests[2] == [f"{IF_IN_OCTETS}.3"]
+
+
+def test_walk_stops_on_end_of_mib_view(monkeypatch):
+    responses = [[_varbind(f"{IF_IN_OCTETS}.1", Integer(10)), _varbind(f"{IF_IN_OCTETS}.2", EndOfMibView())]]
+    table, errors, requests = _walk(monkeypatch, responses, [IF_IN_OCTETS])
+
+    assert errors == 0 and len(requests) == 1
+    assert table == {IF_IN_OCTETS: {1: 10}}
+
+
+def test_walk_stops_when_agent_makes_no_progress(monkeypatch):
+    # Агент повертає той самий OID, що й курсор - без перевірки обхід зациклився б
+    responses = [
+        [_varbind(f"{IF_IN_OCTETS}.1", Integer(10))],
+        [_varbind(f"{IF_IN_OCTETS}.1", Integer(10))],
+    ]
+    table, errors, requests = _walk(monkeypatch, responses, [IF_IN_OCTETS])
+
+    assert errors == 0 and len(requests) == 2
+    assert table == {IF_IN_OCTETS: {1: 10}}
@@ -0,0 +1,54 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.cache.snmp_target_cache import snmp_target_cache
+from app.db import crud
+from app.db.models.enums import HostAvailabilityStatusEnum, HostTypeEnum
+from app.schemas.metric_data import MetricDataCreate
+from app.services import snmp_service
+from app.services.snmp_service import SnmpPollResult
+
+SEEN_AT = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+def _result(host_id):
+    metrics = [MetricDataCreate(host_id=host_id, metric_key="cpu_usage", value_numeric=12.5, timestamp=SEEN_AT)]
+    return SnmpPollResult(host_id, "success", metrics=metrics)
+
+
+@pytest.fixture
+def no_triggers(monkeypatch):
+    monkeypatch.setattr(snmp_service.trigger_evaluation_service, "on_metrics_ingested", lambda db, metrics: None)
+
+    async def no_async_triggers(db, metrics):
+        return None
+    monkeypatch.setattr(snmp_service.trigger_evaluation_service, "on_metrics_ingested_async", no_async_triggers)
+
+
+def test_deleted_host_does_not_lose_results_of_others(db, make_host, no_triggers):
+    host = make_host("switch-1", host_type=HostTypeEnum.mikrotik_snmp)
+    results = [_result(uuid.uuid4()), _result(host.id)]
+
+    assert snmp_service.write_snmp_poll_results(db, results) == 1
+    assert len(crud.crud_metric_data.get_metric_data_for_host(db, host.id)) == 1
+
+
+def test_deleted_host_does_not_lose_results_of_others_async(db, make_host, run_async, no_triggers):
+    host = make_host("switch-1", host_type=HostTypeEnum.mikrotik_snmp)
+    results = [_result(host.id), _result(uuid.uuid4())]
+
+    assert run_async(lambda session: snmp_service.write_snmp_poll_results_async(session, results)) == 1
+    assert len(crud.crud_metric_data.get_metric_data_for_host(db, host.id)) == 1
+    db.expire_all()
+    assert host.availability_status == HostAvailabilityStatusEnum.up
+
+
+def test_host_changes_reset_snmp_targets(db, make_host):
+    host = make_host("switch-1", host_type=HostTypeEnum.mikrotik_snmp)
+    snmp_target_cache.set([object()])
+
+    crud.crud_host.delete_host(db, host.id)
+
+    assert snmp_target_cache.get() is None
@@ -0,0 +1,54 @@
+import uuid
+
+from app.services.snmp_schedule import PollSchedule, poll_offset
+
+INTERVAL = 60
+# Зсув = host_id.int % (interval * 1000) / 1000 - 30.5 с у межах хвилинного інтервалу
+HOST_ID = uuid.UUID(int=30_500)
+SLOT_START = 1_760_000_040 + 30.5
+
+
+def test_offset_is_stable_and_within_interval():
+    assert poll_offset(HOST_ID, INTERVAL) == 30.5
+    assert 0 <= poll_offset(uuid.uuid4(), INTERVAL) < INTERVAL
+
+
+def test_new_host_waits_for_its_next_slot():
+    schedule = PollSchedule()
+    assert not schedule.is_due(HOST_ID, INTERVAL, SLOT_START + 10)
+    assert not schedule.is_due(HOST_ID, INTERVAL, SLOT_START + 59.9)
+    assert schedule.is_due(HOST_ID, INTERVAL, SLOT_START + INTERVAL)
+
+
+def test_slot_fires_once_however_many_ticks_fall_in_it():
+    schedule = PollSchedule()
+    schedule.is_due(HOST_ID, INTERVAL, SLOT_START)
+    fired = [schedule.is_due(HOST_ID, INTERVAL, SLOT_START + INTERVAL + tick) for tick in range(0, INTERVAL, 5)]
+    assert fired.count(True) == 1 and fired[0]
+
+
+def test_missed_slots_fire_once():
+    schedule = PollSchedule()
+    schedule.is_due(HOST_ID, INTERVAL, SLOT_START)
+    assert schedule.is_due(HOST_ID, INTERVAL, SLOT_START + 5 * INTERVAL)
+    assert not schedule.is_due(HOST_ID, INTERVAL, SLOT_START + 5 * INTERVAL + 1)
+
+
+def test_intervals_of_one_host_are_scheduled_separately():
+    schedule = PollSchedule()
+    schedule.is_due(HOST_ID, INTERVAL, SLOT_START)
+    schedule.is_due(HOST_ID, 3600, SLOT_START)
+    assert schedule.is_due(HOST_ID, INTERVAL, SLOT_START + INTERVAL)
+    assert not schedule.is_due(HOST_ID, 3600, SLOT_START + INTERVAL)
+
+
+def test_forget_missing_makes_returning_host_wait_again():
+    schedule = PollSchedule()
+    other_host_id = uuid.UUID(int=10_000)
+    schedule.is_due(HOST_ID, INTERVAL, SLOT_START)
+    schedule.is_due(other_host_id, INTERVAL, SLOT_START)
+
+    schedule.forget_missing({other_host_id})
+
+    assert not schedule.is_due(HOST_ID, INTERVAL, SLOT_START + INTERVAL)
+    assert schedule.is_due(other_host_id, INTERVAL, SLOT_START + INTERVAL)
@@ -0,0 +1,70 @@
+import uuid
+from datetime import datetime, timezone
+
+from pysnmp.proto.rfc1902 import Integer, OctetString, TimeTicks
+
+from app.db.models.enums import HostTypeEnum
+from app.services import snmp_trap_service
+from app.services.snmp_interfaces import IF_NAME_OID, interface_names, parse_oid
+from app.services.snmp_service import SnmpTarget
+from app.services.snmp_trap_service import IF_DESCR_OID, trap_to_metrics
+
+RECEIVED_AT = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+IF_OPER_STATUS = ".1.3.6.1.2.1.2.2.1.8"
+
+
+def _target():
+    return SnmpTarget(uuid.uuid4(), "router-1", HostTypeEnum.mikrotik_snmp, "192.0.2.1", 161, "public", "2c")
+
+
+def _oid(oid, *index):
+    return parse_oid(oid) + index
+
+
+def _values(metrics):
+    return {metric.metric_key: metric.value_numeric if metric.value_text is None else metric.value_text for metric in metrics}
+
+
+def test_interface_name_is_taken_from_the_trap():
+    target = _target()
+    interface_names.set(target.host_id, {3: "cached_name"})
+    var_binds = [
+        (_oid(IF_OPER_STATUS, 3), Integer(2)),
+        (_oid(IF_NAME_OID, 3), OctetString("ether 3")),
+        (_oid(IF_DESCR_OID, 3), OctetString("descr")),
+    ]
+
+    assert _values(trap_to_metrics(target, var_binds, RECEIVED_AT)) == {"mikrotik.interface.ether_3.oper_status": 2.0}
+
+
+def test_interface_name_falls_back_to_if_descr():
+    target = _target()
+    var_binds = [(_oid(IF_DESCR_OID, 4), OctetString("sfp1")), (_oid(IF_OPER_STATUS, 4), Integer(1))]
+
+    assert _values(trap_to_metrics(target, var_binds, RECEIVED_AT)) == {"mikrotik.interface.sfp1.oper_status": 1.0}
+
+
+def test_interface_name_falls_back_to_the_poller_cache():
+    target = _target()
+    interface_names.set(target.host_id, {5: "ether5"})
+    var_binds = [(_oid(IF_OPER_STATUS, 5), Integer(1)), (_oid(IF_OPER_STATUS, 6), Integer(2))]
+
+    # ifIndex 6 невідомий ні trap-у, ні кешу - пропускається до наступного опитування
+    assert _values(trap_to_metrics(target, var_binds, RECEIVED_AT)) == {"mikrotik.interface.ether5.oper_status": 1.0}
+
+
+def test_timeticks_are_converted_to_seconds():
+    target = _target()
+    var_binds = [(parse_oid(".1.3.6.1.2.1.1.3.0"), TimeTicks(123456))]
+
+    assert _values(trap_to_metrics(target, var_binds, RECEIVED_AT)) == {"mikrotik.system.uptime": 1234.56}
+
+
+def test_divisor_is_applied(monkeypatch):
+    definitions = snmp_trap_service.METRIC_DEFINITIONS_BY_HOST_TYPE["mikrotik_snmp"] + [
+        {"key": "mikrotik.health.voltage", "snmp_oid": ".1.3.6.1.4.1.14988.1.1.3.8.0", "data_type": "numeric", "divisor": 10},
+    ]
+    monkeypatch.setitem(snmp_trap_service.METRIC_DEFINITIONS_BY_HOST_TYPE, "mikrotik_snmp", definitions)
+    var_binds = [(parse_oid(".1.3.6.1.4.1.14988.1.1.3.8.0"), Integer(243)), (parse_oid(".1.3.6.1.4.1.1.1"), Integer(1))]
+
+    assert _values(trap_to_metrics(_target(), var_binds, RECEIVED_AT)) == {"mikrotik.health.voltage": 24.3}
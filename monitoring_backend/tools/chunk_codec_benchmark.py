@@ -0,0 +1,120 @@
+# tools/chunk_codec_benchmark.py
+"""
+Перевірка кодека стиснених чанків (app.db.chunk_codec) і бенчмарк ступеня стиснення.
+
+1) Round-trip: граничні випадки (порожній чанк, одна точка, NaN/inf/-0.0, час до 1970 і великі
+   розриви, що потрапляють у кожен код delta-of-delta) та синтетичні серії мають декодуватись
+   біт-у-біт. Будь-яка розбіжність - код виходу 1.
+2) Бенчмарк: для типових форм серій (рівний крок, джитер агента, лічильник, gauge з шумом,
+   константа) - байт на точку, стиснення відносно 16 байт (8 час + 8 значення) і відносно
+   METRIC_DATA_ROW_BYTES (рядок metric_data з індексом первинного ключа), швидкість кодування/декодування.
+
+Запуск (з каталогу monitoring_backend, БД не потрібна):
+    python -m tools.chunk_codec_benchmark
+    python -m tools.chunk_codec_benchmark --points 17280 --seed 7
+"""
+import argparse
+import math
+import random
+import struct
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from app.db.chunk_codec import decode_chunk, encode_chunk
+
+RAW_POINT_BYTES = 16
+# Рядок metric_data: заголовок кортежу 24 + host_id 16 + metric_key_id 4 (+4 вирівнювання) + value_numeric 8
+# + timestamp 8 + вказівник 4 = 68, плюс запис індексу первинного ключа з INCLUDE (~48 + вказівник 4)
+METRIC_DATA_ROW_BYTES = 120
+STEP_US = 5_000_000
+START_US = 1_760_000_000_000_000
+
+Series = Tuple[List[int], List[float]]
+
+
+def _same(expected: Series, actual: Series) -> bool:
+    # Порівняння за бітами: NaN != NaN, а -0.0 == 0.0 при звичайному порівнянні
+    pack = lambda values: [struct.pack(">d", value) for value in values]
+    return expected[0] == actual[0] and pack(expected[1]) == pack(actual[1])
+
+
+def _edge_cases() -> Dict[str, Series]:
+    return {
+        "empty": ([], []),
+        "single point": ([START_US], [42.0]),
+        "special floats": ([1, 2, 3, 4, 5], [math.nan, math.inf, -math.inf, -0.0, 5e-324]),
+        "before epoch": ([-10**15, -10**15 + 1, 0], [1.0, 2.0, 3.0]),
+        # Розриви під кожен код delta-of-delta: 0, 7, 14, 20, 32 біти і 64-бітний escape
+        "dod widths": (
+            [0, 10, 20, 50, 8_050, 508_050, 2_000_508_050, 2**62, 2**62 + 1],
+            [1.0] * 9,
+        ),
+        "descending and repeats": ([10, 10, 5, 5, 100], [1.0, 1.0, 2.0, 2.0, 2.0]),
+    }
+
+
+def _timestamps(points: int, jitter_us: int, rng: random.Random) -> List[int]:
+    return [START_US + i * STEP_US + (rng.randint(-jitter_us, jitter_us) if jitter_us else 0) for i in range(points)]
+
+
+def _series_shapes(points: int, rng: random.Random) -> Dict[str, Callable[[], Series]]:
+    def counter() -> Series:
+        total, values = 0.0, []
+        for _ in range(points):
+            total += rng.randint(0, 50_000)
+            values.append(total)
+        return _timestamps(points, 0, rng), values
+
+    def gauge() -> Series:
+        level, values = 50.0, []
+        for _ in range(points):
+            level = min(max(level + rng.gauss(0, 2), 0.0), 100.0)
+            values.append(round(level, 1))
+        return _timestamps(points, 2_000, rng), values
+
+    return {
+        "constant, exact step": lambda: (_timestamps(points, 0, rng), [1.0] * points),
+        "slow integer gauge": lambda: (_timestamps(points, 0, rng), [float(i // 60) for i in range(points)]),
+        "cpu % (1 decimal), agent jitter": gauge,
+        "octet counter": counter,
+        "random doubles": lambda: (_timestamps(points, 2_000, rng), [rng.random() for _ in range(points)]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Round-trip check and compression benchmark for metric chunks")
+    parser.add_argument("--points", type=int, default=17280, help="точок у чанку (17280 = доба по 5 с)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    failed = False
+    for name, series in _edge_cases().items():
+        ok = _same(series, decode_chunk(encode_chunk(*series)))
+        failed = failed or not ok
+        print(f"[{'ok' if ok else 'FAIL'}] round-trip {name}")
+
+    print(f"\n{'series':<34}{'bytes/pt':>10}{'vs 16B':>9}{'vs row':>9}{'enc Mpt/s':>11}{'dec Mpt/s':>11}")
+    for name, make in _series_shapes(args.points, rng).items():
+        timestamps, values = make()
+        started = time.perf_counter()
+        data = encode_chunk(timestamps, values)
+        encode_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        decoded = decode_chunk(data)
+        decode_seconds = time.perf_counter() - started
+
+        ok = _same((timestamps, values), decoded)
+        failed = failed or not ok
+        per_point = len(data) / len(values)
+        print(
+            f"{name:<34}{per_point:>10.2f}{RAW_POINT_BYTES / per_point:>8.1f}x{METRIC_DATA_ROW_BYTES / per_point:>8.1f}x"
+            f"{len(values) / encode_seconds / 1e6:>11.2f}{len(values) / decode_seconds / 1e6:>11.2f}"
+            f"{'' if ok else '  ROUND-TRIP FAIL'}"
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
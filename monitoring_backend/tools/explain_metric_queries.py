@@ -0,0 +1,207 @@
+# tools/explain_metric_queries.py
+"""
+Регресійна перевірка планів гарячих запитів до metric_data через EXPLAIN (FORMAT JSON).
+Запити будуються тими самими *_stmt-функціями, що й у crud, тож перевіряється реальний SQL.
+Перевірка падає (код виходу 1), якщо будь-яка партиція metric_data читається не через
+первинний ключ metric_data_pkey (Seq Scan, Bitmap Heap Scan, інший індекс) або в плані запиту,
+що має віддавати рядки вже впорядкованими, з'являється Sort.
+
+Запуск (з каталогу monitoring_backend, DATABASE_URL - тестова БД PostgreSQL з міграціями):
+    python -m tools.explain_metric_queries
+    python -m tools.explain_metric_queries --seed-rows 100000000 --seed-hosts 2000 --seed-days 7
+--seed-* генерують синтетичні дані (хости explain-seed-N) - лише для стенду, не для робочої БД.
+"""
+import argparse
+import json
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import SessionLocal, engine
+from app.db.crud.crud_metric_data import metric_data_for_host_stmt
+from app.db.crud.crud_metric_key import get_or_create_metric_key_ids, metric_key_id_subquery
+from app.db.crud.crud_metric_rollup import rollup_points_stmt
+from app.db.models.enums import HostTypeEnum
+from app.db.models.host import Host
+from app.db.models.metric_data import MetricData
+from app.services import partition_service
+
+INDEX_SUFFIX = "_pkey"
+PARENT_INDEX = "metric_data_pkey"
+INDEX_SCAN_NODES = {"Index Scan", "Index Only Scan"}
+SEED_CHUNK_ROWS = 1_000_000
+
+
+@dataclass
+class PlanCheck:
+    name: str
+    stmt: Any
+    forbid_sort: bool
+
+
+def _walk(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+def _explain(db: Session, stmt, analyze: bool) -> Dict[str, Any]:
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    raw = db.execute(text(f"EXPLAIN ({options}) {sql}")).scalar()
+    return (json.loads(raw) if isinstance(raw, str) else raw)[0]
+
+
+def _problems(plan: Dict[str, Any], forbid_sort: bool) -> List[str]:
+    problems = []
+    for node in _walk(plan):
+        node_type = node["Node Type"]
+        relation = node.get("Relation Name", "")
+        if forbid_sort and "Sort" in node_type:
+            problems.append(f"{node_type} on {node.get('Sort Key')}")
+        if relation.startswith("metric_data"):
+            index_name = node.get("Index Name", "")
+            if node_type not in INDEX_SCAN_NODES:
+                problems.append(f"{node_type} on {relation}")
+            elif not (index_name.endswith(INDEX_SUFFIX) or index_name == PARENT_INDEX):
+                problems.append(f"{node_type} on {relation} using {index_name}")
+    return problems
+
+
+def _scan_summary(plan: Dict[str, Any]) -> str:
+    scans: Dict[str, int] = {}
+    for node in _walk(plan):
+        if node.get("Relation Name", "").startswith("metric_data"):
+            scans[node["Node Type"]] = scans.get(node["Node Type"], 0) + 1
+    return ", ".join(f"{count}x {node_type}" for node_type, count in sorted(scans.items())) or "no metric_data scans"
+
+
+def _pick_series(db: Session) -> Optional[Tuple[uuid.UUID, str]]:
+    row = db.execute(text(
+        "SELECT host_id, metric_key FROM metric_latest ORDER BY timestamp DESC LIMIT 1"
+    )).first()
+    return (row[0], row[1]) if row else None
+
+
+def _seed(db: Session, rows: int, hosts: int, keys: int, days: int) -> Tuple[uuid.UUID, str]:
+    host_ids = list(db.scalars(
+        select(Host.id).where(Host.name.like("explain-seed-%")).order_by(Host.name)
+    ).all())
+    for n in range(len(host_ids), hosts):
+        host = Host(name=f"explain-seed-{n:06d}", host_type=HostTypeEnum.windows_agent, is_monitored=False)
+        db.add(host)
+        db.flush()
+        host_ids.append(host.id)
+    host_ids = host_ids[:hosts]
+
+    # Партиції на весь діапазон, щоб дані не опинились у DEFAULT-партиції
+    now = datetime.now(timezone.utc)
+    span = timedelta(days=max(settings.METRIC_PARTITION_INTERVAL_DAYS, 1))
+    existing = {p.start for p in partition_service.list_partitions(db) if p.start}
+    start = partition_service.partition_start(now - timedelta(days=days))
+    while start <= now:
+        if start not in existing:
+            partition_service.create_partition(db, start)
+        start += span
+    key_ids = get_or_create_metric_key_ids(db, [f"seed.metric.{n}" for n in range(keys)])
+    db.commit()
+    key_id_list = [key_ids[f"seed.metric.{n}"] for n in range(keys)]
+
+    step_us = days * 86400 * 1_000_000 / max(rows, 1)
+    written = 0
+    started = time.perf_counter()
+    while written < rows:
+        chunk = min(SEED_CHUNK_ROWS, rows - written)
+        db.execute(text("""
+            INSERT INTO metric_data (host_id, metric_key_id, value_numeric, timestamp)
+            SELECT (CAST(:host_ids AS uuid[]))[1 + g % :hosts],
+                   (CAST(:key_ids AS integer[]))[1 + (g / :hosts) % :keys],
+                   random() * 100,
+                   CAST(:now AS timestamptz) - (g * :step_us) * interval '1 microsecond'
+            FROM generate_series(CAST(:first AS bigint), CAST(:last AS bigint)) AS g
+            ON CONFLICT DO NOTHING
+        """), {
+            "host_ids": [str(h) for h in host_ids], "hosts": len(host_ids),
+            "key_ids": key_id_list, "keys": len(key_id_list),
+            "now": now, "step_us": step_us, "first": written, "last": written + chunk - 1,
+        })
+        db.commit()
+        written += chunk
+        print(f"  seeded {written}/{rows} rows ({time.perf_counter() - started:.0f}s)")
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE metric_data"))
+    return host_ids[0], "seed.metric.0"
+
+
+def _checks(host_id: uuid.UUID, metric_key: str) -> List[PlanCheck]:
+    now = datetime.now(timezone.utc)
+    return [
+        # GET /hosts/{id}/metrics/?metric_key=...: рядки мають йти з індексу вже в порядку timestamp DESC
+        PlanCheck("history 1h", metric_data_for_host_stmt(host_id, metric_key, now - timedelta(hours=1), now), True),
+        PlanCheck("history 24h", metric_data_for_host_stmt(host_id, metric_key, now - timedelta(days=1), now), True),
+        # Останнє сире значення (як у lookback тригерів) - index-only завдяки INCLUDE (value_numeric)
+        PlanCheck("newest value", select(MetricData.timestamp, MetricData.value_numeric).where(
+            MetricData.host_id == host_id, MetricData.metric_key_id == metric_key_id_subquery(metric_key)
+        ).order_by(MetricData.timestamp.desc()).limit(1), True),
+        # Хвіст rollup-ів агрегується з metric_data; фінальний ORDER BY по union дозволяє Sort
+        PlanCheck("rollup tail 1m", rollup_points_stmt(
+            host_id, metric_key, 60, now - timedelta(hours=6), None, 0, 1000, None
+        ), False),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="EXPLAIN regression check for metric_data read paths")
+    parser.add_argument("--host-id", type=uuid.UUID, default=None)
+    parser.add_argument("--metric-key", default=None)
+    parser.add_argument("--analyze", action="store_true", help="EXPLAIN ANALYZE (виконує запити, показує час)")
+    parser.add_argument("--seed-rows", type=int, default=0)
+    parser.add_argument("--seed-hosts", type=int, default=1000)
+    parser.add_argument("--seed-keys", type=int, default=20)
+    parser.add_argument("--seed-days", type=int, default=7)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        series = None
+        if args.seed_rows:
+            print(f"Seeding {args.seed_rows} rows...")
+            series = _seed(db, args.seed_rows, args.seed_hosts, args.seed_keys, args.seed_days)
+        if args.host_id and args.metric_key:
+            series = (args.host_id, args.metric_key)
+        series = series or _pick_series(db)
+        if not series:
+            print("No metric data to check (use --seed-rows or --host-id/--metric-key).")
+            sys.exit(2)
+
+        total_rows = db.execute(text(
+            "SELECT coalesce(sum(reltuples), 0)::bigint FROM pg_class WHERE relname LIKE 'metric\\_data\\_%' AND relkind = 'r'"
+        )).scalar()
+        print(f"metric_data ~{total_rows} rows, series host_id={series[0]} metric_key={series[1]}")
+
+        failed = False
+        for check in _checks(*series):
+            plan = _explain(db, check.stmt, args.analyze)
+            problems = _problems(plan["Plan"], check.forbid_sort)
+            timing = f", {plan['Execution Time']:.2f} ms" if "Execution Time" in plan else ""
+            status = "FAIL" if problems else "ok"
+            print(f"[{status}] {check.name}: {_scan_summary(plan['Plan'])}{timing}")
+            for problem in problems:
+                print(f"       {problem}")
+            failed = failed or bool(problems)
+    finally:
+        db.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
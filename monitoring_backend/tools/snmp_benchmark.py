@@ -0,0 +1,121 @@
+# tools/snmp_benchmark.py
+"""
+Бенчмарк SNMP-опитувача: опитує --agents агентів (симулятор або реальні пристрої на послідовних портах)
+через snmp_service.collect_snmp_metrics з обмеженням паралельності та дедлайном, як це робить job,
+і звітує polls/s, p50/p99 затримки опитування хоста та CPU процесу на одне опитування.
+
+Запуск (з каталогу monitoring_backend), симулятор піднімається автоматично:
+    python -m tools.snmp_benchmark --spawn-simulator --agents 500 --rounds 5 --latency-ms 5
+Перший раунд лише прогріває кеші (транспорти, імена інтерфейсів, попередні значення лічильників)
+і в статистику не входить.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from typing import List, Tuple
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # опитування до БД не звертається
+
+from app.core.config import settings
+from app.db.models.enums import HostTypeEnum
+from app.services.snmp_service import SnmpTarget, collect_snmp_metrics
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = min(int(round(percent / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[position]
+
+
+async def _poll(target: SnmpTarget, semaphore: asyncio.Semaphore) -> Tuple[float, bool, int]:
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(collect_snmp_metrics(target), timeout=settings.SNMP_HOST_DEADLINE_SECONDS)
+            ok = result.status == "snmp_polled" and result.snmp_errors == 0
+            metrics = len(result.metrics)
+        except asyncio.TimeoutError:
+            ok, metrics = False, 0
+        return time.perf_counter() - started, ok, metrics
+
+
+async def run_benchmark(args) -> None:
+    targets = [
+        SnmpTarget(host_id=uuid.uuid4(), name=f"sim-{port}", host_type=HostTypeEnum.mikrotik_snmp,
+                   ip_address=args.host, port=port, community=args.community, version="2c")
+        for port in range(args.base_port, args.base_port + args.agents)
+    ]
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    latencies: List[float] = []
+    failures = 0
+    metrics_total = 0
+    wall_total = 0.0
+    cpu_total = 0.0
+    for round_number in range(args.rounds + 1):
+        cpu_started, wall_started = time.process_time(), time.perf_counter()
+        results = await asyncio.gather(*[_poll(target, semaphore) for target in targets])
+        wall, cpu = time.perf_counter() - wall_started, time.process_time() - cpu_started
+        if round_number == 0:
+            print(f"Warm-up round: {wall:.2f}s")
+            continue
+        wall_total += wall
+        cpu_total += cpu
+        latencies.extend(latency for latency, _, _ in results)
+        failures += sum(1 for _, ok, _ in results if not ok)
+        metrics_total += sum(metrics for _, _, metrics in results)
+        print(f"Round {round_number}: {len(results) / wall:.1f} polls/s, {wall:.2f}s wall, {cpu:.2f}s CPU")
+
+    polls = len(latencies)
+    print("-" * 60)
+    print(f"Agents:            {args.agents} (concurrency {args.concurrency}, {args.rounds} rounds)")
+    print(f"Polls:             {polls} ({failures} failed or partial)")
+    print(f"Metrics per poll:  {metrics_total / max(polls, 1):.1f}")
+    print(f"Throughput:        {polls / max(wall_total, 1e-9):.1f} polls/s")
+    print(f"Latency p50:       {_percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"Latency p99:       {_percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"Latency mean:      {statistics.fmean(latencies) * 1000 if latencies else 0:.1f} ms")
+    print(f"CPU per poll:      {cpu_total / max(polls, 1) * 1000:.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SNMP poller benchmark")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=20161)
+    parser.add_argument("--agents", type=int, default=100)
+    parser.add_argument("--community", default="public")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=settings.SNMP_POLL_CONCURRENCY)
+    parser.add_argument("--spawn-simulator", action="store_true", help="Запустити tools.snmp_simulator у підпроцесі")
+    parser.add_argument("--interfaces", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--loss", type=float, default=0.0)
+    args = parser.parse_args()
+
+    simulator = None
+    if args.spawn_simulator:
+        simulator = subprocess.Popen([
+            sys.executable, "-m", "tools.snmp_simulator",
+            "--host", args.host, "--base-port", str(args.base_port), "--agents", str(args.agents),
+            "--community", args.community, "--interfaces", str(args.interfaces),
+            "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms), "--loss", str(args.loss),
+        ])
+        time.sleep(1 + args.agents / 2000)  # час на прив'язку портів
+    try:
+        asyncio.run(run_benchmark(args))
+    finally:
+        if simulator:
+            simulator.terminate()
+            simulator.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+# tools/snmp_simulator.py
+"""
+Симулятор SNMP-агентів MikroTik для навантажувального тестування опитувача без реального обладнання.
+
+Піднімає --agents віртуальних агентів на послідовних UDP-портах, починаючи з --base-port. Кожен агент
+відповідає на OID-и з METRIC_DEFINITIONS_BY_HOST_TYPE["mikrotik_snmp"] та на таблицю інтерфейсів
+(ifName / ifHCIn/OutOctets / ifOperStatus) правдоподібними значеннями, що змінюються з часом.
+Підтримує GET, GETNEXT і GETBULK (v1/v2c), штучну затримку (--latency-ms, --jitter-ms) і втрати (--loss).
+
+Запуск (з каталогу monitoring_backend):
+    python -m tools.snmp_simulator --agents 1000 --base-port 20161 --latency-ms 5 --loss 0.01
+Для тисяч агентів може знадобитись підняти ліміт дескрипторів: ulimit -n 65536
+"""
+import argparse
+import asyncio
+import bisect
+import os
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # симулятору БД не потрібна, лише predefined_data
+
+from pyasn1.codec.ber import decoder, encoder
+from pysnmp.proto import api, rfc1902, rfc1905
+
+from app.predefined_data import METRIC_DEFINITIONS_BY_HOST_TYPE, INTERFACE_METRICS_BY_HOST_TYPE
+from app.services.snmp_interfaces import IF_NAME_OID
+
+HOST_TYPE = "mikrotik_snmp"
+MEMORY_TOTAL = 262144
+
+OidTuple = Tuple[int, ...]
+
+
+def _parse_oid(oid: str) -> OidTuple:
+    return tuple(int(part) for part in oid.strip(".").split("."))
+
+
+class VirtualAgent:
+    """Стан одного віртуального MikroTik: час старту, швидкості трафіку інтерфейсів, поточне навантаження."""
+
+    def __init__(self, interfaces: int, rng: random.Random):
+        self.rng = rng
+        self.started = time.time() - rng.randint(60, 86400 * 30)
+        self.memory_used = MEMORY_TOTAL * rng.uniform(0.3, 0.6)
+        self.if_rates = {index: (rng.uniform(1e4, 1e8), rng.uniform(1e4, 1e8)) for index in range(1, interfaces + 1)}
+        self.if_base = {index: (rng.randint(0, 2 ** 40), rng.randint(0, 2 ** 40)) for index in self.if_rates}
+
+    def uptime(self) -> rfc1902.TimeTicks:
+        return rfc1902.TimeTicks(int((time.time() - self.started) * 100) % 2 ** 32)
+
+    def memory_used_value(self) -> rfc1902.Integer:
+        self.memory_used = min(max(self.memory_used + self.rng.uniform(-2048, 2048), MEMORY_TOTAL * 0.1), MEMORY_TOTAL)
+        return rfc1902.Integer(int(self.memory_used))
+
+    def cpu_load(self) -> rfc1902.Integer:
+        return rfc1902.Integer(self.rng.randint(1, 60))
+
+    def octets(self, index: int, direction: int) -> rfc1902.Counter64:
+        elapsed = time.time() - self.started
+        value = self.if_base[index][direction] + int(self.if_rates[index][direction] / 8 * elapsed)
+        return rfc1902.Counter64(value % 2 ** 64)
+
+    def oper_status(self, index: int) -> rfc1902.Integer:
+        return rfc1902.Integer(2 if self.rng.random() < 0.001 else 1)
+
+
+def build_mib(interfaces: int) -> Tuple[List[OidTuple], Dict[OidTuple, Callable[[VirtualAgent], object]]]:
+    """Спільна для всіх агентів структура MIB: відсортований список OID-ів і генератор значення для кожного."""
+    scalar_generators = {
+        "mikrotik.system.uptime": VirtualAgent.uptime,
+        "mikrotik.system.memory.total": lambda agent: rfc1902.Integer(MEMORY_TOTAL),
+        "mikrotik.system.memory.used": VirtualAgent.memory_used_value,
+        "mikrotik.system.cpu.load": VirtualAgent.cpu_load,
+    }
+    mib: Dict[OidTuple, Callable[[VirtualAgent], object]] = {}
+    for definition in METRIC_DEFINITIONS_BY_HOST_TYPE.get(HOST_TYPE, []):
+        if definition.get("snmp_oid"):
+            mib[_parse_oid(definition["snmp_oid"])] = scalar_generators.get(
+                definition["key"], lambda agent: rfc1902.Integer(agent.rng.randint(0, 100))
+            )
+
+    column_generators = {
+        _parse_oid(IF_NAME_OID): lambda index: (lambda agent: rfc1902.OctetString(f"ether{index}")),
+    }
+    for definition in INTERFACE_METRICS_BY_HOST_TYPE.get(HOST_TYPE, []):
+        column = _parse_oid(definition["snmp_column_oid"])
+        if definition["key_template"].endswith(".in.bps"):
+            column_generators[column] = lambda index: (lambda agent: agent.octets(index, 0))
+        elif definition["key_template"].endswith(".out.bps"):
+            column_generators[column] = lambda index: (lambda agent: agent.octets(index, 1))
+        else:
+            column_generators[column] = lambda index: (lambda agent: agent.oper_status(index))
+    for column, make_generator in column_generators.items():
+        for index in range(1, interfaces + 1):
+            mib[column + (index,)] = make_generator(index)
+
+    return sorted(mib), mib
+
+
+class AgentProtocol(asyncio.DatagramProtocol):
+    def __init__(self, agent: VirtualAgent, oids: List[OidTuple], mib: Dict, args):
+        self.agent = agent
+        self.oids = oids
+        self.mib = mib
+        self.args = args
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if self.args.loss and random.random() < self.args.loss:
+            return
+        try:
+            response = self._handle(data)
+        except Exception as e:
+            print(f"Simulator: failed to handle request from {addr}: {e}")
+            return
+        if response is None:
+            return
+        delay = max(self.args.latency_ms + random.uniform(-self.args.jitter_ms, self.args.jitter_ms), 0) / 1000.0
+        if delay:
+            asyncio.get_running_loop().call_later(delay, self.transport.sendto, response, addr)
+        else:
+            self.transport.sendto(response, addr)
+
+    def _next(self, oid: OidTuple) -> Optional[OidTuple]:
+        position = bisect.bisect_right(self.oids, oid)
+        return self.oids[position] if position < len(self.oids) else None
+
+    def _handle(self, data: bytes) -> Optional[bytes]:
+        version = int(api.decodeMessageVersion(data))
+        p_mod = api.PROTOCOL_MODULES[version]
+        request, _ = decoder.decode(data, asn1Spec=p_mod.Message())
+        if str(p_mod.apiMessage.get_community(request)) != self.args.community:
+            return None
+        request_pdu = p_mod.apiMessage.get_pdu(request)
+        response = p_mod.apiMessage.get_response(request)
+        response_pdu = p_mod.apiMessage.get_pdu(response)
+        requested = [tuple(oid) for oid, _ in p_mod.apiPDU.get_varbinds(request_pdu)]
+        is_v1 = version == api.SNMP_VERSION_1
+
+        var_binds = []
+        if request_pdu.isSameTypeWith(p_mod.GetRequestPDU()):
+            for position, oid in enumerate(requested):
+                if oid in self.mib:
+                    var_binds.append((oid, self.mib[oid](self.agent)))
+                elif is_v1:
+                    p_mod.apiPDU.set_error_status(response_pdu, 2)  # noSuchName
+                    p_mod.apiPDU.set_error_index(response_pdu, position + 1)
+                    var_binds = [(o, rfc1902.Null()) for o in requested]
+                    break
+                else:
+                    var_binds.append((oid, rfc1905.noSuchObject))
+        elif request_pdu.isSameTypeWith(p_mod.GetNextRequestPDU()):
+            for position, oid in enumerate(requested):
+                next_oid = self._next(oid)
+                if next_oid is not None:
+                    var_binds.append((next_oid, self.mib[next_oid](self.agent)))
+                elif is_v1:
+                    p_mod.apiPDU.set_error_status(response_pdu, 2)
+                    p_mod.apiPDU.set_error_index(response_pdu, position + 1)
+                    var_binds = [(o, rfc1902.Null()) for o in requested]
+                    break
+                else:
+                    var_binds.append((oid, rfc1905.endOfMibView))
+        elif not is_v1 and request_pdu.isSameTypeWith(p_mod.GetBulkRequestPDU()):
+            non_repeaters = int(p_mod.apiBulkPDU.get_non_repeaters(request_pdu))
+            max_repetitions = int(p_mod.apiBulkPDU.get_max_repetitions(request_pdu))
+            for oid in requested[:non_repeaters]:
+                next_oid = self._next(oid)
+                var_binds.append((next_oid, self.mib[next_oid](self.agent)) if next_oid else (oid, rfc1905.endOfMibView))
+            cursors = list(requested[non_repeaters:])
+            for _ in range(max_repetitions if cursors else 0):
+                for column, oid in enumerate(cursors):
+                    next_oid = self._next(oid) if oid is not None else None
+                    if next_oid is None:
+                        var_binds.append((oid or requested[non_repeaters + column], rfc1905.endOfMibView))
+                        cursors[column] = None
+                    else:
+                        var_binds.append((next_oid, self.mib[next_oid](self.agent)))
+                        cursors[column] = next_oid
+                if all(cursor is None for cursor in cursors):
+                    break
+        else:
+            p_mod.apiPDU.set_error_status(response_pdu, 5)  # genErr - SET і решта не підтримуються
+            var_binds = [(o, rfc1902.Null()) for o in requested]
+
+        p_mod.apiPDU.set_varbinds(response_pdu, var_binds)
+        return encoder.encode(response)
+
+
+async def run_simulator(args) -> None:
+    loop = asyncio.get_running_loop()
+    oids, mib = build_mib(args.interfaces)
+    rng = random.Random(args.seed)
+    transports = []
+    for port in range(args.base_port, args.base_port + args.agents):
+        agent = VirtualAgent(args.interfaces, random.Random(rng.random()))
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda agent=agent: AgentProtocol(agent, oids, mib, args), local_addr=(args.host, port)
+        )
+        transports.append(transport)
+    print(f"SNMP simulator: {len(transports)} agents on {args.host}:{args.base_port}-{args.base_port + args.agents - 1} "
+          f"({len(oids)} OIDs each, latency {args.latency_ms}±{args.jitter_ms} ms, loss {args.loss:.1%})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for transport in transports:
+            transport.close()
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Local MikroTik SNMP agent simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=20161)
+    parser.add_argument("--agents", type=int, default=100)
+    parser.add_argument("--interfaces", type=int, default=8)
+    parser.add_argument("--community", default="public")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--loss", type=float, default=0.0, help="Частка відкинутих запитів, 0..1")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run_simulator(build_arg_parser().parse_args()))
+    except KeyboardInterrupt:
+        pass